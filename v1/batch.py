@@ -0,0 +1,112 @@
+# batch.py
+"""
+Génération de heatmaps par lots à partir d'un manifeste CSV ou JSON
+
+Usage (depuis le dossier v1) :
+    python batch.py manifeste.csv --output resultats/ [--workers 4] [--png]
+
+Chaque job produit <id>.npz (grille float32 du path loss, récepteurs et
+métadonnées, voir utils/export.py) et, avec --png, la figure <id>.png. Le
+journal resultats/results.jsonl est complété après chaque job : relancer la
+même commande reprend aux jobs non terminés.
+
+Avec --memory-budget-mb, les très grands plans sont calculés par tuiles à
+mémoire bornée : la grille est écrite directement dans <id>.npy (projeté en
+mémoire) et les métadonnées dans <id>.json.
+"""
+
+import argparse
+import sys
+import warnings
+
+import joblib
+import matplotlib
+
+from config import (MODEL_FILENAME, SURROGATE_FILENAME, SURROGATE_ERROR_BOUND_DB,
+                    INFERENCE_CONFIG, PARALLEL_CONFIG, PIPELINE_CACHE_ENTRIES,
+                    PREDICTION_MODES, RENDER_MODES)
+
+
+def load_predictor(model_path, prediction_mode):
+    """
+    Charge le modèle une seule fois et construit le prédicteur demandé
+
+    Args:
+        model_path: Chemin du modèle XGBoost
+        prediction_mode: 'model', 'booster' ou 'surrogate'
+
+    Returns:
+        Objet exposant predict(X)
+    """
+    model = joblib.load(model_path)
+    if prediction_mode == 'booster':
+        from models.fast_predictor import BoosterPredictor
+        return BoosterPredictor(model, INFERENCE_CONFIG["nthread"],
+                                INFERENCE_CONFIG["chunk_size"],
+                                INFERENCE_CONFIG["deduplicate"])
+    if prediction_mode == 'surrogate':
+        from models.surrogate import load_or_build_surrogate
+        return load_or_build_surrogate(model, model_path, SURROGATE_FILENAME,
+                                       SURROGATE_ERROR_BOUND_DB)
+    return model
+
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('manifest', help="Manifeste des jobs (.csv ou .json)")
+    parser.add_argument('--output', '-o', required=True,
+                        help="Dossier des résultats")
+    parser.add_argument('--workers', '-w', type=int,
+                        default=PARALLEL_CONFIG["max_workers"],
+                        help="Nombre de processus")
+    parser.add_argument('--model', default=MODEL_FILENAME,
+                        help="Chemin du modèle")
+    parser.add_argument('--prediction-mode', choices=list(PREDICTION_MODES),
+                        default='surrogate')
+    parser.add_argument('--png', action='store_true',
+                        help="Enregistrer aussi la figure de chaque job")
+    parser.add_argument('--render', choices=list(RENDER_MODES), default='raster',
+                        help="Rendu des PNG (matplotlib : qualité publication)")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="Recalculer les jobs déjà terminés")
+    parser.add_argument('--memory-budget-mb', type=float, default=None,
+                        help="Calcul par tuiles à mémoire bornée (très grands "
+                             "plans) : écrit <id>.npy et <id>.json, sans PNG")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    matplotlib.use('Agg')
+    from models.surrogate import file_sha256
+    from utils.batch import ManifestError, format_summary, load_manifest, run_batch
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except ManifestError as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        predictor = load_predictor(args.model, args.prediction_mode)
+    except Exception as e:
+        print(f"Erreur lors du chargement du modèle: {e}", file=sys.stderr)
+        return 2
+
+    def report(record):
+        status = 'ok' if record['status'] == 'ok' else f"ERREUR ({record['error']})"
+        print(f"[{record['id']}] {status} en {record['seconds']:.2f}s", flush=True)
+
+    records = run_batch(jobs, predictor, args.output, workers=args.workers,
+                        save_png=args.png, resume=not args.no_resume,
+                        cache_entries=PIPELINE_CACHE_ENTRIES, on_result=report,
+                        render_mode=args.render,
+                        model_version=file_sha256(args.model),
+                        memory_budget_mb=args.memory_budget_mb)
+
+    print()
+    print(format_summary(records, skipped=len(jobs) - len(records)))
+    return 0 if all(r['status'] == 'ok' for r in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# benchmarks/bench_inference.py
+"""
+Benchmark de l'inférence : predict_path_loss (modèle sklearn) contre
+BoosterPredictor (booster natif, float32, déduplication)
+
+Usage (depuis le dossier v1) :
+    python -m benchmarks.bench_inference [--sizes 200x150 800x600 2000x1500]
+"""
+
+import argparse
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+from config import MODEL_FILENAME
+from models.fast_predictor import BoosterPredictor
+from utils.path_loss_calculator import RxData, predict_path_loss
+
+
+def make_synthetic_rx(img_width, img_height, step, room_size_px=60, seed=0):
+    """
+    Construit une grille de récepteurs synthétique (sans plan)
+
+    Le nombre de murs croît avec la distance au Tx, à raison d'un mur par
+    pièce traversée, avec un bruit aléatoire.
+
+    Returns:
+        RxData: Récepteurs avec distances et nombres de murs
+    """
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:img_height:step, 0:img_width:step]
+    rx_x = cols.ravel().astype(np.int32)
+    rx_y = rows.ravel().astype(np.int32)
+    distance_px = np.hypot(rx_x - img_width / 2, rx_y - img_height / 2)
+    num_walls = (distance_px // room_size_px + rng.integers(0, 2, rx_x.size))
+    distance_m = np.maximum(distance_px * 0.02, 1e-6).astype(np.float32)
+    return RxData(rx_x, rx_y, distance_m, num_walls.astype(np.int16), 2400, step)
+
+
+def time_call(func, repeat):
+    """Retourne le meilleur temps d'exécution (secondes) sur repeat essais"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(sizes, step, repeat, nthread, chunk_size):
+    """Exécute le benchmark et affiche un tableau des temps"""
+    model = joblib.load(MODEL_FILENAME)
+    predictor = BoosterPredictor(model, nthread=nthread, chunk_size=chunk_size)
+
+    print(f"{'grille':>12} {'points':>9} {'uniques':>9} {'dataframe':>10} "
+          f"{'rxdata':>10} {'booster':>10} {'gain':>6}")
+    for img_width, img_height in sizes:
+        rx = make_synthetic_rx(img_width, img_height, step)
+        rx_df = rx.to_dataframe()
+
+        t_df, ref = time_call(lambda: predict_path_loss(rx_df, model), repeat)
+        t_rx, _ = time_call(lambda: predict_path_loss(rx, model), repeat)
+        t_fast, fast = time_call(lambda: predict_path_loss(rx, predictor), repeat)
+
+        if not np.array_equal(ref['Path_Loss_Predicted'].values.astype(np.float32),
+                              fast.path_loss):
+            raise AssertionError("BoosterPredictor diverge de predict_path_loss")
+
+        print(f"{img_width:>5}x{img_height:<6} {len(rx):>9} "
+              f"{predictor.last_unique_rows:>9} {t_df:>9.3f}s {t_rx:>9.3f}s "
+              f"{t_fast:>9.3f}s {t_df / t_fast:>5.1f}x")
+
+
+def parse_size(text):
+    """Convertit '800x600' en (800, 600)"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', nargs='+', type=parse_size,
+                        default=[(200, 150), (800, 600), (2000, 1500)])
+    parser.add_argument('--step', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--nthread', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=262144)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    run(args.sizes, args.step, args.repeat, args.nthread, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
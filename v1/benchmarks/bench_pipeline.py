@@ -0,0 +1,374 @@
+# benchmarks/bench_pipeline.py
+"""
+Benchmark du pipeline étape par étape sur des plans synthétiques
+
+Usage (depuis le dossier v1) :
+    python -m benchmarks.bench_pipeline [--sizes 400x300 800x600] [--steps 4 8 16]
+        [--density 0.5] [--output bench.json] [--compare bench_precedent.json]
+
+Chaque étape (process_uploaded_image, generate_rx_data,
+compute_LOS_and_walls_corrected, predict_path_loss, create_interpolated_grid,
+create_heatmap_plot) est chronométrée pour chaque taille de plan et chaque
+pas, ainsi que les moteurs rapides qui la remplacent. Les moteurs rapides
+sont ensuite comparés à la sortie de référence ; pour le saut de l'espace
+libre (compute_LOS_and_walls_traced), le nombre d'échantillons lus est
+comparé à celui de l'échantillonnage complet. Les résultats sont
+enregistrés en JSON pour comparer deux commits avec --compare.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import warnings
+from datetime import datetime, timezone
+
+import joblib
+import matplotlib
+import numpy as np
+
+from benchmarks.bench_inference import parse_size, time_call
+from benchmarks.synthetic_plans import encode_plan, generate_floor_plan, wall_fraction
+from config import MODEL_FILENAME, SURROGATE_FILENAME, SURROGATE_ERROR_BOUND_DB
+
+
+# Tolérances des moteurs approchés (les autres doivent être identiques)
+RADIAL_MAX_MEAN_WALLS = 0.25
+LATTICE_MAX_MEAN_DB = 1.0
+
+
+def reference_wall_counts(tx, rx_points, wall_map):
+    """Murs traversés calculés rayon par rayon (compute_LOS_and_walls_corrected)"""
+    from utils.image_processing import compute_LOS_and_walls_corrected
+    # Coordonnées converties en int Python : en int16, les carrés débordent
+    return np.array([compute_LOS_and_walls_corrected(tx, (int(rx[0]), int(rx[1])),
+                                                     wall_map)[1]
+                     for rx in rx_points], dtype=np.int32)
+
+
+def _git_commit():
+    """Commit courant (None hors d'un dépôt git)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _check(name, passed, **detail):
+    """Résultat d'une vérification d'un moteur rapide"""
+    return {'name': name, 'passed': bool(passed), **detail}
+
+
+def bench_case(plan_bytes, step, predictors, repeat, ray_sample, workers):
+    """
+    Chronomètre chaque étape pour un plan et un pas, et vérifie les moteurs
+
+    Args:
+        plan_bytes: Plan encodé en PNG
+        step: Pas de la grille en pixels
+        predictors: Prédicteurs par nom ('model' = référence)
+        repeat: Nombre d'essais (meilleur temps retenu)
+        ray_sample: Nombre de rayons chronométrés avec la version scalaire
+        workers: Processus pour la vérification du calcul parallèle (0 = non)
+
+    Returns:
+        tuple: (temps par étape en secondes, nombre de récepteurs, vérifications)
+    """
+    import matplotlib.pyplot as plt
+    from utils.chunked import run_chunked_heatmap
+    from utils.image_processing import (build_wall_distance_map,
+                                        compare_wall_count_methods,
+                                        compute_LOS_and_walls_batch,
+                                        compute_LOS_and_walls_traced,
+                                        compute_walls_radial_sweep,
+                                        process_uploaded_image)
+    from utils.instrumentation import Profiler
+    from utils.parallel import run_parallel_geometry
+    from utils.path_loss_calculator import (compute_ap_geometry,
+                                            create_interpolated_grid,
+                                            generate_rx_data, predict_path_loss,
+                                            rx_to_lattice)
+    from utils.plotting import create_heatmap_plot
+    from utils.rendering import render_heatmap
+
+    model = predictors['model']
+    stages, checks = {}, []
+
+    stages['process_uploaded_image'], (binary_img, gray_img, _) = time_call(
+        lambda: process_uploaded_image(plan_bytes, use_cache=False), repeat)
+    img_height, img_width = binary_img.shape
+    tx = (img_width // 2, img_height // 2)
+    length_m, width_m, frequency_mhz = img_width / 20, img_height / 20, 2400
+
+    stages['generate_rx_data'], rx = time_call(
+        lambda: generate_rx_data(binary_img, tx[0], tx[1], length_m, width_m,
+                                 frequency_mhz, step), repeat)
+    rx_points = np.column_stack((rx.rx_x, rx.rx_y))
+
+    # Version scalaire : chronométrée sur un échantillon, extrapolée à la grille
+    sample = rx_points[np.linspace(0, len(rx_points) - 1,
+                                   min(ray_sample, len(rx_points))).astype(np.intp)]
+    seconds, reference = time_call(
+        lambda: reference_wall_counts(tx, sample, binary_img), 1)
+    stages['compute_LOS_and_walls_corrected'] = (seconds * len(rx_points)
+                                                 / max(len(sample), 1))
+    stages['compute_LOS_and_walls_batch'], _ = time_call(
+        lambda: compute_LOS_and_walls_batch(tx, rx_points, binary_img), repeat)
+    stages['compute_walls_radial_sweep'], _ = time_call(
+        lambda: compute_walls_radial_sweep(tx, rx_points, binary_img), repeat)
+    stages['build_wall_distance_map'], distance_map = time_call(
+        lambda: build_wall_distance_map(binary_img), repeat)
+    stages['compute_LOS_and_walls_traced'], _ = time_call(
+        lambda: compute_LOS_and_walls_traced(tx, rx_points, binary_img, distance_map),
+        repeat)
+
+    batch = compute_LOS_and_walls_batch(tx, sample, binary_img)[1]
+    checks.append(_check('compute_LOS_and_walls_batch', np.array_equal(batch, reference),
+                         rays=len(sample)))
+
+    # Échantillons lus : échantillonnage complet contre saut de l'espace libre
+    dense_profiler = Profiler(trace_memory=False)
+    traced_profiler = Profiler(trace_memory=False)
+    with dense_profiler.activate():
+        dense = compute_LOS_and_walls_batch(tx, rx_points, binary_img)[1]
+    with traced_profiler.activate():
+        traced = compute_LOS_and_walls_traced(tx, rx_points, binary_img, distance_map)[1]
+    dense_samples = int(dense_profiler.counters.get('ray_samples', 0))
+    traced_samples = int(traced_profiler.counters.get('ray_samples', 0))
+    checks.append(_check('compute_LOS_and_walls_traced', np.array_equal(traced, dense),
+                         dense_samples=dense_samples, traced_samples=traced_samples,
+                         sample_ratio=round(dense_samples / max(traced_samples, 1), 2)))
+    agreement = compare_wall_count_methods(tx, rx_points, binary_img, 'radial')
+    checks.append(_check('compute_walls_radial_sweep',
+                         agreement['mean_abs_error'] <= RADIAL_MAX_MEAN_WALLS,
+                         **agreement))
+
+    stages['predict_path_loss'], rx = time_call(
+        lambda: predict_path_loss(rx, model), repeat)
+    for name, predictor in predictors.items():
+        if name == 'model':
+            continue
+        seconds, fast = time_call(lambda: predict_path_loss(rx, predictor), repeat)
+        stages[f'predict_path_loss[{name}]'] = seconds
+        max_error = float(np.max(np.abs(fast.path_loss - rx.path_loss)))
+        bound = SURROGATE_ERROR_BOUND_DB if name == 'surrogate' else 0.0
+        checks.append(_check(f'predict_path_loss[{name}]', max_error <= bound,
+                             max_abs_error_db=max_error, bound_db=bound))
+
+    stages['create_interpolated_grid'], (grid_x, grid_y, cubic) = time_call(
+        lambda: create_interpolated_grid(rx, img_width, img_height, binary_img,
+                                         method='cubic'), repeat)
+    stages['create_interpolated_grid[lattice]'], (_, _, lattice_grid) = time_call(
+        lambda: create_interpolated_grid(rx, img_width, img_height, binary_img,
+                                         method='lattice'), repeat)
+    both = np.isfinite(cubic) & np.isfinite(lattice_grid)
+    mean_diff = (float(np.mean(np.abs(cubic[both] - lattice_grid[both])))
+                 if both.any() else 0.0)
+    checks.append(_check('create_interpolated_grid[lattice]',
+                         mean_diff <= LATTICE_MAX_MEAN_DB, mean_abs_diff_db=mean_diff,
+                         bound_db=LATTICE_MAX_MEAN_DB))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_path = os.path.join(tmp_dir, 'grid.npy')
+        seconds, chunked = time_call(
+            lambda: run_chunked_heatmap(binary_img, [tx], length_m, width_m,
+                                        frequency_mhz, step, model, out_path,
+                                        memory_budget_mb=64), repeat)
+        stages['run_chunked_heatmap'] = seconds
+        checks.append(_check('run_chunked_heatmap',
+                             np.array_equal(chunked.grid, lattice_grid.T,
+                                            equal_nan=True)))
+        del chunked
+
+    if workers > 1:
+        seconds, parallel = time_call(
+            lambda: run_parallel_geometry(binary_img, [tx], length_m, width_m, step,
+                                          workers=workers), 1)
+        stages[f'run_parallel_geometry[{workers}]'] = seconds
+        serial = compute_ap_geometry(binary_img, [tx], rx.rx_x, rx.rx_y,
+                                     length_m, width_m)
+        checks.append(_check('run_parallel_geometry',
+                             np.array_equal(parallel[2], serial[0])
+                             and np.array_equal(parallel[3], serial[1]),
+                             workers=workers))
+
+    def plot():
+        fig = create_heatmap_plot(binary_img, gray_img, grid_x, grid_y, cubic,
+                                  rx.path_loss, tx[0], tx[1], img_width, img_height)
+        plt.close(fig)
+
+    stages['create_heatmap_plot'], _ = time_call(plot, repeat)
+    lattice = rx_to_lattice(rx.rx_x, rx.rx_y, rx.path_loss, step, img_width, img_height)
+    stages['render_heatmap'], _ = time_call(
+        lambda: render_heatmap(gray_img, lattice_grid.T, rx.path_loss, [tx],
+                               lattice, step), repeat)
+
+    return stages, len(rx), checks
+
+
+def load_predictors(names):
+    """Charge le modèle de référence et les prédicteurs rapides demandés"""
+    from models.fast_predictor import BoosterPredictor
+    from models.surrogate import load_or_build_surrogate
+
+    model = joblib.load(MODEL_FILENAME)
+    predictors = {'model': model}
+    if 'booster' in names:
+        predictors['booster'] = BoosterPredictor(model)
+    if 'surrogate' in names:
+        predictors['surrogate'] = load_or_build_surrogate(
+            model, MODEL_FILENAME, SURROGATE_FILENAME, SURROGATE_ERROR_BOUND_DB)
+    return predictors
+
+
+def run(sizes, steps, densities, repeat=1, ray_sample=500, workers=2,
+        predictor_names=('booster', 'surrogate'), seed=0, log=print):
+    """
+    Exécute le benchmark sur toutes les combinaisons taille x densité x pas
+
+    Returns:
+        dict: Rapport sérialisable en JSON (environnement, temps, vérifications)
+    """
+    predictors = load_predictors(predictor_names)
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': [],
+    }
+
+    for img_width, img_height in sizes:
+        for density in densities:
+            plan = generate_floor_plan(img_width, img_height, density, seed=seed)
+            plan_bytes = encode_plan(plan)
+            for step in steps:
+                stages, receivers, checks = bench_case(plan_bytes, step, predictors,
+                                                       repeat, ray_sample, workers)
+                result = {
+                    'size': f'{img_width}x{img_height}',
+                    'density': density,
+                    'wall_fraction': round(wall_fraction(plan), 4),
+                    'step': step,
+                    'receivers': receivers,
+                    'stages': {name: round(value, 5) for name, value in stages.items()},
+                    'checks': checks,
+                }
+                report['results'].append(result)
+                log(format_result(result))
+    return report
+
+
+def format_result(result):
+    """Tableau texte des temps d'un cas"""
+    failed = [check['name'] for check in result['checks'] if not check['passed']]
+    lines = [f"{result['size']} densité {result['density']} "
+             f"(murs {result['wall_fraction']:.1%}) pas {result['step']} : "
+             f"{result['receivers']} récepteurs"]
+    for name, seconds in result['stages'].items():
+        lines.append(f"  {name:<40} {seconds:>9.4f}s")
+    for check in result['checks']:
+        if 'traced_samples' in check:
+            lines.append(f"  échantillons de rayons : {check['dense_samples']} complets, "
+                         f"{check['traced_samples']} avec saut de l'espace libre "
+                         f"({check['sample_ratio']:.1f}x moins)")
+    lines.append(f"  vérifications : {'ÉCHEC ' + ', '.join(failed) if failed else 'ok'}")
+    return '\n'.join(lines)
+
+
+def compare_reports(previous, current, threshold=1.2, min_seconds=0.01):
+    """
+    Compare deux rapports cas par cas et étape par étape
+
+    Args:
+        previous: Rapport de référence (commit précédent)
+        current: Nouveau rapport
+        threshold: Rapport de temps au-delà duquel une étape est une régression
+        min_seconds: Durée en dessous de laquelle une étape n'est pas
+            signalée (bruit de mesure)
+
+    Returns:
+        tuple: (lignes du tableau, liste des régressions)
+    """
+    def key(result):
+        return result['size'], result['density'], result['step']
+
+    old_results = {key(result): result for result in previous['results']}
+    lines = [f"{'cas':<28} {'étape':<40} {'avant':>9} {'après':>9} {'ratio':>6}"]
+    regressions = []
+    for result in current['results']:
+        old = old_results.get(key(result))
+        if old is None:
+            continue
+        case = f"{result['size']} d={result['density']} pas={result['step']}"
+        for name, seconds in result['stages'].items():
+            before = old['stages'].get(name)
+            if not before:
+                continue
+            ratio = seconds / before
+            flag = ''
+            if ratio > threshold and seconds >= min_seconds:
+                flag = '  <- régression'
+                regressions.append((case, name, ratio))
+            lines.append(f"{case:<28} {name:<40} {before:>8.4f}s {seconds:>8.4f}s "
+                         f"{ratio:>5.2f}x{flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', nargs='+', type=parse_size,
+                        default=[(400, 300), (800, 600)])
+    parser.add_argument('--steps', nargs='+', type=int, default=[4, 8, 16])
+    parser.add_argument('--density', nargs='+', type=float, default=[0.5],
+                        help="Densité des cloisons (0 à 1)")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--ray-sample', type=int, default=500,
+                        help="Rayons chronométrés avec la version scalaire")
+    parser.add_argument('--workers', type=int, default=2,
+                        help="Processus pour vérifier le calcul parallèle (0 = non)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', help="Fichier JSON des résultats")
+    parser.add_argument('--compare', help="Rapport JSON d'un commit précédent")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="Ratio de temps signalé comme régression")
+    parser.add_argument('--min-seconds', type=float, default=0.01,
+                        help="Durée minimale d'une étape signalée comme régression")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    matplotlib.use('Agg')
+    report = run(args.sizes, args.steps, args.density, args.repeat,
+                 args.ray_sample, args.workers, seed=args.seed)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    if any(not check['passed'] for result in report['results']
+           for check in result['checks']):
+        status = 1
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        lines, regressions = compare_reports(previous, report, args.threshold,
+                                              args.min_seconds)
+        print()
+        print(f"Comparaison avec {previous.get('commit') or args.compare}")
+        print('\n'.join(lines))
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de {args.threshold:.2f}x")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# benchmarks/synthetic_plans.py
+"""
+Générateur procédural de plans d'étage synthétiques (pièces, couloir, portes)
+"""
+
+import cv2
+import numpy as np
+
+
+def _split_rooms(rect, room_size, rng, walls):
+    """
+    Découpe récursivement un rectangle en pièces (partition binaire)
+
+    Chaque découpe ajoute un mur (x0, y0, x1, y1) à walls.
+
+    Returns:
+        list: Pièces (x0, y0, x1, y1)
+    """
+    x0, y0, x1, y1 = rect
+    width, height = x1 - x0, y1 - y0
+    if max(width, height) <= room_size:
+        return [rect]
+
+    if width >= height:
+        x = x0 + int(width * rng.uniform(0.35, 0.65))
+        walls.append((x, y0, x, y1))
+        halves = ((x0, y0, x, y1), (x, y0, x1, y1))
+    else:
+        y = y0 + int(height * rng.uniform(0.35, 0.65))
+        walls.append((x0, y, x1, y))
+        halves = ((x0, y0, x1, y), (x0, y, x1, y1))
+    return [room for half in halves for room in _split_rooms(half, room_size, rng, walls)]
+
+
+def _door(start, stop, door_width, rng):
+    """Position (début, fin) d'une porte sur un segment, ou None s'il est trop court"""
+    if stop - start < 2 * door_width:
+        return None
+    first = int(rng.integers(start + door_width // 2, stop - door_width - door_width // 2 + 1))
+    return first, first + door_width
+
+
+def _draw_wall(img, wall, thickness, door):
+    """Trace un mur horizontal ou vertical en laissant l'ouverture de la porte"""
+    x0, y0, x1, y1 = wall
+    half = thickness // 2
+    horizontal = y0 == y1
+    start, stop = (x0, x1) if horizontal else (y0, y1)
+    segments = [(start, stop)] if door is None else [(start, door[0]), (door[1], stop)]
+    for a, b in segments:
+        if horizontal:
+            img[max(y0 - half, 0):y0 - half + thickness, a:b + 1] = 0
+        else:
+            img[a:b + 1, max(x0 - half, 0):x0 - half + thickness] = 0
+
+
+def generate_floor_plan(width, height, wall_density=0.5, wall_thickness=3,
+                        corridor=True, seed=0):
+    """
+    Génère un plan d'étage synthétique en niveaux de gris
+
+    Le plan est entouré d'un mur extérieur ; un couloir horizontal traverse
+    le milieu de l'étage et les deux ailes sont découpées en pièces par
+    partition binaire récursive. Chaque cloison comporte une porte et
+    chaque pièce bordant le couloir y est reliée par une porte.
+
+    Args:
+        width: Largeur en pixels
+        height: Hauteur en pixels
+        wall_density: Densité des cloisons entre 0 (grandes salles) et 1
+            (petits bureaux) ; fixe la taille visée des pièces
+        wall_thickness: Épaisseur des murs en pixels
+        corridor: Ajouter le couloir central
+        seed: Graine du générateur aléatoire (plans reproductibles)
+
+    Returns:
+        np.ndarray: Image uint8 (height, width), murs noirs (0) sur fond
+        blanc (255)
+    """
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width), 255, dtype=np.uint8)
+    wall_density = float(np.clip(wall_density, 0.0, 1.0))
+    room_size = max(8 * wall_thickness,
+                    int(min(width, height) / (1.5 + 8.5 * wall_density)))
+    door_width = max(2 * wall_thickness, room_size // 5)
+
+    walls = []
+    if corridor and height >= 4 * room_size // 2:
+        corridor_width = max(door_width * 2, height // 12)
+        top = (height - corridor_width) // 2
+        bottom = top + corridor_width
+        wings = [(0, 0, width - 1, top), (0, bottom, width - 1, height - 1)]
+        corridor_walls = [(0, top, width - 1, top), (0, bottom, width - 1, bottom)]
+    else:
+        wings = [(0, 0, width - 1, height - 1)]
+        corridor_walls = []
+
+    rooms = []
+    for wing in wings:
+        rooms.extend(_split_rooms(wing, room_size, rng, walls))
+
+    for wall in walls:
+        horizontal = wall[1] == wall[3]
+        start, stop = (wall[0], wall[2]) if horizontal else (wall[1], wall[3])
+        _draw_wall(img, wall, wall_thickness, _door(start, stop, door_width, rng))
+
+    # Murs du couloir : une porte par pièce qui le borde
+    for wall in corridor_walls:
+        y = wall[1]
+        doors = [_door(x0, x1, door_width, rng) for x0, y0, x1, y1 in rooms
+                 if y in (y0, y1)]
+        _draw_wall(img, wall, wall_thickness, None)
+        for door in doors:
+            if door is not None:
+                img[max(y - wall_thickness, 0):y + wall_thickness + 1,
+                    door[0]:door[1]] = 255
+
+    # Mur extérieur
+    cv2.rectangle(img, (0, 0), (width - 1, height - 1), 0, wall_thickness)
+    return img
+
+
+def wall_fraction(plan):
+    """
+    Fraction de la surface occupée par les murs
+
+    Args:
+        plan: Plan en niveaux de gris (murs sombres)
+
+    Returns:
+        float: Proportion des pixels de mur
+    """
+    return float(np.mean(plan < 128))
+
+
+def encode_plan(plan):
+    """
+    Encode un plan en PNG RGB, comme un fichier téléchargé par l'utilisateur
+
+    Args:
+        plan: Plan en niveaux de gris
+
+    Returns:
+        bytes: Contenu du fichier PNG
+    """
+    ok, buffer = cv2.imencode('.png', cv2.cvtColor(plan, cv2.COLOR_GRAY2BGR))
+    if not ok:
+        raise ValueError("Échec de l'encodage PNG.")
+    return buffer.tobytes()
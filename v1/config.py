@@ -3,6 +3,8 @@
 Configuration et constantes pour l'application Path Loss Heatmap Generator
 """
 
+import os
+
 # Configuration Streamlit
 STREAMLIT_CONFIG = {
     "page_title": "Path Loss Heatmap Generator",
@@ -13,6 +15,36 @@ STREAMLIT_CONFIG = {
 
 # Constantes pour l'application
 MODEL_FILENAME = 'pathloss_predictor.pkl'
+SURROGATE_FILENAME = 'pathloss_predictor.surrogate.npz'
+
+# Seuil de binarisation des plans (niveaux de gris, murs = pixels sombres)
+PLAN_THRESHOLD = 127
+
+# Erreur maximale tolérée pour la table précalculée (dB)
+SURROGATE_ERROR_BOUND_DB = 0.01
+
+# Inférence native XGBoost (0 thread = tous les cœurs)
+INFERENCE_CONFIG = {
+    "nthread": 0,
+    "chunk_size": 262144,
+    "deduplicate": True,
+}
+
+# Exécution parallèle par bandes de la grille des récepteurs
+PARALLEL_CONFIG = {
+    "max_workers": os.cpu_count() or 1,
+    "tile_rows": 64,
+}
+
+# Service HTTP local de prédiction (server.py)
+SERVICE_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "workers": 2,
+    "queue_size": 16,
+    "max_jobs": 256,
+    "max_upload_mb": 20,
+}
 
 # Limites et valeurs par défaut
 DEFAULT_VALUES = {
@@ -20,6 +52,124 @@ DEFAULT_VALUES = {
     "real_width_m": 8.0,
     "frequency_mhz": 2400,
     "step": 5,
+    "num_wifi": 1,
+    "wall_method": "exact",
+    "interpolation_method": "lattice",
+    "sampling": "uniform",
+    "adaptive_tolerance_db": 2.0,
+    "prediction_mode": "model",
+    "workers": 1,
+    "fast_preview": False,
+    "progressive": True,
+    "colormap": "jet",
+    "heatmap_alpha": 0.7,
+    "render_mode": "raster",
+}
+
+# Méthodes de comptage des murs (clé -> libellé affiché)
+WALL_METHODS = {
+    "exact": "Exacte (un rayon par récepteur)",
+    "radial": "Balayage radial (rapide, approché)",
+}
+
+# Méthodes d'interpolation de la heatmap (clé -> libellé affiché)
+INTERPOLATION_METHODS = {
+    "lattice": "Grille régulière (rapide)",
+    "cubic": "Cubique (griddata)",
+}
+
+# Modes d'échantillonnage des récepteurs (clé -> libellé affiché)
+SAMPLING_MODES = {
+    "uniform": "Uniforme",
+    "adaptive": "Adaptatif (quadtree)",
+}
+
+# Modes de prédiction (clé -> libellé affiché)
+PREDICTION_MODES = {
+    "model": "Modèle XGBoost",
+    "booster": "XGBoost natif (float32, multi-thread)",
+    "surrogate": "Table précalculée (rapide)",
+}
+
+# Palettes de couleurs de la heatmap (clé matplotlib -> libellé affiché)
+COLORMAPS = {
+    "jet": "Jet",
+    "viridis": "Viridis",
+    "plasma": "Plasma",
+    "turbo": "Turbo",
+    "RdYlGn_r": "Vert → Rouge",
+}
+
+# Modes de rendu de la heatmap (clé -> libellé affiché)
+RENDER_MODES = {
+    "raster": "Rapide (résolution du plan)",
+    "matplotlib": "Publication (matplotlib)",
+}
+
+# Formats d'export de la heatmap (clé -> libellé affiché et type MIME)
+EXPORT_FORMATS = {
+    "png": {"label": "Image PNG", "mime": "image/png"},
+    "npy": {"label": "Grille .npy (float32)", "mime": "application/octet-stream"},
+    "npz": {"label": "Archive .npz (grille, récepteurs, métadonnées)",
+            "mime": "application/octet-stream"},
+    "csv": {"label": "Récepteurs .csv", "mime": "text/csv"},
+}
+
+# Mesure des performances (panneau "Performance" et journal JSON)
+PERFORMANCE_CONFIG = {
+    "trace_memory": True,
+    "log_file": os.environ.get("PATHLOSS_PERF_LOG"),
+}
+
+# Affichage progressif : pas maximal du premier aperçu (doublé à chaque niveau
+# à partir du pas demandé, voir HeatmapPipeline.run_progressive)
+PROGRESSIVE_CONFIG = {
+    "coarsest_step": 32,
+}
+
+# Générations de l'interface en arrière-plan (voir utils.jobs)
+JOBS_CONFIG = {
+    "workers": 2,
+    "result_cache_entries": 8,
+    "poll_seconds": 0.2,
+}
+
+# Placement automatique des WiFi (voir utils.placement)
+PLACEMENT_CONFIG = {
+    "threshold_db": 80.0,
+    "candidate_spacing_m": 2.0,
+    "receiver_spacing_m": 1.0,
+    "max_pairs": 500_000,
+    "max_rounds": 10,
+    "max_aps": 10,
+}
+
+# Balayage en fréquence (voir HeatmapPipeline.run_sweep)
+SWEEP_CONFIG = {
+    "default_frequencies": "2400, 5200, 6000",
+    "max_frequencies": 16,
+    "max_rows": 2_000_000,
+    "export_formats": ["npz", "npy"],
+}
+
+# Nombre de résultats conservés par étape du pipeline de génération
+PIPELINE_CACHE_ENTRIES = 4
+
+# Libellés des étapes du pipeline
+STAGE_LABELS = {
+    "plan": "plan",
+    "geometry": "géométrie",
+    "prediction": "prédiction",
+    "grid": "grille",
+    "figure": "figure",
+    "sweep": "balayage en fréquence",
+}
+
+# Libellés des compteurs de travail
+COUNTER_LABELS = {
+    "receivers": "Récepteurs générés",
+    "ray_samples": "Échantillons de rayons",
+    "model_rows": "Lignes prédites par le modèle",
 }
 
 LIMITS = {
@@ -28,6 +178,10 @@ LIMITS = {
     "max_frequency": 10000,
     "min_step": 1,
     "max_step": 50,
+    "min_wifi": 1,
+    "max_wifi": 10,
+    "min_adaptive_tolerance_db": 0.1,
+    "max_adaptive_tolerance_db": 20.0,
     "max_canvas_height": 400,
     "max_canvas_width": 600,
 }
@@ -40,8 +194,23 @@ MESSAGES = {
     "model_loaded": "Modèle ML chargé avec succès!",
     "model_not_found": "ERREUR: Modèle 'pathloss_predictor.pkl' non trouvé.",
     "model_load_error": "ERREUR: Erreur lors du chargement du modèle: {}",
+    "surrogate_error": "Table précalculée indisponible, utilisation du modèle: {}",
     "file_uploaded": "✅ Fichier téléchargé avec succès!",
     "heatmap_generated": "✅ Heatmap générée avec succès!",
     "click_to_place": "🛑 Cliquez sur l'image pour placer le WiFi (Tx).",
+    "missing_wifi": "⚠️ Il manque {} point(s) WiFi. Cliquez sur l'image pour les placer.",
+    "wifi_placed": "✅ {} point(s) WiFi placé(s)",
     "upload_image": "📁 Téléchargez une image pour voir l'aperçu",
+    "reused_stages": "♻️ Étapes réutilisées : {}",
+    "progressive_level": "🔍 Aperçu au pas de {} pixels, affinage en cours...",
+    "generation_running": "🔄 Génération de la heatmap en cours... ({:.1f} s)",
+    "generation_cancelled": "⏹️ Paramètres modifiés : la génération en cours a été annulée.",
+    "placement_done": "✅ {} WiFi placé(s) : {:.1f} % de la surface sous {:.0f} dB",
+    "placement_stats": "{} emplacements candidats, {} points d'évaluation, "
+                       "{} échange(s) de recherche locale, {:.2f} s",
+    "sweep_level": "📶 Path loss à {:g} MHz (palette commune aux fréquences)",
+    "cached_result": "⚡ Heatmap déjà calculée pour ces paramètres, résultat réutilisé.",
+    "adaptive_stats": "⚡ Échantillonnage adaptatif : {model_evaluations} évaluations "
+                      "du modèle au lieu de {uniform_evaluations} "
+                      "({saved_evaluations} économisées)",
 }
@@ -10,7 +10,9 @@ from config import STREAMLIT_CONFIG
 from models.model_loader import get_model_status
 from ui.sidebar import render_sidebar
 from ui.main_content import render_main_content
+from ui.placement_optimizer import render_placement_section
 from ui.heatmap_generator import render_heatmap_generation_section
+from ui.frequency_sweep import render_frequency_sweep_section
 
 # Supprimer les warnings
 warnings.filterwarnings('ignore')
@@ -32,19 +34,29 @@ def main():
     # Rendre la sidebar et récupérer les paramètres
     params = render_sidebar()
     
-    # Rendre le contenu principal et obtenir la position Tx mise à jour
-    tx_x_m, tx_y_m = render_main_content(
+    # Rendre le contenu principal et obtenir les positions Tx mises à jour
+    tx_positions_m = render_main_content(
         params['uploaded_file'], 
         params['real_length_m'], 
-        params['real_width_m']
+        params['real_width_m'],
+        params['num_wifi']
     )
     
     # Mettre à jour les paramètres avec les positions du canvas
-    params['tx_x_m'] = tx_x_m
-    params['tx_y_m'] = tx_y_m
+    params['tx_x_m'], params['tx_y_m'] = tx_positions_m[0]
+    params['tx_positions_m'] = tx_positions_m
+    
+    # Placement automatique : remplace les positions du canvas s'il est retenu
+    optimized_positions_m = render_placement_section(params, model)
+    if optimized_positions_m:
+        params['tx_x_m'], params['tx_y_m'] = optimized_positions_m[0]
+        params['tx_positions_m'] = optimized_positions_m
     
     # Rendre la section de génération de heatmap
     render_heatmap_generation_section(params, model)
+    
+    # Comparer plusieurs fréquences sur la même géométrie
+    render_frequency_sweep_section(params, model)
 
 
 if __name__ == "__main__":
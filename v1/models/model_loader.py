@@ -5,7 +5,10 @@ Module pour le chargement et la gestion du modèle ML
 
 import streamlit as st
 import joblib
-from config import MODEL_FILENAME, MESSAGES
+from config import (MODEL_FILENAME, SURROGATE_FILENAME, SURROGATE_ERROR_BOUND_DB,
+                    INFERENCE_CONFIG, MESSAGES)
+from models.fast_predictor import BoosterPredictor
+from models.surrogate import file_sha256, load_or_build_surrogate
 
 
 @st.cache_resource
@@ -25,6 +28,84 @@ def load_model():
         return None, MESSAGES["model_load_error"].format(e)
 
 
+@st.cache_resource
+def load_surrogate(_model, error_bound_db=SURROGATE_ERROR_BOUND_DB):
+    """
+    Charge (ou construit) la table de path loss précalculée avec mise en cache
+    
+    Args:
+        _model: Modèle ML chargé (non haché par Streamlit)
+        error_bound_db: Erreur maximale tolérée par rapport au modèle
+        
+    Returns:
+        tuple: (surrogate, error_message)
+    """
+    try:
+        surrogate = load_or_build_surrogate(
+            _model, MODEL_FILENAME, SURROGATE_FILENAME, error_bound_db
+        )
+        return surrogate, None
+    except Exception as e:
+        return None, MESSAGES["surrogate_error"].format(e)
+
+
+@st.cache_resource
+def load_booster_predictor(_model, nthread=INFERENCE_CONFIG["nthread"],
+                           chunk_size=INFERENCE_CONFIG["chunk_size"],
+                           deduplicate=INFERENCE_CONFIG["deduplicate"]):
+    """
+    Crée le prédicteur natif XGBoost avec mise en cache
+    
+    Args:
+        _model: Modèle ML chargé (non haché par Streamlit)
+        nthread: Nombre de threads (0 = tous les cœurs)
+        chunk_size: Nombre de lignes prédites par appel
+        deduplicate: Prédire une seule fois les lignes identiques
+        
+    Returns:
+        BoosterPredictor: Prédicteur natif
+    """
+    return BoosterPredictor(_model, nthread, chunk_size, deduplicate)
+
+
+@st.cache_resource
+def get_model_version():
+    """
+    Empreinte SHA-256 du fichier modèle (version enregistrée dans les exports)
+    
+    Returns:
+        str: Empreinte hexadécimale, ou None si le fichier est introuvable
+    """
+    try:
+        return file_sha256(MODEL_FILENAME)
+    except OSError:
+        return None
+
+
+def get_predictor(model, prediction_mode):
+    """
+    Retourne l'objet de prédiction correspondant au mode choisi
+    
+    Args:
+        model: Modèle ML chargé
+        prediction_mode: 'model', 'booster' ou 'surrogate'
+        
+    Returns:
+        Objet exposant predict(X) (modèle, booster natif ou table précalculée)
+    """
+    if model is None or prediction_mode == 'model':
+        return model
+    
+    if prediction_mode == 'booster':
+        return load_booster_predictor(model)
+    
+    surrogate, error = load_surrogate(model)
+    if surrogate is None:
+        st.warning(f"⚠️ {error}")
+        return model
+    return surrogate
+
+
 def get_model_status():
     """
     Obtient le statut du modèle et affiche les messages appropriés
@@ -0,0 +1,244 @@
+# models/surrogate.py
+"""
+Module pour la table de path loss précalculée (substitut du modèle XGBoost)
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+FEATURES = ['num_walls', 'distance', 'frequency']
+SURROGATE_VERSION = 1
+
+
+def file_sha256(path):
+    """
+    Calcule l'empreinte SHA-256 d'un fichier
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_split_thresholds(model):
+    """
+    Extrait les seuils de coupure de chaque caractéristique du modèle
+
+    Un ensemble d'arbres est constant par morceaux : sa sortie ne change qu'au
+    passage d'un seuil de coupure. Les seuils sont lus dans le dump JSON du
+    booster (valeurs float32 exactes).
+
+    Args:
+        model: Modèle XGBoost (XGBRegressor ou Booster)
+
+    Returns:
+        list: Tableaux float32 triés des seuils, dans l'ordre de FEATURES
+    """
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    if not hasattr(booster, 'save_raw'):
+        raise ValueError("Le modèle n'est pas un ensemble d'arbres XGBoost.")
+
+    dump = json.loads(bytes(booster.save_raw(raw_format='json')))
+    trees = dump['learner']['gradient_booster']['model']['trees']
+
+    feature_names = booster.feature_names or FEATURES
+    thresholds = {name: set() for name in FEATURES}
+    for tree in trees:
+        for left, feature, condition in zip(tree['left_children'],
+                                            tree['split_indices'],
+                                            tree['split_conditions']):
+            if left != -1:
+                thresholds[feature_names[feature]].add(condition)
+
+    return [np.unique(np.array(sorted(thresholds[name]), dtype=np.float32))
+            for name in FEATURES]
+
+
+def _cell_representatives(edges):
+    """
+    Point représentatif de chaque cellule délimitée par les seuils
+
+    XGBoost envoie x à droite si x >= seuil : la cellule i > 0 commence donc
+    exactement au seuil i - 1.
+    """
+    if edges.size == 0:
+        return np.zeros(1, dtype=np.float32)
+    first = np.float32(edges[0] - max(1.0, abs(float(edges[0]))))
+    return np.concatenate(([first], edges)).astype(np.float32)
+
+
+class PathLossSurrogate:
+    """
+    Table de path loss équivalente au modèle, interrogée par recherche vectorisée
+
+    La table contient une valeur par cellule du produit cartésien des seuils
+    de coupure (murs x distance x fréquence). Comme le modèle est constant
+    sur chaque cellule, la recherche (interpolation d'ordre zéro) reproduit
+    ses prédictions ; l'écart est vérifié à la construction.
+
+    Attributes:
+        edges: Seuils triés (float32) de chaque caractéristique
+        table: Tableau float32 (murs, distance, fréquence) des prédictions
+        metadata: Informations de construction (empreinte du modèle, erreur)
+    """
+
+    def __init__(self, edges, table, metadata=None):
+        self.edges = [np.asarray(e, dtype=np.float32) for e in edges]
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.metadata = metadata or {}
+
+    @property
+    def nbytes(self):
+        """int: Mémoire occupée par la table"""
+        return self.table.nbytes + sum(e.nbytes for e in self.edges)
+
+    @classmethod
+    def build(cls, model, error_bound_db=0.01, num_validation=20000, seed=0,
+              model_sha256=None):
+        """
+        Tabule le modèle et vérifie l'écart sur des points de validation
+
+        Args:
+            model: Modèle XGBoost entraîné
+            error_bound_db: Erreur absolue maximale tolérée (dB)
+            num_validation: Nombre de points de validation aléatoires
+            seed: Graine du générateur aléatoire
+            model_sha256: Empreinte du fichier modèle (stockée en métadonnée)
+
+        Returns:
+            PathLossSurrogate: Table construite
+
+        Raises:
+            ValueError: Si l'erreur de validation dépasse error_bound_db
+        """
+        edges = extract_split_thresholds(model)
+        axes = [_cell_representatives(e) for e in edges]
+        mesh = np.meshgrid(*axes, indexing='ij')
+        X = np.column_stack([m.ravel() for m in mesh]).astype(np.float32)
+        table = np.asarray(model.predict(X), dtype=np.float32).reshape(mesh[0].shape)
+
+        surrogate = cls(edges, table)
+        X_check = surrogate._validation_points(num_validation, seed)
+        reference = np.asarray(model.predict(X_check), dtype=np.float32)
+        max_error = float(np.max(np.abs(surrogate.predict(X_check) - reference)))
+
+        if max_error > error_bound_db:
+            raise ValueError(
+                f"Erreur de la table ({max_error:.4f} dB) supérieure à la "
+                f"borne demandée ({error_bound_db} dB)."
+            )
+
+        surrogate.metadata = {
+            'version': SURROGATE_VERSION,
+            'model_sha256': model_sha256,
+            'error_bound_db': error_bound_db,
+            'max_validation_error_db': max_error,
+            'num_validation': int(len(X_check)),
+            'shape': list(table.shape),
+        }
+        return surrogate
+
+    def _validation_points(self, num_points, seed):
+        """Points aléatoires couvrant les seuils et l'intérieur des cellules"""
+        rng = np.random.default_rng(seed)
+        walls_edges, distance_edges, frequency_edges = self.edges
+        max_walls = int(walls_edges.max()) + 2 if walls_edges.size else 10
+        max_distance = float(distance_edges.max()) * 1.2 if distance_edges.size else 100.0
+
+        random_points = np.column_stack((
+            rng.integers(0, max_walls + 1, num_points),
+            rng.uniform(0, max_distance, num_points),
+            rng.uniform(100, 10000, num_points),
+        ))
+        # Points exactement sur les seuils (cas limites de la recherche)
+        boundary_points = np.column_stack((
+            rng.integers(0, max_walls + 1, distance_edges.size),
+            distance_edges,
+            rng.choice(np.append(frequency_edges, 2400), distance_edges.size),
+        ))
+        return np.vstack((random_points, boundary_points)).astype(np.float32)
+
+    def predict(self, X):
+        """
+        Prédit le path loss par recherche dans la table
+
+        Args:
+            X: Tableau (N, 3) ou DataFrame dans l'ordre FEATURES
+
+        Returns:
+            np.ndarray: Path loss float32
+        """
+        X = np.asarray(X, dtype=np.float32)
+        indices = tuple(
+            np.searchsorted(edges, X[:, i], side='right')
+            for i, edges in enumerate(self.edges)
+        )
+        return self.table[indices]
+
+    def save(self, path):
+        """Enregistre la table au format .npz"""
+        np.savez(
+            path,
+            walls_edges=self.edges[0],
+            distance_edges=self.edges[1],
+            frequency_edges=self.edges[2],
+            table=self.table,
+            metadata=json.dumps(self.metadata),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Charge une table enregistrée avec save()"""
+        with np.load(path) as data:
+            edges = [data['walls_edges'], data['distance_edges'],
+                     data['frequency_edges']]
+            return cls(edges, data['table'], json.loads(str(data['metadata'])))
+
+
+def load_or_build_surrogate(model, model_path, surrogate_path, error_bound_db=0.01):
+    """
+    Charge la table persistée à côté du modèle, ou la reconstruit
+
+    La table est réutilisée si elle a été construite à partir du même fichier
+    modèle (empreinte SHA-256) avec une borne d'erreur au moins aussi stricte.
+
+    Args:
+        model: Modèle XGBoost entraîné
+        model_path: Chemin du fichier modèle
+        surrogate_path: Chemin du fichier de la table
+        error_bound_db: Erreur absolue maximale tolérée (dB)
+
+    Returns:
+        PathLossSurrogate: Table prête à l'emploi
+    """
+    model_sha256 = file_sha256(model_path) if os.path.exists(model_path) else None
+
+    if os.path.exists(surrogate_path):
+        try:
+            surrogate = PathLossSurrogate.load(surrogate_path)
+            metadata = surrogate.metadata
+            if (metadata.get('version') == SURROGATE_VERSION
+                    and metadata.get('model_sha256') == model_sha256
+                    and metadata.get('max_validation_error_db', np.inf) <= error_bound_db):
+                return surrogate
+        except (OSError, ValueError, KeyError):
+            pass  # Table illisible : reconstruction
+
+    surrogate = PathLossSurrogate.build(model, error_bound_db,
+                                        model_sha256=model_sha256)
+    try:
+        surrogate.save(surrogate_path)
+    except OSError:
+        pass  # Répertoire en lecture seule : table conservée en mémoire
+    return surrogate
@@ -0,0 +1,71 @@
+# server.py
+"""
+Service HTTP local de prédiction du path loss
+
+Usage (depuis le dossier v1) :
+    python server.py [--port 8765] [--workers 2] [--queue-size 16]
+
+Exemple :
+    curl -X POST --data-binary @plan.png \\
+        "http://127.0.0.1:8765/jobs?length_m=10&width_m=8&tx=5:4&frequency_mhz=2400&step=4"
+    curl http://127.0.0.1:8765/jobs/<id>
+    curl -o grille.npy http://127.0.0.1:8765/jobs/<id>/grid
+    curl -o heatmap.png http://127.0.0.1:8765/jobs/<id>/png
+"""
+
+import argparse
+import sys
+import warnings
+
+import matplotlib
+
+from batch import load_predictor
+from config import MODEL_FILENAME, PIPELINE_CACHE_ENTRIES, PREDICTION_MODES, SERVICE_CONFIG
+
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default=SERVICE_CONFIG["host"])
+    parser.add_argument('--port', type=int, default=SERVICE_CONFIG["port"])
+    parser.add_argument('--workers', type=int, default=SERVICE_CONFIG["workers"],
+                        help="Nombre de threads de calcul")
+    parser.add_argument('--queue-size', type=int, default=SERVICE_CONFIG["queue_size"],
+                        help="Nombre maximal de jobs en attente")
+    parser.add_argument('--model', default=MODEL_FILENAME, help="Chemin du modèle")
+    parser.add_argument('--prediction-mode', choices=list(PREDICTION_MODES),
+                        default='surrogate')
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    matplotlib.use('Agg')
+    from utils.service import PredictionService, create_server
+
+    try:
+        predictor = load_predictor(args.model, args.prediction_mode)
+    except Exception as e:
+        print(f"Erreur lors du chargement du modèle: {e}", file=sys.stderr)
+        return 2
+
+    service = PredictionService(predictor, workers=args.workers,
+                                queue_size=args.queue_size,
+                                max_jobs=SERVICE_CONFIG["max_jobs"],
+                                cache_entries=PIPELINE_CACHE_ENTRIES)
+    service.start()
+    server = create_server(service, args.host, args.port,
+                           SERVICE_CONFIG["max_upload_mb"] * 1024 * 1024)
+    host, port = server.server_address[:2]
+    print(f"Service de prédiction sur http://{host}:{port}", flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop(wait=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
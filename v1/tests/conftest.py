@@ -0,0 +1,53 @@
+# tests/conftest.py
+"""
+Fixtures communes des tests (plans synthétiques et modèles)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_plans import encode_plan, generate_floor_plan  # noqa: E402
+from config import MODEL_FILENAME  # noqa: E402
+
+
+class LinearModel:
+    """Modèle multi-murs déterministe (mêmes caractéristiques que le modèle ML)"""
+
+    def predict(self, X):
+        num_walls, distance, frequency = X[:, 0], X[:, 1], X[:, 2]
+        return (20 * np.log10(np.maximum(distance, 0.1)) + 20 * np.log10(frequency)
+                - 27.55 + 4.0 * num_walls).astype(np.float32)
+
+
+@pytest.fixture
+def linear_model():
+    return LinearModel()
+
+
+@pytest.fixture(scope='session')
+def model():
+    """Modèle XGBoost livré avec l'application"""
+    joblib = pytest.importorskip('joblib')
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), MODEL_FILENAME)
+    if not os.path.exists(path):
+        pytest.skip(f"{MODEL_FILENAME} absent")
+    return joblib.load(path)
+
+
+@pytest.fixture(params=[(160, 120, 0.3, 1), (240, 180, 0.7, 2), (200, 200, 0.5, 3)],
+                ids=['sparse', 'dense', 'square'])
+def floor_plan(request):
+    """Plan synthétique en niveaux de gris (murs noirs sur fond blanc)"""
+    width, height, density, seed = request.param
+    return generate_floor_plan(width, height, density, seed=seed)
+
+
+@pytest.fixture
+def plan_bytes(floor_plan):
+    """Plan synthétique encodé en PNG, comme un fichier téléchargé"""
+    return encode_plan(floor_plan)
@@ -0,0 +1,88 @@
+# tests/test_export.py
+"""
+Tests de l'export des données (npy, npz, csv)
+"""
+
+import csv
+import io
+
+import numpy as np
+import pytest
+
+from utils.export import (
+    RX_CSV_COLUMNS,
+    build_metadata,
+    export_bytes,
+    iter_rx_csv,
+    load_npz
+)
+from utils.path_loss_calculator import RxData
+
+
+def make_rx(best_ap=True):
+    rx_x = np.array([0, 4, 8, 0], dtype=np.int16)
+    rx_y = np.array([0, 0, 0, 4], dtype=np.int16)
+    return RxData(rx_x, rx_y, np.array([0.5, 1.25, 2.0, 3.5], dtype=np.float32),
+                  np.array([0, 1, 2, 0], dtype=np.int16), 2400.0, 4,
+                  np.array([40.0, 55.5, 70.25, 61.0], dtype=np.float32),
+                  np.array([0, 1, 1, 0], dtype=np.int8) if best_ap else None)
+
+
+@pytest.fixture
+def grid():
+    return np.arange(8 * 10, dtype=np.float64).reshape(8, 10) / 3
+
+
+@pytest.fixture
+def metadata():
+    return build_metadata('abc123', [(1, 2), (5, 6)], 2400, 4, 'model-sha',
+                          tx_positions_m=[(0.1, 0.2), (0.5, 0.6)],
+                          wall_method='exact')
+
+
+@pytest.mark.parametrize('best_ap', [True, False])
+def test_npz_roundtrip(grid, metadata, best_ap):
+    rx = make_rx(best_ap)
+    arrays, loaded = load_npz(io.BytesIO(export_bytes('npz', grid, rx, metadata)))
+
+    assert loaded == metadata
+    assert arrays['path_loss'].dtype == np.float32
+    np.testing.assert_array_equal(arrays['path_loss'], grid.astype(np.float32))
+    for name, column in (('rx_x', rx.rx_x), ('rx_y', rx.rx_y),
+                         ('distance', rx.distance), ('num_walls', rx.num_walls),
+                         ('rx_path_loss', rx.path_loss)):
+        np.testing.assert_array_equal(arrays[name], column)
+        assert arrays[name].dtype == column.dtype
+    assert ('best_ap' in arrays) == best_ap
+
+
+def test_npy_is_float32_grid(grid, metadata):
+    loaded = np.load(io.BytesIO(export_bytes('npy', grid, make_rx(), metadata)))
+    assert loaded.dtype == np.float32 and loaded.flags.c_contiguous
+    np.testing.assert_array_equal(loaded, grid.astype(np.float32))
+
+
+@pytest.mark.parametrize('best_ap', [True, False])
+def test_csv_header_and_rows(grid, metadata, best_ap):
+    rx = make_rx(best_ap)
+    text = export_bytes('csv', grid, rx, metadata).decode('utf-8')
+    rows = list(csv.reader(io.StringIO(text)))
+
+    expected_header = list(RX_CSV_COLUMNS if best_ap else RX_CSV_COLUMNS[:-1])
+    assert rows[0] == expected_header
+    assert rows[0][:6] == ['RX_x', 'RX_y', 'distance', 'num_walls', 'frequency',
+                           'Path_Loss_Predicted']
+    assert len(rows) == len(rx) + 1
+    assert rows[2][:6] == ['4', '0', '1.2500', '1', '2400', '55.500']
+    if best_ap:
+        assert [row[6] for row in rows[1:]] == ['0', '1', '1', '0']
+
+
+def test_csv_chunks_do_not_change_output():
+    rx = make_rx()
+    assert ''.join(iter_rx_csv(rx, chunk_rows=3)) == ''.join(iter_rx_csv(rx))
+
+
+def test_unknown_format(grid, metadata):
+    with pytest.raises(ValueError):
+        export_bytes('xlsx', grid, make_rx(), metadata)
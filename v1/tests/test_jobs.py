@@ -0,0 +1,102 @@
+# tests/test_jobs.py
+"""
+Tests des générations en arrière-plan et de leur annulation (utils.jobs)
+"""
+
+import threading
+
+import pytest
+
+from utils.jobs import (
+    GenerationExecutor,
+    check_cancelled,
+    current_job,
+    fingerprint
+)
+from utils.pipeline import HeatmapPipeline
+
+
+@pytest.fixture
+def executor():
+    executor = GenerationExecutor(workers=1, cache_entries=2)
+    yield executor
+    executor.shutdown()
+
+
+def test_check_cancelled_outside_a_job():
+    assert current_job() is None
+    check_cancelled()
+
+
+def test_fingerprint_is_stable():
+    assert fingerprint('a', (1, 2), {'b': 1}) == fingerprint('a', [1, 2], {'b': 1})
+    assert fingerprint('a', 1) != fingerprint('a', 2)
+
+
+def test_done_result_is_cached(executor):
+    job = executor.submit('key', lambda: 42)
+    assert job.wait(10) and job.status == 'done' and job.value == 42
+
+    again = executor.submit('key', lambda: pytest.fail("recalculé"))
+    assert again.cached and again.done() and again.value == 42
+
+
+def test_uncacheable_and_failing_jobs(executor):
+    job = executor.submit('none', lambda: None, cacheable=lambda value: value is not None)
+    assert job.wait(10) and executor.cached('none') == (False, None)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    job = executor.submit('fail', fail)
+    assert job.wait(10) and job.status == 'error'
+    assert isinstance(job.error, RuntimeError)
+
+
+def test_cancel_running_job_at_checkpoint(executor):
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(10)
+        check_cancelled()
+        return 'fini'
+
+    job = executor.submit('running', work)
+    assert started.wait(10)
+    job.cancel()
+    release.set()
+    assert job.wait(10)
+    assert job.status == 'cancelled' and job.value is None
+    assert executor.cached('running') == (False, None)
+
+
+def test_cancel_queued_job_never_runs(executor):
+    release = threading.Event()
+    blocker = executor.submit('blocker', release.wait, 10)
+    ran = []
+    queued = executor.submit('queued', lambda: ran.append(True))
+    queued.cancel()
+    release.set()
+    assert blocker.wait(10) and queued.wait(10)
+    assert queued.status == 'cancelled' and not ran
+
+
+def test_cancel_stops_pipeline_between_tiles(executor, plan_bytes, linear_model):
+    class CancellingModel:
+        """Annule le job à la première prédiction"""
+
+        def predict(self, X):
+            current_job().cancel()
+            return linear_model.predict(X)
+
+    pipeline = HeatmapPipeline()
+    job = executor.submit('pipeline', pipeline.run, plan_bytes, 16.0, 12.0,
+                          [(5.0, 4.0)], 2400, 4, CancellingModel(),
+                          interpolation_method='lattice', render=False)
+    assert job.wait(30)
+    assert job.status == 'cancelled'
+    # Étapes en amont conservées, étapes abandonnées non mémorisées
+    assert len(pipeline.caches['geometry']) == 1
+    assert len(pipeline.caches['grid']) == 0
+
@@ -0,0 +1,86 @@
+# tests/test_multifloor.py
+"""
+Tests de la prédiction multi-étages (utils.multifloor)
+"""
+
+import numpy as np
+import pytest
+
+from utils.multifloor import Floor, floor_receivers, run_multifloor, slabs_between
+from utils.path_loss_calculator import (
+    compute_ap_geometry,
+    lattice_receivers,
+    predict_best_server
+)
+from utils.plan_cache import PlanEntry
+
+
+def make_entry(gray, key):
+    binary = (gray < 128).astype(np.uint8)
+    return PlanEntry(key, binary, gray)
+
+
+def test_floor_receivers_is_one_counted_array(floor_plan):
+    plan = make_entry(floor_plan, 'receivers')
+    rx_x, rx_y = floor_receivers(plan, 4)
+
+    expected_x, expected_y = lattice_receivers(plan.binary_img, 4)
+    np.testing.assert_array_equal(rx_x, expected_x)
+    np.testing.assert_array_equal(rx_y, expected_y)
+    assert isinstance(plan.indexes['receivers4'], np.ndarray)
+    assert plan.nbytes == (plan.binary_img.nbytes + plan.gray_img.nbytes
+                           + rx_x.nbytes + rx_y.nbytes)
+    assert floor_receivers(plan, 4)[0].base is rx_x.base
+
+
+def test_single_floor_matches_2d_best_server(floor_plan, linear_model):
+    plan = make_entry(floor_plan, 'single')
+    aps = [(0, 3.0, 2.5), (0, 12.0, 9.0)]
+    result = run_multifloor([Floor(plan)], aps, 16.0, 12.0, 2400, 4, linear_model,
+                            pyramid=False)
+
+    rx_x, rx_y = lattice_receivers(plan.binary_img, 4)
+    distances, walls = compute_ap_geometry(plan.binary_img, result.tx_positions_px,
+                                           rx_x, rx_y, 16.0, 12.0)
+    expected = predict_best_server(rx_x, rx_y, distances, walls, 2400, 4, linear_model)
+    rx = result.rx_data[0]
+    np.testing.assert_array_equal(rx.path_loss, expected.path_loss)
+    np.testing.assert_array_equal(rx.best_ap, expected.best_ap)
+    assert result.rows == len(rx) * len(aps)
+
+
+def test_other_floor_adds_height_and_slabs(floor_plan, linear_model):
+    plan = make_entry(floor_plan, 'stacked')
+    floors = [Floor(plan, height_m=3.0, slab_walls=2), Floor(plan)]
+    result = run_multifloor(floors, [(0, 5.0, 4.0)], 16.0, 12.0, 2400, 4,
+                            linear_model, pyramid=False)
+
+    lower, upper = result.rx_data
+    np.testing.assert_array_equal(upper.num_walls, lower.num_walls + 2)
+    np.testing.assert_allclose(upper.distance ** 2, lower.distance ** 2 + 9.0,
+                               rtol=1e-5)
+    assert np.all(upper.path_loss > lower.path_loss)
+    np.testing.assert_array_equal(slabs_between(floors), [[0, 2], [2, 0]])
+
+
+def test_grids_are_nan_on_walls(floor_plan, linear_model, tmp_path):
+    plan = make_entry(floor_plan, 'grid')
+    result = run_multifloor([Floor(plan)], [(0, 5.0, 4.0)], 16.0, 12.0, 2400, 4,
+                            linear_model, pyramid=False, out_dir=str(tmp_path))
+
+    grid = np.load(tmp_path / 'floor_00.npy')
+    assert grid.shape == plan.binary_img.shape
+    assert np.all(np.isnan(grid[plan.binary_img == 1]))
+    np.testing.assert_array_equal(grid, result.grids[0])
+
+
+@pytest.mark.parametrize('aps, message', [
+    ([], "Aucun point d'accès"),
+    ([(1, 1.0, 1.0)], "étage inexistant"),
+    ([(0, 1.0, 1.0)] * 128, "Trop de points d'accès"),
+    ([(0, 50.0, 1.0)], "hors des limites"),
+])
+def test_invalid_buildings_are_rejected(floor_plan, linear_model, aps, message):
+    plan = make_entry(floor_plan, 'invalid')
+    with pytest.raises(ValueError, match=message):
+        run_multifloor([Floor(plan)], aps, 16.0, 12.0, 2400, 4, linear_model)
@@ -0,0 +1,61 @@
+# tests/test_parallel.py
+"""
+Tests du calcul parallèle : résultats identiques au calcul série
+"""
+
+import numpy as np
+import pytest
+
+import utils.parallel as parallel
+from benchmarks.synthetic_plans import encode_plan, generate_floor_plan
+from utils.pipeline import HeatmapPipeline
+
+
+@pytest.fixture(scope='module')
+def plan_data():
+    return encode_plan(generate_floor_plan(240, 160, 0.5, seed=5))
+
+
+@pytest.fixture(autouse=True, scope='module')
+def shutdown_pool():
+    yield
+    parallel.shutdown_pool()
+
+
+@pytest.mark.parametrize('tx', [[(5.0, 4.0)], [(5.0, 4.0), (20.0, 12.0), (9.0, 14.0)]],
+                         ids=['one_ap', 'three_aps'])
+def test_parallel_run_matches_serial(plan_data, linear_model, tx):
+    results = {}
+    for workers in (1, 2):
+        pipeline = HeatmapPipeline()
+        run = pipeline.run(plan_data, 24.0, 16.0, tx, 2400, 4, linear_model,
+                           workers=workers, tile_rows=6, render=False)
+        levels = list(pipeline.run_progressive(
+            plan_data, 24.0, 16.0, tx, 2400, 2, linear_model, workers=workers,
+            tile_rows=6, interpolation_method='lattice', coarsest_step=8
+        ))
+        results[workers] = run, levels
+
+    (serial, serial_levels), (parallel_run, parallel_levels) = results[1], results[2]
+    np.testing.assert_array_equal(parallel_run.rx_data.path_loss,
+                                  serial.rx_data.path_loss)
+    np.testing.assert_array_equal(parallel_run.grid, serial.grid)
+    if len(tx) > 1:
+        np.testing.assert_array_equal(parallel_run.rx_data.best_ap,
+                                      serial.rx_data.best_ap)
+    assert [step for step, _ in parallel_levels] == [step for step, _ in serial_levels]
+    for (_, expected), (_, result) in zip(serial_levels, parallel_levels):
+        np.testing.assert_array_equal(result.rx_data.path_loss,
+                                      expected.rx_data.path_loss)
+
+
+def test_pool_is_kept_for_the_same_plan(plan_data, linear_model):
+    pipeline = HeatmapPipeline()
+    pipeline.run(plan_data, 24.0, 16.0, [(5.0, 4.0)], 2400, 4, linear_model,
+                 workers=2, tile_rows=6, render=False)
+    pool = parallel._pool
+    assert pool is not None and pool.model is linear_model
+
+    HeatmapPipeline().run(plan_data, 24.0, 16.0, [(9.0, 6.0)], 5200, 4,
+                          linear_model, workers=2, tile_rows=6, render=False)
+    assert parallel._pool is pool and pool.users == 0
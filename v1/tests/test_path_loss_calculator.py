@@ -0,0 +1,160 @@
+# tests/test_path_loss_calculator.py
+"""
+Tests de la grille des récepteurs, de l'interpolation et du meilleur serveur
+"""
+
+import numpy as np
+import pytest
+
+from utils.path_loss_calculator import (
+    MAX_ACCESS_POINTS,
+    RxData,
+    combine_access_points,
+    compute_ap_geometry,
+    interpolate_lattice,
+    lattice_receivers,
+    predict_best_server,
+    predict_frequency_sweep,
+    predict_path_loss,
+    rx_to_lattice
+)
+from utils.pipeline import PipelineError, tx_positions_to_pixels
+
+
+def binary_of(floor_plan):
+    return (floor_plan < 128).astype(np.uint8)
+
+
+@pytest.mark.parametrize('step', [1, 3, 4, 7])
+def test_lattice_receivers_match_baseline_loop(floor_plan, step):
+    binary_img = binary_of(floor_plan)
+    img_height, img_width = binary_img.shape
+    # Parcours de l'ancien generate_rx_data : ligne par ligne, espace libre
+    expected = [(x, y) for y in range(0, img_height, step)
+                for x in range(0, img_width, step) if binary_img[y, x] == 0]
+
+    rx_x, rx_y = lattice_receivers(binary_img, step)
+    assert list(zip(rx_x.tolist(), rx_y.tolist())) == expected
+
+
+def test_lattice_receivers_bands_concatenate_to_full_grid(floor_plan):
+    binary_img = binary_of(floor_plan)
+    rx_x, rx_y = lattice_receivers(binary_img, 4)
+    bands = [lattice_receivers(binary_img, 4, start, start + 5)
+             for start in range(0, -(-binary_img.shape[0] // 4), 5)]
+    np.testing.assert_array_equal(np.concatenate([b[0] for b in bands]), rx_x)
+    np.testing.assert_array_equal(np.concatenate([b[1] for b in bands]), rx_y)
+
+
+def test_interpolate_lattice_is_exact_on_nodes_and_bilinear_between():
+    step, img_width, img_height = 4, 18, 13
+    ny, nx = -(-img_height // step), -(-img_width // step)
+    node_y, node_x = np.mgrid[0:ny, 0:nx] * step
+    lattice = (2.0 * node_x + 3.0 * node_y).astype(np.float32)
+
+    grid = interpolate_lattice(lattice, step, img_width, img_height)
+
+    assert grid.shape == (img_height, img_width) and grid.dtype == np.float32
+    np.testing.assert_allclose(grid[::step, ::step], lattice, rtol=1e-6)
+    # Plan affine : l'interpolation bilinéaire le reproduit entre les nœuds
+    y, x = np.mgrid[0:img_height, 0:img_width]
+    x_clamped = np.minimum(x, node_x.max())
+    y_clamped = np.minimum(y, node_y.max())
+    np.testing.assert_allclose(grid, 2.0 * x_clamped + 3.0 * y_clamped, rtol=1e-5)
+
+
+def test_interpolate_lattice_ignores_missing_nodes():
+    lattice = np.array([[1.0, np.nan, 3.0],
+                        [np.nan, np.nan, np.nan],
+                        [5.0, np.nan, 7.0]], dtype=np.float32)
+    grid = interpolate_lattice(lattice, 2, 5, 5)
+    # Les nœuds manquants ont un poids nul : seuls les voisins valides comptent
+    assert grid[0, 1] == pytest.approx(1.0)
+    assert grid[1, 3] == pytest.approx(3.0)
+    assert grid[4, 4] == pytest.approx(7.0)
+    # Pixel sur un nœud manquant, sans autre nœud voisin
+    assert np.isnan(grid[2, 2])
+    assert np.isnan(interpolate_lattice(np.full((2, 2), np.nan, np.float32),
+                                        3, 4, 4)).all()
+
+
+def test_interpolate_lattice_bands_and_out(floor_plan, tmp_path):
+    img_height, img_width = floor_plan.shape
+    rng = np.random.default_rng(0)
+    lattice = rng.normal(80, 10, (-(-img_height // 5), -(-img_width // 5)))
+    lattice[rng.random(lattice.shape) < 0.2] = np.nan
+    lattice = lattice.astype(np.float32)
+
+    reference = interpolate_lattice(lattice, 5, img_width, img_height)
+    out = np.lib.format.open_memmap(tmp_path / 'grid.npy', mode='w+',
+                                    dtype=np.float32, shape=(img_height, img_width))
+    banded = interpolate_lattice(lattice, 5, img_width, img_height, out=out,
+                                 band_rows=7)
+    assert banded is out
+    np.testing.assert_array_equal(banded, reference)
+
+
+def test_rx_to_lattice_places_values_on_nodes():
+    lattice = rx_to_lattice(np.array([0, 8]), np.array([4, 0]),
+                            np.array([1.5, 2.5]), 4, 10, 7)
+    assert lattice.shape == (2, 3)
+    assert lattice[1, 0] == 1.5 and lattice[0, 2] == 2.5
+    assert np.isnan(lattice).sum() == 4
+
+
+def test_best_server_is_minimum_over_access_points(floor_plan, linear_model):
+    binary_img = binary_of(floor_plan)
+    rx_x, rx_y = lattice_receivers(binary_img, 5)
+    tx_positions = [(10, 10), (binary_img.shape[1] - 20, binary_img.shape[0] // 2),
+                    (binary_img.shape[1] // 2, binary_img.shape[0] - 15)]
+    distances, walls = compute_ap_geometry(binary_img, tx_positions, rx_x, rx_y,
+                                           16.0, 12.0)
+
+    per_ap = np.stack([
+        predict_path_loss(RxData(rx_x, rx_y, distances[i], walls[i], 2400, 5),
+                          linear_model).path_loss
+        for i in range(len(tx_positions))
+    ])
+    best = predict_best_server(rx_x, rx_y, distances, walls, 2400, 5, linear_model)
+    rows = np.arange(len(rx_x))
+
+    np.testing.assert_array_equal(best.path_loss, per_ap.min(axis=0))
+    np.testing.assert_array_equal(best.best_ap, per_ap.argmin(axis=0))
+    np.testing.assert_array_equal(best.distance, distances[best.best_ap, rows])
+    np.testing.assert_array_equal(best.num_walls, walls[best.best_ap, rows])
+
+    # Par groupes d'AP (max_rows) et via combine_access_points : même résultat
+    grouped = predict_best_server(rx_x, rx_y, distances, walls, 2400, 5,
+                                  linear_model, max_rows=len(rx_x))
+    combined = combine_access_points(binary_img, tx_positions, rx_x, rx_y, 16.0,
+                                     12.0, 2400, 5, linear_model)
+    for rx in (grouped, combined):
+        np.testing.assert_array_equal(rx.path_loss, best.path_loss)
+        np.testing.assert_array_equal(rx.best_ap, best.best_ap)
+
+
+def test_access_point_limit(linear_model):
+    num_rx = 3
+    rx = np.arange(num_rx)
+    for num_aps in (MAX_ACCESS_POINTS, MAX_ACCESS_POINTS + 1):
+        distances = np.tile(np.arange(num_aps, 0, -1, dtype=np.float32)[:, None],
+                            (1, num_rx))
+        walls = np.zeros((num_aps, num_rx), dtype=np.int16)
+        if num_aps <= MAX_ACCESS_POINTS:
+            best = predict_best_server(rx, rx, distances, walls, 2400, 1,
+                                       linear_model)
+            np.testing.assert_array_equal(best.best_ap, num_aps - 1)
+            _, sweep_best = predict_frequency_sweep(distances, walls, [2400, 5200],
+                                                    linear_model)
+            np.testing.assert_array_equal(sweep_best, num_aps - 1)
+        else:
+            with pytest.raises(ValueError, match="Trop de points d'accès"):
+                predict_best_server(rx, rx, distances, walls, 2400, 1, linear_model)
+            with pytest.raises(ValueError, match="Trop de points d'accès"):
+                predict_frequency_sweep(distances, walls, [2400], linear_model)
+
+    positions = [(1.0, 1.0)] * (MAX_ACCESS_POINTS + 1)
+    with pytest.raises(PipelineError):
+        tx_positions_to_pixels(positions, 10.0, 10.0, 100, 100)
+    assert len(tx_positions_to_pixels(positions[:-1], 10.0, 10.0, 100, 100)) \
+        == MAX_ACCESS_POINTS
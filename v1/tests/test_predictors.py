@@ -0,0 +1,80 @@
+# tests/test_predictors.py
+"""
+Tests de parité des prédicteurs rapides avec model.predict
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_plans import generate_floor_plan
+from config import SURROGATE_FILENAME
+from models.fast_predictor import BoosterPredictor
+from models.surrogate import PathLossSurrogate
+from utils.path_loss_calculator import RxData, compute_ap_geometry, lattice_receivers
+
+
+@pytest.fixture(scope='module')
+def features():
+    """Caractéristiques réalistes (récepteurs d'un plan) et points aléatoires"""
+    binary_img = (generate_floor_plan(240, 180, 0.6, seed=4) < 128).astype(np.uint8)
+    rx_x, rx_y = lattice_receivers(binary_img, 3)
+    distances, walls = compute_ap_geometry(binary_img, [(30, 40), (200, 150)],
+                                           rx_x, rx_y, 24.0, 18.0)
+    blocks = [RxData(rx_x, rx_y, distances[i], walls[i], frequency, 3).features()
+              for i in range(2) for frequency in (900, 2400, 5200)]
+    rng = np.random.default_rng(0)
+    random = np.column_stack((rng.integers(0, 30, 5000), rng.uniform(0, 150, 5000),
+                              rng.uniform(100, 10000, 5000))).astype(np.float32)
+    return np.vstack(blocks + [random])
+
+
+@pytest.mark.parametrize('chunk_size, deduplicate', [(262144, True), (1000, True),
+                                                     (777, False)])
+def test_booster_matches_model(model, features, chunk_size, deduplicate):
+    reference = np.asarray(model.predict(features), dtype=np.float32)
+    predictor = BoosterPredictor(model, nthread=1, chunk_size=chunk_size,
+                                 deduplicate=deduplicate)
+    np.testing.assert_array_equal(predictor.predict(features), reference)
+    if deduplicate:
+        assert predictor.last_unique_rows < len(features)
+
+
+def test_booster_does_not_change_model_params(model):
+    before = model.get_booster().save_config()
+    BoosterPredictor(model, nthread=1)
+    assert model.get_booster().save_config() == before
+
+
+def test_booster_empty_input(model):
+    assert BoosterPredictor(model).predict(np.empty((0, 3))).shape == (0,)
+
+
+@pytest.fixture(scope='module')
+def surrogate(model):
+    return PathLossSurrogate.build(model, error_bound_db=0.01, num_validation=2000)
+
+
+def test_surrogate_matches_model(model, surrogate, features):
+    reference = np.asarray(model.predict(features), dtype=np.float32)
+    np.testing.assert_array_equal(surrogate.predict(features), reference)
+    assert surrogate.metadata['max_validation_error_db'] <= 0.01
+
+
+def test_surrogate_save_load_roundtrip(surrogate, features, tmp_path):
+    path = tmp_path / 'surrogate.npz'
+    surrogate.save(path)
+    loaded = PathLossSurrogate.load(path)
+    np.testing.assert_array_equal(loaded.predict(features),
+                                  surrogate.predict(features))
+    assert loaded.metadata == surrogate.metadata
+
+
+def test_shipped_surrogate_matches_model(model, features):
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), SURROGATE_FILENAME)
+    if not os.path.exists(path):
+        pytest.skip(f"{SURROGATE_FILENAME} absent")
+    shipped = PathLossSurrogate.load(path)
+    reference = np.asarray(model.predict(features), dtype=np.float32)
+    np.testing.assert_array_equal(shipped.predict(features), reference)
@@ -0,0 +1,139 @@
+# tests/test_service.py
+"""
+Tests du service HTTP local de prédiction (utils.service)
+"""
+
+import http.client
+import json
+import threading
+import time
+from http import HTTPStatus
+
+import numpy as np
+import pytest
+
+from utils.service import PredictionService, ServiceError, create_server
+
+
+PARAMS = {'length_m': 16.0, 'width_m': 12.0, 'tx': [(5.0, 4.0)],
+          'frequency_mhz': 2400.0, 'step': 8, 'wall_method': 'exact',
+          'interpolation_method': 'lattice', 'sampling': 'uniform'}
+
+
+def wait_for(job, timeout=30):
+    deadline = time.monotonic() + timeout
+    while job.status in ('queued', 'running'):
+        assert time.monotonic() < deadline, "job non terminé"
+        time.sleep(0.01)
+    return job
+
+
+@pytest.fixture
+def service(linear_model):
+    service = PredictionService(linear_model, workers=1, queue_size=4)
+    service.start()
+    yield service
+    service.stop()
+
+
+def test_submit_runs_job(service, plan_bytes, floor_plan):
+    job = wait_for(service.submit(plan_bytes, PARAMS))
+
+    assert job.status == 'done', job.error
+    assert service.get(job.id) is job
+    assert job.grid.shape == floor_plan.shape and job.grid.dtype == np.float32
+    assert job.receivers > 0
+    assert service.render_png(job).startswith(b'\x89PNG')
+    with pytest.raises(ServiceError) as error:
+        service.get('inconnu')
+    assert error.value.status == HTTPStatus.NOT_FOUND
+
+
+def test_invalid_plan_sets_error(service):
+    job = wait_for(service.submit(b'pas une image', PARAMS))
+    assert job.status == 'error' and job.error
+
+
+def test_queue_full_and_stopped(linear_model, plan_bytes):
+    # Aucun thread de calcul : les jobs restent en file
+    service = PredictionService(linear_model, workers=0, queue_size=2)
+    with pytest.raises(ServiceError) as error:
+        service.submit(plan_bytes, PARAMS)
+    assert error.value.status == HTTPStatus.SERVICE_UNAVAILABLE
+
+    service.start()
+    for _ in range(2):
+        service.submit(plan_bytes, PARAMS)
+    with pytest.raises(ServiceError) as error:
+        service.submit(plan_bytes, PARAMS)
+    assert error.value.status == HTTPStatus.TOO_MANY_REQUESTS
+    assert service.health()['queued'] == 2
+
+
+@pytest.fixture
+def server(service):
+    server = create_server(service, port=0, max_upload_bytes=1024 * 1024)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=30)
+    try:
+        connection.putrequest(method, path)
+        for name, value in (headers or {}).items():
+            connection.putheader(name, value)
+        connection.endheaders(body)
+        response = connection.getresponse()
+        return response, response.read()
+    finally:
+        connection.close()
+
+
+def test_http_submit_and_fetch(server, plan_bytes):
+    query = '/jobs?length_m=16&width_m=12&tx=5:4&frequency_mhz=2400&step=8'
+    response, body = request(server, 'POST', query, plan_bytes,
+                             {'Content-Length': str(len(plan_bytes))})
+    assert response.status == HTTPStatus.ACCEPTED
+    assert int(response.getheader('Content-Length')) == len(body)
+    job_id = json.loads(body)['id']
+    assert response.getheader('Location') == f'/jobs/{job_id}'
+
+    wait_for(server.RequestHandlerClass.service.get(job_id))
+    response, body = request(server, 'GET', f'/jobs/{job_id}/grid')
+    assert response.status == HTTPStatus.OK
+    assert int(response.getheader('Content-Length')) == len(body)
+    assert body.startswith(b'\x93NUMPY')
+
+
+@pytest.mark.parametrize('length, status', [
+    ('abc', HTTPStatus.BAD_REQUEST),
+    ('0', HTTPStatus.BAD_REQUEST),
+    (str(2 * 1024 * 1024), HTTPStatus.REQUEST_ENTITY_TOO_LARGE),
+])
+def test_http_content_length_is_checked(server, length, status):
+    response, body = request(server, 'POST', '/jobs?length_m=1', None,
+                             {'Content-Length': length})
+    assert response.status == status
+    assert 'error' in json.loads(body)
+
+
+def test_http_queue_full_sets_retry_after(linear_model, plan_bytes):
+    service = PredictionService(linear_model, workers=0, queue_size=1)
+    service.start()
+    service.submit(plan_bytes, PARAMS)
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        query = '/jobs?length_m=16&width_m=12&tx=5:4&frequency_mhz=2400&step=8'
+        response, _ = request(server, 'POST', query, plan_bytes,
+                              {'Content-Length': str(len(plan_bytes))})
+        assert response.status == HTTPStatus.TOO_MANY_REQUESTS
+        assert response.getheader('Retry-After') == '1'
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,93 @@
+# tests/test_wall_counts.py
+"""
+Tests du comptage des murs : versions vectorisées contre la version scalaire
+"""
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_plans import generate_floor_plan
+from utils.image_processing import (
+    build_wall_distance_map,
+    compute_LOS_and_walls_batch,
+    compute_LOS_and_walls_corrected,
+    compute_LOS_and_walls_exact,
+    compute_LOS_and_walls_traced
+)
+from utils.path_loss_calculator import lattice_receivers
+
+
+def transmitters(wall_map):
+    """Un Tx en espace libre, un dans un mur et un dans un coin"""
+    free_y, free_x = np.nonzero(wall_map == 0)
+    wall_y, wall_x = np.nonzero(wall_map == 1)
+    middle = len(free_x) // 2
+    return [(int(free_x[middle]), int(free_y[middle])),
+            (int(wall_x[len(wall_x) // 3]), int(wall_y[len(wall_y) // 3])),
+            (0, 0)]
+
+
+def receivers(wall_map, tx):
+    """Récepteurs d'une grille, plus le Tx lui-même et des points hors grille"""
+    rx_x, rx_y = lattice_receivers(wall_map, 9)
+    extra = np.array([tx, (wall_map.shape[1] - 1, wall_map.shape[0] - 1), (3, 5)])
+    return np.vstack((np.column_stack((rx_x, rx_y)), extra))
+
+
+def scalar_counts(tx, rx_points, wall_map):
+    return np.array([compute_LOS_and_walls_corrected(tx, tuple(point), wall_map)[1]
+                     for point in rx_points.tolist()], dtype=np.int32)
+
+
+@pytest.fixture(scope='module', params=[(160, 120, 0.3, 1), (200, 150, 0.8, 2)],
+                ids=['sparse', 'dense'])
+def cases(request):
+    """Carte des murs et, pour chaque Tx, récepteurs et comptes scalaires"""
+    width, height, density, seed = request.param
+    wall_map = (generate_floor_plan(width, height, density, seed=seed) < 128
+                ).astype(np.uint8)
+    rays = []
+    for tx in transmitters(wall_map):
+        rx_points = receivers(wall_map, tx)
+        rays.append((tx, rx_points, scalar_counts(tx, rx_points, wall_map)))
+    return wall_map, rays
+
+
+def test_batch_matches_scalar(cases):
+    wall_map, rays = cases
+    for tx, rx_points, expected in rays:
+        los, walls = compute_LOS_and_walls_batch(tx, rx_points, wall_map)
+        np.testing.assert_array_equal(walls, expected)
+        np.testing.assert_array_equal(los, expected == 0)
+
+
+@pytest.mark.parametrize('max_samples', [7, 4_000_000])
+def test_traced_matches_scalar(cases, max_samples):
+    wall_map, rays = cases
+    distance_map = build_wall_distance_map(wall_map)
+    for tx, rx_points, expected in rays:
+        los, walls = compute_LOS_and_walls_traced(tx, rx_points, wall_map,
+                                                  distance_map, max_samples)
+        np.testing.assert_array_equal(walls, expected)
+        np.testing.assert_array_equal(los, expected == 0)
+
+
+def test_batch_blocks_do_not_change_counts(cases):
+    wall_map, rays = cases
+    for tx, rx_points, expected in rays:
+        _, blocked = compute_LOS_and_walls_batch(tx, rx_points, wall_map,
+                                                 max_samples=500)
+        np.testing.assert_array_equal(blocked, expected)
+
+
+def test_exact_without_distance_map_falls_back_to_batch(cases):
+    wall_map, rays = cases
+    tx, rx_points, expected = rays[0]
+    _, walls = compute_LOS_and_walls_exact(tx, rx_points, wall_map)
+    np.testing.assert_array_equal(walls, expected)
+
+
+def test_no_receivers():
+    wall_map = np.zeros((10, 10), dtype=np.uint8)
+    los, walls = compute_LOS_and_walls_batch((2, 2), np.empty((0, 2)), wall_map)
+    assert los.shape == walls.shape == (0,)
@@ -0,0 +1,177 @@
+# ui/frequency_sweep.py
+"""
+Module pour le balayage en fréquence (comparaison 2,4 / 5 / 6 GHz)
+"""
+
+import streamlit as st
+import traceback
+from utils.image_processing import load_plan, read_upload_bytes
+from utils.jobs import fingerprint
+from utils.pipeline import PipelineError, get_pipeline
+from utils.plan_cache import make_plan_key
+from utils.rendering import render_heatmap
+from utils.path_loss_calculator import rx_to_lattice
+from utils.export import build_metadata, export_sweep_bytes
+from models.model_loader import get_predictor, get_model_version
+from config import (MESSAGES, PARALLEL_CONFIG, PIPELINE_CACHE_ENTRIES, EXPORT_FORMATS,
+                    LIMITS, PLAN_THRESHOLD, SWEEP_CONFIG)
+
+
+def parse_frequencies(text):
+    """
+    Lit une liste de fréquences séparées par des virgules ou des espaces
+
+    Args:
+        text: Texte saisi (ex: "2400, 5200, 6000")
+
+    Returns:
+        tuple: (fréquences sans doublon dans l'ordre croissant, message
+        d'erreur ou None)
+    """
+    try:
+        frequencies = sorted({float(value) for value in text.replace(',', ' ').split()})
+    except ValueError:
+        return [], "❌ Les fréquences doivent être des nombres (MHz)."
+    if not frequencies:
+        return [], "❌ Aucune fréquence saisie."
+    if not all(LIMITS["min_frequency"] <= f <= LIMITS["max_frequency"]
+               for f in frequencies):
+        return [], "❌ Fréquence hors de la plage valide"
+    if len(frequencies) > SWEEP_CONFIG["max_frequencies"]:
+        return [], f"❌ {SWEEP_CONFIG['max_frequencies']} fréquences au maximum."
+    return frequencies, None
+
+
+def sweep_fingerprint(params, frequencies):
+    """Empreinte des paramètres qui déterminent le cube d'un balayage"""
+    return fingerprint(
+        make_plan_key(read_upload_bytes(params['uploaded_file']), PLAN_THRESHOLD, 1),
+        get_model_version(), params['real_length_m'], params['real_width_m'],
+        params['tx_positions_m'], frequencies, params['step'],
+        params['wall_method'], params['interpolation_method'],
+        params['prediction_mode'], params['fast_preview']
+    )
+
+
+def render_frequency_sweep_section(params, model):
+    """
+    Rend la section de balayage en fréquence
+
+    La géométrie est calculée une fois pour toutes les fréquences (elle est
+    partagée avec la génération de la heatmap) et le cube des grilles est
+    conservé dans la session : le curseur et l'export n'entraînent aucun
+    nouveau calcul.
+
+    Args:
+        params: Dictionnaire des paramètres de l'application
+        model: Modèle ML chargé
+    """
+    if params['uploaded_file'] is None or model is None:
+        st.session_state.pop('sweep', None)
+        return
+
+    with st.expander("📶 Balayage en fréquence", expanded='sweep' in st.session_state):
+        text = st.text_input(
+            "Fréquences (MHz)", value=SWEEP_CONFIG["default_frequencies"],
+            help="Séparées par des virgules ; toutes les fréquences sont prédites "
+                 "en un seul appel sur la même géométrie"
+        )
+        frequencies, error = parse_frequencies(text)
+        if error:
+            st.error(error)
+            return
+
+        current = sweep_fingerprint(params, frequencies)
+        sweep = st.session_state.get('sweep')
+        if sweep is not None and sweep['fingerprint'] != current:
+            st.session_state.pop('sweep')
+            sweep = None
+
+        if st.button("📶 Calculer le balayage"):
+            with st.spinner("🔄 Balayage en fréquence..."):
+                try:
+                    result = get_pipeline(PIPELINE_CACHE_ENTRIES).run_sweep(
+                        params['uploaded_file'], params['real_length_m'],
+                        params['real_width_m'], params['tx_positions_m'],
+                        frequencies, params['step'],
+                        get_predictor(model, params['prediction_mode']),
+                        wall_method=params['wall_method'],
+                        interpolation_method=params['interpolation_method'],
+                        workers=params['workers'],
+                        tile_rows=PARALLEL_CONFIG["tile_rows"],
+                        pyramid=params['fast_preview'],
+                        max_rows=SWEEP_CONFIG["max_rows"]
+                    )
+                    sweep = {
+                        'fingerprint': current,
+                        'result': result,
+                        'metadata': build_metadata(
+                            result.plan_key, result.tx_positions_px, None,
+                            params['step'], get_model_version(),
+                            tx_positions_m=params['tx_positions_m'],
+                            frequencies_mhz=result.frequencies_mhz,
+                            real_length_m=params['real_length_m'],
+                            real_width_m=params['real_width_m'],
+                            wall_method=params['wall_method'],
+                            interpolation_method=params['interpolation_method'],
+                            prediction_mode=params['prediction_mode'],
+                            scale=result.scale
+                        ),
+                        'images': {},
+                    }
+                    st.session_state['sweep'] = sweep
+                except PipelineError as e:
+                    st.error(f"❌ {str(e)}")
+                except Exception as e:
+                    st.error(f"❌ Erreur inattendue: {str(e)}")
+                    st.code(traceback.format_exc())  # Pas d'expander imbriqué
+
+        if sweep is not None:
+            render_sweep_result(sweep, params)
+
+
+def render_sweep_result(sweep, params):
+    """
+    Affiche une fréquence du balayage au choix et propose l'export du cube
+
+    Les images sont rendues à la demande depuis le cube et conservées dans
+    l'entrée de session ; la palette est commune à toutes les fréquences
+    pour que les couleurs restent comparables.
+
+    Args:
+        sweep: Entrée de session (résultat, métadonnées, images rendues)
+        params: Dictionnaire des paramètres de l'application
+    """
+    result = sweep['result']
+    frequency = st.select_slider(
+        "Fréquence affichée (MHz)", options=result.frequencies_mhz,
+        format_func=lambda value: f"{value:g}"
+    )
+    index = result.frequencies_mhz.index(frequency)
+
+    image_key = (index, params['colormap'], params['heatmap_alpha'])
+    if image_key not in sweep['images']:
+        plan, _ = load_plan(params['uploaded_file'])
+        gray_img = plan.level(result.scale).gray_img
+        img_height, img_width = gray_img.shape
+        lattice = rx_to_lattice(result.rx_x, result.rx_y, result.path_loss[index],
+                                result.step, img_width, img_height)
+        sweep['images'][image_key] = render_heatmap(
+            gray_img, result.cube[index], result.path_loss, result.tx_positions_px,
+            lattice, result.step, cmap=params['colormap'],
+            alpha=params['heatmap_alpha']
+        )
+    st.image(sweep['images'][image_key],
+             caption=MESSAGES["sweep_level"].format(frequency))
+
+    export_format = st.selectbox(
+        "Format d'export du balayage", options=SWEEP_CONFIG["export_formats"],
+        format_func=lambda key: EXPORT_FORMATS[key]["label"]
+    )
+    # Fichier construit seulement au clic (pas à chaque réexécution du script)
+    st.download_button(
+        label="💾 Télécharger le balayage",
+        data=lambda: export_sweep_bytes(export_format, result, sweep['metadata']),
+        file_name=f"path_loss_sweep.{export_format}",
+        mime=EXPORT_FORMATS[export_format]["mime"]
+    )
@@ -7,22 +7,25 @@ import streamlit as st
 import matplotlib.pyplot as plt
 import numpy as np
 import io
+import time
 import traceback
-from utils.image_processing import (
-    process_uploaded_image, 
-    convert_position_to_pixels, 
-    validate_tx_position
-)
-from utils.path_loss_calculator import (
-    generate_rx_data, 
-    predict_path_loss, 
-    create_interpolated_grid
-)
-from config import MESSAGES
+from contextlib import nullcontext
+from utils.image_processing import read_upload_bytes
+from utils.instrumentation import Profiler, get_performance_logger, log_performance
+from utils.jobs import JobCancelled, current_job, fingerprint, get_generation_executor
+from utils.pipeline import PipelineError, get_pipeline
+from utils.plan_cache import make_plan_key
+from utils.rendering import encode_png
+from utils.export import build_metadata, export_bytes
+from models.model_loader import get_predictor, get_model_version
+from config import (MESSAGES, PARALLEL_CONFIG, PIPELINE_CACHE_ENTRIES, STAGE_LABELS,
+                    EXPORT_FORMATS, PERFORMANCE_CONFIG, COUNTER_LABELS,
+                    PROGRESSIVE_CONFIG, JOBS_CONFIG, DEFAULT_VALUES, PLAN_THRESHOLD)
 
 
 def check_generation_requirements(uploaded_file, model, real_length_m, real_width_m,
-                                tx_x_m, tx_y_m, frequency_mhz, step):
+                                tx_x_m, tx_y_m, frequency_mhz, step,
+                                tx_positions_m=None):
     """
     Vérifie si tous les prérequis pour la génération sont remplis
     
@@ -35,10 +38,11 @@ def check_generation_requirements(uploaded_file, model, real_length_m, real_widt
         issues.append("❌ Aucun fichier image téléchargé")
     if model is None:
         issues.append("❌ Modèle ML non chargé")
-    if not (0 <= tx_x_m <= real_length_m):
-        issues.append("❌ Position X du transmetteur hors limites")
-    if not (0 <= tx_y_m <= real_width_m):
-        issues.append("❌ Position Y du transmetteur hors limites")
+    for x_m, y_m in (tx_positions_m or [(tx_x_m, tx_y_m)]):
+        if not (0 <= x_m <= real_length_m):
+            issues.append("❌ Position X du transmetteur hors limites")
+        if not (0 <= y_m <= real_width_m):
+            issues.append("❌ Position Y du transmetteur hors limites")
     if not (100 <= frequency_mhz <= 10000):
         issues.append("❌ Fréquence hors de la plage valide")
     if step <= 0:
@@ -48,115 +52,233 @@ def check_generation_requirements(uploaded_file, model, real_length_m, real_widt
     return can_generate, issues
 
 
-def create_heatmap_plot(binary_img, original_img, grid_x, grid_y, grid_path_loss,
-                       path_loss_values, tx_x_px, tx_y_px, img_width, img_height):
-    """
-    Crée le plot matplotlib de la heatmap
-    
-    Returns:
-        matplotlib.figure.Figure: Figure de la heatmap
+def process_and_generate_heatmap(uploaded_file, real_length_m, real_width_m, 
+                               tx_x_m, tx_y_m, frequency_mhz, step, model,
+                               wall_method='exact', interpolation_method='cubic',
+                               sampling='uniform', adaptive_tolerance_db=2.0,
+                               stats=None, tx_positions_m=None, workers=1,
+                               cmap='jet', alpha=0.7, model_key=None, pipeline=None,
+                               render_mode=DEFAULT_VALUES['render_mode'], pyramid=False,
+                               profiler=None, on_preview=None):
     """
-    fig, ax = plt.subplots(figsize=(12, 10))
-    
-    # Afficher le plan d'étage en arrière-plan
-    ax.imshow(original_img, cmap='gray', alpha=0.6, extent=[0, img_width, img_height, 0])
-    
-    # Afficher la heatmap interpolée
-    im = ax.imshow(grid_path_loss.T, extent=[0, img_width, img_height, 0],
-                  cmap='jet', alpha=0.7, origin='upper',
-                  vmin=path_loss_values.min() if path_loss_values.size > 0 else None,
-                  vmax=path_loss_values.max() if path_loss_values.size > 0 else None)
-    
-    # Ajouter la barre de couleur
-    plt.colorbar(im, label='Path Loss (dB)')
-    
-    # Visualisation Tx améliorée
-    ax.scatter(tx_x_px, tx_y_px, color='red', s=200, marker='*',
-              edgecolors='black', linewidth=2, label='Tx (WiFi)')
-    ax.text(tx_x_px, tx_y_px - 10, 'Tx', color='red', fontsize=14, ha='center')
+    Traite l'image et génère la heatmap complète
     
-    # Ajouter des contours si possible
-    if path_loss_values.size > 50 and np.std(path_loss_values) > 1:
-        try:
-            min_pl = path_loss_values.min() if path_loss_values.size > 0 else 30
-            max_pl = path_loss_values.max() if path_loss_values.size > 0 else 150
-            levels = np.linspace(min_pl, max_pl, 10)
-            
-            CS = ax.contour(grid_x, grid_y, grid_path_loss, levels=levels, 
-                           colors='white', alpha=0.5)
-            ax.clabel(CS, inline=1, fontsize=10, colors='white', fmt='%1.0f dB')
-        except Exception:
-            pass  # Continuer sans contours si le tracé échoue
+    Le calcul passe par le pipeline à étapes mémorisées (plan, géométrie,
+    prédiction, grille, figure) : seules les étapes dont les entrées ont
+    changé depuis la génération précédente sont recalculées.
     
-    ax.set_title('Path Loss Heatmap')
-    ax.set_xlabel('Position X (pixels)')
-    ax.set_ylabel('Position Y (pixels)')
-    ax.legend()
-    plt.tight_layout()
+    Args:
+        tx_positions_m: Positions [(x_m, y_m), ...] de plusieurs WiFi ; si plus
+            d'une, la heatmap combinée (meilleur serveur) est calculée
+        workers: Nombre de processus ; au-delà de 1, la géométrie de la grille
+            uniforme est calculée par bandes en parallèle (résultat identique)
+        sampling: 'uniform' (grille complète) ou 'adaptive' (quadtree)
+        adaptive_tolerance_db: Tolérance de raffinement du mode adaptatif
+        stats: Dictionnaire optionnel complété avec les statistiques du calcul
+            et l'état de chaque étape (clé 'stages')
+        cmap: Palette de couleurs de la heatmap
+        alpha: Opacité de la heatmap
+        model_key: Identifiant stable du prédicteur (mode de prédiction)
+        pipeline: Pipeline à utiliser (par défaut celui du processus)
+        render_mode: 'raster' (image RGB à la résolution du plan) ou
+            'matplotlib' (figure de publication)
+        pyramid: Calculer sur le niveau réduit du plan adapté au pas
+        profiler: Profiler optionnel complété avec le temps, le pic mémoire
+            et les compteurs de chaque étape
+        on_preview: Fonction appelée avec (pas, HeatmapResult) pour chaque
+            aperçu grossier ; si fournie, le calcul est progressif (voir
+            HeatmapPipeline.run_progressive)
     
-    return fig
+    Returns:
+        tuple: (figure, error_message) - figure matplotlib ou image RGB
+        selon render_mode
+    """
+    result, error = generate_heatmap_result(
+        uploaded_file, real_length_m, real_width_m, tx_x_m, tx_y_m, frequency_mhz,
+        step, model, wall_method=wall_method,
+        interpolation_method=interpolation_method, sampling=sampling,
+        adaptive_tolerance_db=adaptive_tolerance_db, stats=stats,
+        tx_positions_m=tx_positions_m, workers=workers, cmap=cmap, alpha=alpha,
+        model_key=model_key, pipeline=pipeline, render_mode=render_mode,
+        pyramid=pyramid, profiler=profiler, on_preview=on_preview
+    )
+    return (result.figure if result is not None else None), error
 
 
-def process_and_generate_heatmap(uploaded_file, real_length_m, real_width_m, 
-                               tx_x_m, tx_y_m, frequency_mhz, step, model):
+def generate_heatmap_result(uploaded_file, real_length_m, real_width_m,
+                            tx_x_m, tx_y_m, frequency_mhz, step, model,
+                            wall_method='exact', interpolation_method='cubic',
+                            sampling='uniform', adaptive_tolerance_db=2.0,
+                            stats=None, tx_positions_m=None, workers=1,
+                            cmap='jet', alpha=0.7, model_key=None, pipeline=None,
+                            render_mode=DEFAULT_VALUES['render_mode'], pyramid=False,
+                            profiler=None, on_preview=None):
     """
-    Traite l'image et génère la heatmap complète
+    Comme process_and_generate_heatmap, mais retourne le résultat complet
+    (figure, récepteurs et grille) pour l'export des données
+    
+    Si un profiler est fourni, il est actif pendant le calcul : les
+    fonctions appelées y signalent leur volume de travail.
     
     Returns:
-        tuple: (figure, error_message)
+        tuple: (HeatmapResult, error_message)
     """
     try:
-        # Traiter l'image
-        binary_img, original_img, error = process_uploaded_image(uploaded_file)
-        if error:
-            return None, error
-        
-        img_height, img_width = binary_img.shape
-        
-        # Convertir la position Tx en pixels
-        tx_x_px = convert_position_to_pixels(tx_x_m, real_length_m, img_width)
-        tx_y_px = convert_position_to_pixels(tx_y_m, real_width_m, img_height)
+        if pipeline is None:
+            pipeline = get_pipeline(PIPELINE_CACHE_ENTRIES)
         
-        # Vérifier les limites
-        if not validate_tx_position(tx_x_px, tx_y_px, img_width, img_height):
-            return None, "La position Tx est hors des limites de l'image."
-        
-        # Générer les données Rx
-        rx_df = generate_rx_data(binary_img, tx_x_px, tx_y_px, real_length_m, 
-                               real_width_m, frequency_mhz, step)
-        
-        if rx_df.empty:
-            return None, "Aucun espace libre trouvé."
-        
-        # Prédire le Path Loss
-        rx_df = predict_path_loss(rx_df, model)
-        
-        # Créer la grille interpolée
-        grid_x, grid_y, grid_path_loss = create_interpolated_grid(
-            rx_df, img_width, img_height, binary_img
+        run_args = (uploaded_file, real_length_m, real_width_m,
+                    tx_positions_m or [(tx_x_m, tx_y_m)], frequency_mhz, step, model)
+        run_kwargs = dict(
+            model_key=model_key, wall_method=wall_method,
+            interpolation_method=interpolation_method, sampling=sampling,
+            adaptive_tolerance_db=adaptive_tolerance_db, workers=workers,
+            tile_rows=PARALLEL_CONFIG["tile_rows"], cmap=cmap, alpha=alpha,
+            render_mode=render_mode, pyramid=pyramid, stats=stats
         )
+        with (profiler.activate() if profiler is not None else nullcontext()):
+            if on_preview is None:
+                result = pipeline.run(*run_args, **run_kwargs)
+            else:
+                # Le dernier niveau produit est le résultat final
+                for level_step, result in pipeline.run_progressive(
+                        *run_args, coarsest_step=PROGRESSIVE_CONFIG["coarsest_step"],
+                        **run_kwargs):
+                    if level_step != step:
+                        on_preview(level_step, result)
+        return result, None
         
-        if grid_path_loss is None:
-            return None, "Erreur lors de la création de la grille interpolée."
-        
-        # Créer la heatmap
-        path_loss_values = rx_df['Path_Loss_Predicted'].values
-        fig = create_heatmap_plot(binary_img, original_img, grid_x, grid_y, 
-                                grid_path_loss, path_loss_values, tx_x_px, tx_y_px,
-                                img_width, img_height)
-        
-        return fig, None
-        
+    except PipelineError as e:
+        return None, str(e)
+    except JobCancelled:
+        raise
     except Exception as e:
         error_msg = f"Erreur lors du traitement: {str(e)}"
         traceback.print_exc()
         return None, error_msg
 
 
+def generation_fingerprint(params):
+    """
+    Empreinte des paramètres qui déterminent le résultat d'une génération
+    
+    Le nombre de processus et l'affichage progressif, sans effet sur le
+    résultat, n'en font pas partie.
+    
+    Args:
+        params: Dictionnaire des paramètres de l'application
+        
+    Returns:
+        str: Empreinte des paramètres, du contenu du plan et du modèle
+    """
+    return fingerprint(
+        make_plan_key(read_upload_bytes(params['uploaded_file']), PLAN_THRESHOLD, 1),
+        get_model_version(), params['real_length_m'], params['real_width_m'],
+        params.get('tx_positions_m') or [(params['tx_x_m'], params['tx_y_m'])],
+        params['frequency_mhz'], params['step'], params['wall_method'],
+        params['interpolation_method'], params['sampling'],
+        params['adaptive_tolerance_db'], params['prediction_mode'],
+        params['colormap'], params['heatmap_alpha'], params['render_mode'],
+        params['fast_preview']
+    )
+
+
+def run_generation_job(params, predictor, model_version):
+    """
+    Génère la heatmap dans un job d'arrière-plan (voir utils.jobs)
+    
+    Les aperçus du calcul progressif sont publiés dans job.progress ; les
+    mesures de performance sont journalisées comme pour un calcul direct.
+    
+    Args:
+        params: Dictionnaire des paramètres de l'application
+        predictor: Prédicteur résolu dans le thread du script
+        model_version: Version du modèle enregistrée dans les métadonnées
+        
+    Returns:
+        dict: Entrée de session (résultat, statistiques, mode de rendu,
+        performance, métadonnées) et message d'erreur ('error')
+    """
+    job = current_job()
+    
+    def publish_preview(level_step, level_result):
+        job.progress = (level_step, level_result.figure)
+    
+    stats = {}
+    profiler = Profiler(PERFORMANCE_CONFIG["trace_memory"])
+    result, error = generate_heatmap_result(
+        params['uploaded_file'], params['real_length_m'], 
+        params['real_width_m'], params['tx_x_m'], params['tx_y_m'],
+        params['frequency_mhz'], params['step'], predictor,
+        wall_method=params['wall_method'],
+        interpolation_method=params['interpolation_method'],
+        sampling=params['sampling'],
+        adaptive_tolerance_db=params['adaptive_tolerance_db'],
+        stats=stats,
+        tx_positions_m=params.get('tx_positions_m'),
+        workers=params['workers'],
+        cmap=params['colormap'],
+        alpha=params['heatmap_alpha'],
+        render_mode=params['render_mode'],
+        pyramid=params['fast_preview'],
+        profiler=profiler,
+        on_preview=publish_preview if params['progressive'] and job is not None else None
+    )
+    performance = log_performance(
+        profiler,
+        logger=get_performance_logger(PERFORMANCE_CONFIG["log_file"]),
+        status='error' if error else 'ok',
+        plan_key=result.plan_key if result is not None else None,
+        frequency_mhz=params['frequency_mhz'], step=params['step'],
+        num_aps=len(params.get('tx_positions_m') or [None]),
+        wall_method=params['wall_method'],
+        interpolation_method=params['interpolation_method'],
+        sampling=params['sampling'],
+        prediction_mode=params['prediction_mode'],
+        workers=params['workers'],
+        render_mode=params['render_mode'],
+        pyramid=params['fast_preview'],
+        progressive=params['progressive']
+    )
+    if error:
+        return {'error': error}
+    
+    return {
+        'result': result,
+        'stats': stats,
+        'render_mode': params['render_mode'],
+        'performance': performance,
+        'metadata': build_metadata(
+            result.plan_key, result.tx_positions_px,
+            params['frequency_mhz'], params['step'], model_version,
+            tx_positions_m=params.get('tx_positions_m'),
+            real_length_m=params['real_length_m'],
+            real_width_m=params['real_width_m'],
+            wall_method=params['wall_method'],
+            interpolation_method=params['interpolation_method'],
+            sampling=params['sampling'],
+            prediction_mode=params['prediction_mode'],
+            scale=result.scale
+        ),
+        'error': None,
+    }
+
+
 def render_heatmap_generation_section(params, model):
     """
     Rend la section de génération de heatmap
     
+    La génération s'exécute en arrière-plan dans l'exécuteur partagé du
+    processus ; la poignée du job est conservée dans la session et le
+    script ne fait qu'en suivre l'avancement. Si les paramètres changent
+    pendant le calcul, le job obsolète est annulé à la prochaine frontière
+    d'étape ou de tuile. Les résultats terminés sont conservés par
+    empreinte de paramètres : revenir à des paramètres déjà calculés est
+    immédiat.
+    
+    Le dernier résultat est conservé dans la session : il reste affiché et
+    exportable lorsque l'utilisateur change de format d'export.
+    
     Args:
         params: Dictionnaire des paramètres de l'application
         model: Modèle ML chargé
@@ -168,38 +290,41 @@ def render_heatmap_generation_section(params, model):
     can_generate, issues = check_generation_requirements(
         params['uploaded_file'], model, params['real_length_m'], 
         params['real_width_m'], params['tx_x_m'], params['tx_y_m'],
-        params['frequency_mhz'], params['step']
+        params['frequency_mhz'], params['step'],
+        params.get('tx_positions_m')
     )
+    current = generation_fingerprint(params) if can_generate else None
+    
+    # Un job lancé avec d'autres paramètres est obsolète
+    job = st.session_state.get('generation_job')
+    if job is not None and job.fingerprint != current:
+        if not job.done():
+            job.cancel()
+            st.info(MESSAGES["generation_cancelled"])
+        st.session_state.pop('generation_job')
+        job = None
     
     if st.button("🚀 Générer la Heatmap", disabled=not can_generate, type="primary"):
         if not can_generate:
             st.error("❌ Veuillez vérifier tous les paramètres avant de générer la heatmap.")
-        else:
-            with st.spinner("🔄 Génération de la heatmap en cours..."):
-                try:
-                    fig, error = process_and_generate_heatmap(
-                        params['uploaded_file'], params['real_length_m'], 
-                        params['real_width_m'], params['tx_x_m'], params['tx_y_m'],
-                        params['frequency_mhz'], params['step'], model
-                    )
-                    
-                    if error:
-                        st.error(f"❌ Erreur: {error}")
-                    else:
-                        st.success(MESSAGES["heatmap_generated"])
-                        
-                        # Afficher la heatmap
-                        st.pyplot(fig)
-                        
-                        # Bouton de téléchargement
-                        render_download_button(fig)
-                        
-                        plt.close(fig)  # Fermer la figure pour libérer la mémoire
-                        
-                except Exception as e:
-                    st.error(f"❌ Erreur inattendue: {str(e)}")
-                    with st.expander("🔍 Détails de l'erreur"):
-                        st.code(traceback.format_exc())
+        elif job is None:
+            executor = get_generation_executor(JOBS_CONFIG["workers"],
+                                               JOBS_CONFIG["result_cache_entries"])
+            # Le job lit une copie du plan, pas le fichier de la session
+            plan_params = dict(params,
+                               uploaded_file=read_upload_bytes(params['uploaded_file']))
+            job = executor.submit(
+                current, run_generation_job, plan_params,
+                get_predictor(model, params['prediction_mode']), get_model_version(),
+                cacheable=lambda entry: entry['error'] is None
+            )
+            st.session_state['generation_job'] = job
+    
+    if job is not None:
+        follow_generation_job(job)
+    
+    if 'heatmap' in st.session_state:
+        render_heatmap_result(st.session_state['heatmap'])
     
     # Informations supplémentaires
     if not can_generate:
@@ -208,20 +333,161 @@ def render_heatmap_generation_section(params, model):
                 st.write(issue)
 
 
+def follow_generation_job(job):
+    """
+    Suit un job de génération jusqu'à sa fin, puis enregistre son résultat
+    
+    L'attente interroge le job à intervalle régulier : une interaction de
+    l'utilisateur relance le script sans bloquer sur le calcul en cours.
+    
+    Args:
+        job: GenerationJob de la session
+    """
+    if not job.done():
+        progress = st.empty()
+        preview = st.empty()
+        shown = None
+        while not job.wait(JOBS_CONFIG["poll_seconds"]):
+            progress.caption(MESSAGES["generation_running"].format(
+                time.time() - job.submitted_at))
+            if job.progress is not None and job.progress is not shown:
+                shown = job.progress
+                level_step, figure = shown
+                preview.image(figure,
+                              caption=MESSAGES["progressive_level"].format(level_step))
+        progress.empty()
+        preview.empty()
+    
+    st.session_state.pop('generation_job', None)
+    if job.status == 'cancelled':
+        return
+    if job.status == 'error':
+        st.session_state.pop('heatmap', None)
+        st.error(f"❌ Erreur inattendue: {str(job.error)}")
+        with st.expander("🔍 Détails de l'erreur"):
+            st.code("".join(traceback.format_exception(job.error)))
+        return
+    
+    entry = job.value
+    if entry['error']:
+        st.session_state.pop('heatmap', None)
+        st.error(f"❌ Erreur: {entry['error']}")
+        return
+    
+    st.session_state['heatmap'] = entry
+    st.success(MESSAGES["cached_result"] if job.cached
+               else MESSAGES["heatmap_generated"])
+
+
+def render_heatmap_result(heatmap):
+    """
+    Affiche la dernière heatmap générée et ses options d'export
+    
+    Args:
+        heatmap: Entrée de session (résultat, statistiques, mode de rendu,
+            métadonnées)
+    """
+    result, stats = heatmap['result'], heatmap['stats']
+    fig = result.figure
+    
+    if 'saved_evaluations' in stats:
+        st.info(MESSAGES["adaptive_stats"].format(**stats))
+    
+    if stats.get('reused_stages'):
+        st.caption(MESSAGES["reused_stages"].format(", ".join(
+            STAGE_LABELS[name] for name in stats['reused_stages']
+        )))
+    
+    # Afficher la heatmap
+    if heatmap['render_mode'] == 'raster':
+        st.image(fig, caption="Path Loss Heatmap")
+    else:
+        st.pyplot(fig)
+        plt.close(fig)  # Détacher la figure de pyplot (le résultat la conserve)
+    
+    if heatmap.get('performance'):
+        render_performance_panel(heatmap['performance'])
+    
+    # Export (seul le format choisi est construit)
+    export_format = st.selectbox(
+        "Format d'export",
+        options=list(EXPORT_FORMATS.keys()),
+        format_func=lambda key: EXPORT_FORMATS[key]["label"]
+    )
+    if export_format == 'png':
+        render_download_button(fig)
+    else:
+        render_data_download_button(export_format, result, heatmap['metadata'])
+
+
+def render_performance_panel(performance):
+    """
+    Affiche le temps, le pic mémoire et les compteurs de chaque étape
+    
+    Args:
+        performance: Mesures de la génération (voir Profiler.to_dict)
+    """
+    def megabytes(peak_bytes):
+        return None if peak_bytes is None else round(peak_bytes / 1024 ** 2, 1)
+    
+    with st.expander("⏱️ Performance"):
+        st.table([{
+            "Étape": STAGE_LABELS.get(stage['name'], stage['name']),
+            "Temps (s)": round(stage['seconds'], 3),
+            "Pic mémoire (Mo)": megabytes(stage['peak_bytes']),
+            "État": stage['status'],
+        } for stage in performance['stages']])
+        
+        counters = performance['counters']
+        if counters:
+            columns = st.columns(len(counters))
+            for column, (name, value) in zip(columns, counters.items()):
+                column.metric(COUNTER_LABELS.get(name, name), f"{value:,}")
+        
+        peak = megabytes(performance['peak_bytes'])
+        st.caption(f"Total : {performance['total_seconds']:.3f} s"
+                   + (f" — pic mémoire : {peak} Mo" if peak is not None else ""))
+
+
+def render_data_download_button(export_format, result, metadata):
+    """
+    Rend le bouton de téléchargement des données brutes
+    
+    Args:
+        export_format: 'npy', 'npz' ou 'csv'
+        result: HeatmapResult (grille et récepteurs)
+        metadata: Métadonnées de l'export
+    """
+    file_format = EXPORT_FORMATS[export_format]
+    # Fichier construit seulement au clic (pas à chaque réexécution du script)
+    st.download_button(
+        label="💾 Télécharger les données",
+        data=lambda: export_bytes(export_format, result.grid, result.rx_data,
+                                  metadata),
+        file_name=f"path_loss.{export_format}",
+        mime=file_format["mime"]
+    )
+
+
 def render_download_button(fig):
     """
     Rend le bouton de téléchargement de la heatmap
     
     Args:
-        fig: Figure matplotlib à télécharger
+        fig: Figure matplotlib ou image RGB (rendu rapide) à télécharger
     """
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=300, bbox_inches='tight')
-    buf.seek(0)
+    def build_png():
+        if isinstance(fig, np.ndarray):
+            return encode_png(fig)
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=300, bbox_inches='tight')
+        buf.seek(0)
+        return buf
     
+    # Image encodée seulement au clic (pas à chaque réexécution du script)
     st.download_button(
         label="💾 Télécharger la Heatmap",
-        data=buf,
+        data=build_png,
         file_name="path_loss_heatmap.png",
         mime="image/png"
     )
@@ -4,10 +4,10 @@ Module pour le contenu principal et le canvas interactif
 """
 
 import streamlit as st
-import numpy as np
 from PIL import Image
 from streamlit_drawable_canvas import st_canvas
 from config import LIMITS, MESSAGES
+from utils.image_processing import load_plan
 
 
 def render_instructions():
@@ -22,36 +22,51 @@ def render_instructions():
     """)
 
 
-def render_image_preview_and_placement(uploaded_file, real_length_m, real_width_m):
+def render_image_preview_and_placement(uploaded_file, real_length_m, real_width_m,
+                                       num_wifi=1):
     """
     Rend l'aperçu de l'image et le placement interactif du WiFi
     
+    Le plan est décodé une seule fois via le cache de prétraitement, partagé
+    avec le calcul ; le canvas affiche une vignette de sa pyramide.
+    
     Args:
         uploaded_file: Fichier image uploadé
         real_length_m: Longueur réelle en mètres
         real_width_m: Largeur réelle en mètres
+        num_wifi: Nombre de points WiFi à placer
         
     Returns:
-        tuple: (tx_x_m, tx_y_m) - Position du transmetteur en mètres
+        list: Positions [(tx_x_m, tx_y_m), ...] des transmetteurs en mètres
     """
     st.header("🖼️ Aperçu du plan - Placement WiFi")
     
+    plan = None
     if uploaded_file is not None:
-        image = Image.open(uploaded_file)
-        img_array = np.array(image.convert('RGB'))  # RGB pour le canvas
+        plan, error = load_plan(uploaded_file)
+        if error:
+            st.error(f"❌ {error}")
+    
+    if plan is not None:
+        # Le plan décodé (partagé avec le calcul) fournit la vignette en
+        # couleurs du canvas
+        img_array = plan.gray_img
 
         st.subheader("🖱️ Cliquez sur le plan pour placer le WiFi (Tx)")
 
         # Calculer les dimensions du canvas
         canvas_height = min(img_array.shape[0], LIMITS["max_canvas_height"])
         canvas_width = min(img_array.shape[1], LIMITS["max_canvas_width"])
+        background = Image.fromarray(
+            plan.thumbnail(canvas_width, canvas_height, color=True)
+        ).convert('RGB')
 
         # Canvas interactif
         canvas_result = st_canvas(
             fill_color="rgba(255, 0, 0, 0.3)",  # Couleur des cercles
             stroke_width=3,
             stroke_color="#FF0000",
-            background_image=image,
+            background_image=background,
             update_streamlit=True,
             height=canvas_height,
             width=canvas_width,
@@ -61,70 +76,78 @@ def render_image_preview_and_placement(uploaded_file, real_length_m, real_width_
         )
 
         # Traitement des clics sur le canvas
-        tx_x_m, tx_y_m = process_canvas_clicks(
+        tx_positions_m = process_canvas_clicks(
             canvas_result, img_array, canvas_width, canvas_height,
-            real_length_m, real_width_m
+            real_length_m, real_width_m, num_wifi
         )
         
     else:
-        st.info(MESSAGES["upload_image"])
-        tx_x_m = real_length_m / 2  # valeur par défaut
-        tx_y_m = real_width_m / 2   # valeur par défaut
+        if uploaded_file is None:
+            st.info(MESSAGES["upload_image"])
+        tx_positions_m = [(real_length_m / 2, real_width_m / 2)]  # valeur par défaut
     
-    return tx_x_m, tx_y_m
+    return tx_positions_m
 
 
 def process_canvas_clicks(canvas_result, img_array, canvas_width, canvas_height,
-                         real_length_m, real_width_m):
+                         real_length_m, real_width_m, num_wifi=1):
     """
-    Traite les clics sur le canvas et calcule la position du transmetteur
+    Traite les clics sur le canvas et calcule la position des transmetteurs
+    
+    Les num_wifi derniers cercles dessinés sont retenus.
     
     Args:
         canvas_result: Résultat du canvas interactif
-        img_array: Array de l'image
+        img_array: Array de l'image (seules ses dimensions sont utilisées)
         canvas_width: Largeur du canvas
         canvas_height: Hauteur du canvas
         real_length_m: Longueur réelle en mètres
         real_width_m: Largeur réelle en mètres
+        num_wifi: Nombre de points WiFi attendus
         
     Returns:
-        tuple: (tx_x_m, tx_y_m) - Position en mètres
+        list: Positions [(tx_x_m, tx_y_m), ...] en mètres
     """
-    # Si l'utilisateur a cliqué pour dessiner un cercle
+    # Si l'utilisateur a cliqué pour dessiner des cercles
     if canvas_result.json_data is not None:
         objects = canvas_result.json_data["objects"]
         if len(objects) > 0:
-            last_obj = objects[-1]  # dernier cercle ajouté
-            tx_x_px = int(last_obj["left"] + last_obj["radius"])
-            tx_y_px = int(last_obj["top"] + last_obj["radius"])
-            st.success(f"📍 Position Tx choisie: ({tx_x_px}px, {tx_y_px}px)")
-
             # Conversion en mètres (avec facteur d'échelle si l'image est redimensionnée)
             scale_x = img_array.shape[1] / canvas_width
             scale_y = img_array.shape[0] / canvas_height
             
-            actual_tx_x_px = int(tx_x_px * scale_x)
-            actual_tx_y_px = int(tx_y_px * scale_y)
+            tx_positions_m = []
+            for i, obj in enumerate(objects[-num_wifi:]):  # derniers cercles ajoutés
+                tx_x_px = int(obj["left"] + obj["radius"])
+                tx_y_px = int(obj["top"] + obj["radius"])
+                
+                actual_tx_x_px = int(tx_x_px * scale_x)
+                actual_tx_y_px = int(tx_y_px * scale_y)
+                
+                tx_x_m = (actual_tx_x_px / img_array.shape[1]) * real_length_m
+                tx_y_m = (actual_tx_y_px / img_array.shape[0]) * real_width_m
+                st.info(f"📍 WiFi {i + 1} placé à: ({tx_x_m:.2f}m, {tx_y_m:.2f}m)")
+                tx_positions_m.append((tx_x_m, tx_y_m))
             
-            tx_x_m = (actual_tx_x_px / img_array.shape[1]) * real_length_m
-            tx_y_m = (actual_tx_y_px / img_array.shape[0]) * real_width_m
-            st.info(f"📏 Position Tx réelle: ({tx_x_m:.2f}m, {tx_y_m:.2f}m)")
+            if len(tx_positions_m) < num_wifi:
+                st.warning(MESSAGES["missing_wifi"].format(num_wifi - len(tx_positions_m)))
+            else:
+                st.success(MESSAGES["wifi_placed"].format(len(tx_positions_m)))
 
             # Mettre à jour les valeurs dans la session (optionnel)
-            st.session_state.tx_x_m = tx_x_m
-            st.session_state.tx_y_m = tx_y_m
+            st.session_state.tx_x_m, st.session_state.tx_y_m = tx_positions_m[0]
 
-            return tx_x_m, tx_y_m
+            return tx_positions_m
         else:
             st.warning(MESSAGES["click_to_place"])
     else:
         st.warning(MESSAGES["click_to_place"])
     
     # Valeurs par défaut si pas de clic
-    return real_length_m / 2, real_width_m / 2
+    return [(real_length_m / 2, real_width_m / 2)]
 
 
-def render_main_content(uploaded_file, real_length_m, real_width_m):
+def render_main_content(uploaded_file, real_length_m, real_width_m, num_wifi=1):
     """
     Rend le contenu principal de l'application
     
@@ -132,9 +155,10 @@ def render_main_content(uploaded_file, real_length_m, real_width_m):
         uploaded_file: Fichier image uploadé
         real_length_m: Longueur réelle en mètres
         real_width_m: Largeur réelle en mètres
+        num_wifi: Nombre de points WiFi à placer
         
     Returns:
-        tuple: (tx_x_m, tx_y_m) - Position du transmetteur
+        list: Positions [(tx_x_m, tx_y_m), ...] des transmetteurs
     """
     col1, col2 = st.columns([1, 1])
     
@@ -142,8 +166,8 @@ def render_main_content(uploaded_file, real_length_m, real_width_m):
         render_instructions()
     
     with col2:
-        tx_x_m, tx_y_m = render_image_preview_and_placement(
-            uploaded_file, real_length_m, real_width_m
+        tx_positions_m = render_image_preview_and_placement(
+            uploaded_file, real_length_m, real_width_m, num_wifi
         )
     
-    return tx_x_m, tx_y_m
+    return tx_positions_m
@@ -0,0 +1,119 @@
+# ui/placement_optimizer.py
+"""
+Module pour le placement automatique des points WiFi
+"""
+
+import streamlit as st
+import traceback
+from utils.image_processing import load_plan
+from utils.placement import optimize_placement
+from models.model_loader import get_predictor
+from config import MESSAGES, PLACEMENT_CONFIG
+
+
+def render_placement_section(params, model):
+    """
+    Rend la section de placement automatique des WiFi
+
+    Le placement calculé est conservé dans la session tant que le plan et
+    ses dimensions ne changent pas ; s'il est retenu, il remplace les
+    positions placées sur le canvas pour la génération de la heatmap.
+
+    Args:
+        params: Dictionnaire des paramètres de l'application
+        model: Modèle ML chargé
+
+    Returns:
+        list: Positions [(x_m, y_m), ...] du placement retenu, ou None
+    """
+    uploaded_file = params['uploaded_file']
+    if uploaded_file is None or model is None:
+        st.session_state.pop('placement', None)
+        return None
+
+    plan, error = load_plan(uploaded_file)
+    if error:
+        return None
+    plan_dims = (plan.key, params['real_length_m'], params['real_width_m'])
+    placement = st.session_state.get('placement')
+    if placement is not None and placement['plan'] != plan_dims:
+        st.session_state.pop('placement')
+        placement = None
+
+    with st.expander("🤖 Placement automatique des WiFi", expanded=placement is not None):
+        col1, col2 = st.columns(2)
+        with col1:
+            num_aps = st.number_input(
+                "Nombre de WiFi à placer", min_value=1,
+                max_value=PLACEMENT_CONFIG["max_aps"], value=int(params['num_wifi']),
+                step=1
+            )
+            threshold_db = st.number_input(
+                "Path loss maximal couvert (dB)", min_value=30.0, max_value=150.0,
+                value=PLACEMENT_CONFIG["threshold_db"], step=1.0,
+                help="Un point est couvert si le path loss du meilleur WiFi ne "
+                     "dépasse pas ce seuil"
+            )
+        with col2:
+            candidate_spacing_m = st.number_input(
+                "Espacement des emplacements candidats (m)", min_value=0.25,
+                value=PLACEMENT_CONFIG["candidate_spacing_m"], step=0.5
+            )
+            receiver_spacing_m = st.number_input(
+                "Espacement des points d'évaluation (m)", min_value=0.25,
+                value=PLACEMENT_CONFIG["receiver_spacing_m"], step=0.25,
+                help="Plus petit = couverture plus précise mais calcul plus long"
+            )
+
+        if st.button("🔍 Optimiser le placement"):
+            with st.spinner("🔄 Recherche du meilleur placement..."):
+                try:
+                    result = optimize_placement(
+                        plan, int(num_aps), threshold_db, params['real_length_m'],
+                        params['real_width_m'], params['frequency_mhz'],
+                        get_predictor(model, params['prediction_mode']),
+                        candidate_spacing_m=candidate_spacing_m,
+                        receiver_spacing_m=receiver_spacing_m,
+                        max_pairs=PLACEMENT_CONFIG["max_pairs"],
+                        wall_method=params['wall_method'],
+                        workers=params['workers'],
+                        max_rounds=PLACEMENT_CONFIG["max_rounds"]
+                    )
+                    placement = {'plan': plan_dims, 'result': result,
+                                 'threshold_db': threshold_db}
+                    st.session_state['placement'] = placement
+                except ValueError as e:
+                    st.error(f"❌ {str(e)}")
+                except Exception as e:
+                    st.error(f"❌ Erreur inattendue: {str(e)}")
+                    st.code(traceback.format_exc())  # Pas d'expander imbriqué
+
+        if placement is None:
+            return None
+        return render_placement_result(placement)
+
+
+def render_placement_result(placement):
+    """
+    Affiche le placement calculé et propose de l'utiliser
+
+    Args:
+        placement: Entrée de session (résultat et seuil)
+
+    Returns:
+        list: Positions [(x_m, y_m), ...] si le placement est retenu, sinon None
+    """
+    result = placement['result']
+    st.success(MESSAGES["placement_done"].format(
+        len(result.tx_positions_m), result.coverage * 100, placement['threshold_db']
+    ))
+    st.caption(MESSAGES["placement_stats"].format(
+        result.candidates, result.receivers, result.swaps, result.seconds
+    ))
+    st.table([{"WiFi": i + 1, "X (m)": round(x_m, 2), "Y (m)": round(y_m, 2)}
+              for i, (x_m, y_m) in enumerate(result.tx_positions_m)])
+
+    if st.checkbox("Utiliser ce placement pour la heatmap", value=True,
+                   key="use_placement"):
+        return list(result.tx_positions_m)
+    return None
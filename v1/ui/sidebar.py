@@ -4,7 +4,10 @@ Module pour l'interface sidebar
 """
 
 import streamlit as st
-from config import DEFAULT_VALUES, LIMITS, ACCEPTED_IMAGE_TYPES, MESSAGES
+from config import (DEFAULT_VALUES, LIMITS, ACCEPTED_IMAGE_TYPES, MESSAGES,
+                    WALL_METHODS, INTERPOLATION_METHODS, SAMPLING_MODES,
+                    PREDICTION_MODES, PARALLEL_CONFIG, COLORMAPS,
+                    RENDER_MODES)
 
 
 def render_sidebar():
@@ -65,6 +68,15 @@ def render_sidebar():
             help="Position Y du transmetteur en mètres"
         )
         
+        num_wifi = st.number_input(
+            "Nombre de points WiFi",
+            min_value=LIMITS["min_wifi"],
+            max_value=LIMITS["max_wifi"],
+            value=DEFAULT_VALUES["num_wifi"],
+            step=1,
+            help="Avec plusieurs WiFi, la heatmap affiche le meilleur signal en chaque point"
+        )
+        
         # Paramètres de fréquence et résolution
         st.subheader("🔧 Paramètres de calcul")
         frequency_mhz = st.number_input(
@@ -84,6 +96,100 @@ def render_sidebar():
             step=1,
             help="Plus petit = plus précis mais plus lent"
         )
+        
+        fast_preview = st.checkbox(
+            "Aperçu rapide (plan réduit)",
+            value=DEFAULT_VALUES["fast_preview"],
+            help="Calcule sur un niveau réduit du plan adapté au pas "
+                 "(effet à partir d'un pas de 8 pixels)"
+        )
+        
+        progressive = st.checkbox(
+            "Affichage progressif",
+            value=DEFAULT_VALUES["progressive"],
+            help="Affiche d'abord une heatmap grossière puis l'affine jusqu'au "
+                 "pas demandé, en réutilisant les points déjà calculés"
+        )
+        
+        wall_method = st.selectbox(
+            "Comptage des murs",
+            options=list(WALL_METHODS.keys()),
+            index=list(WALL_METHODS.keys()).index(DEFAULT_VALUES["wall_method"]),
+            format_func=WALL_METHODS.get,
+            help="Le balayage radial partage les rayons entre récepteurs voisins"
+        )
+        
+        interpolation_method = st.selectbox(
+            "Interpolation",
+            options=list(INTERPOLATION_METHODS.keys()),
+            index=list(INTERPOLATION_METHODS.keys()).index(
+                DEFAULT_VALUES["interpolation_method"]
+            ),
+            format_func=INTERPOLATION_METHODS.get,
+            help="La grille régulière exploite le pas des récepteurs (pas de triangulation)"
+        )
+        
+        sampling = st.selectbox(
+            "Échantillonnage",
+            options=list(SAMPLING_MODES.keys()),
+            index=list(SAMPLING_MODES.keys()).index(DEFAULT_VALUES["sampling"]),
+            format_func=SAMPLING_MODES.get,
+            help="Le mode adaptatif ne raffine que les zones où le path loss varie"
+        )
+        
+        adaptive_tolerance_db = DEFAULT_VALUES["adaptive_tolerance_db"]
+        if sampling == "adaptive":
+            adaptive_tolerance_db = st.number_input(
+                "Tolérance de raffinement (dB)",
+                min_value=LIMITS["min_adaptive_tolerance_db"],
+                max_value=LIMITS["max_adaptive_tolerance_db"],
+                value=DEFAULT_VALUES["adaptive_tolerance_db"],
+                step=0.5,
+                help="Écart de path loss au-delà duquel une cellule est subdivisée"
+            )
+        
+        prediction_mode = st.selectbox(
+            "Prédiction",
+            options=list(PREDICTION_MODES.keys()),
+            index=list(PREDICTION_MODES.keys()).index(DEFAULT_VALUES["prediction_mode"]),
+            format_func=PREDICTION_MODES.get,
+            help="La table précalculée reproduit le modèle par simple recherche"
+        )
+        
+        workers = st.number_input(
+            "Processus de calcul",
+            min_value=1,
+            max_value=PARALLEL_CONFIG["max_workers"],
+            value=min(DEFAULT_VALUES["workers"], PARALLEL_CONFIG["max_workers"]),
+            step=1,
+            help="Plus d'un processus : la grille est calculée par bandes sur plusieurs cœurs"
+        )
+        
+        # Affichage
+        st.subheader("🎨 Affichage")
+        render_mode = st.selectbox(
+            "Rendu",
+            options=list(RENDER_MODES.keys()),
+            index=list(RENDER_MODES.keys()).index(DEFAULT_VALUES["render_mode"]),
+            format_func=RENDER_MODES.get,
+            help="Le rendu rapide produit l'image directement à la résolution du plan"
+        )
+        
+        colormap = st.selectbox(
+            "Palette de couleurs",
+            options=list(COLORMAPS.keys()),
+            index=list(COLORMAPS.keys()).index(DEFAULT_VALUES["colormap"]),
+            format_func=COLORMAPS.get
+        )
+        
+        heatmap_alpha = st.slider(
+            "Opacité de la heatmap",
+            min_value=0.1,
+            max_value=1.0,
+            value=DEFAULT_VALUES["heatmap_alpha"],
+            step=0.05,
+            help="Seul le rendu est recalculé lorsque l'affichage change"
+        )
     
     return {
         'uploaded_file': uploaded_file,
@@ -91,6 +197,18 @@ def render_sidebar():
         'real_width_m': real_width_m,
         'tx_x_m': tx_x_m,
         'tx_y_m': tx_y_m,
+        'num_wifi': num_wifi,
         'frequency_mhz': frequency_mhz,
-        'step': step
+        'step': step,
+        'fast_preview': fast_preview,
+        'progressive': progressive,
+        'wall_method': wall_method,
+        'interpolation_method': interpolation_method,
+        'sampling': sampling,
+        'adaptive_tolerance_db': adaptive_tolerance_db,
+        'prediction_mode': prediction_mode,
+        'workers': workers,
+        'colormap': colormap,
+        'heatmap_alpha': heatmap_alpha,
+        'render_mode': render_mode
     }
@@ -0,0 +1,205 @@
+# utils/adaptive_sampling.py
+"""
+Module pour l'échantillonnage adaptatif (quadtree) de la grille des récepteurs
+"""
+
+import numpy as np
+from utils.image_processing import convert_distance_to_meters
+from utils.path_loss_calculator import (
+    RxData,
+    build_rx_data,
+    predict_path_loss,
+    _coord_dtype
+)
+
+
+def _cell_corners(cell_y, cell_x, size, num_rows, num_cols):
+    """
+    Coins (indices de grille) des cellules, tronqués au bord de la grille
+
+    Returns:
+        tuple: (y0, x0, y1, x1)
+    """
+    return (cell_y, cell_x,
+            np.minimum(cell_y + size, num_rows - 1),
+            np.minimum(cell_x + size, num_cols - 1))
+
+
+def _fill_cells(cells, size, path_loss, num_walls, free, evaluated):
+    """
+    Remplit l'intérieur des cellules acceptées par interpolation bilinéaire
+    de leurs quatre coins (seulement les points libres non évalués)
+    """
+    num_rows, num_cols = free.shape
+    y0, x0, y1, x1 = _cell_corners(cells[:, 0], cells[:, 1], size,
+                                   num_rows, num_cols)
+    offsets = np.arange(size + 1)
+    oy = offsets[None, :, None]
+    ox = offsets[None, None, :]
+    height = (y1 - y0)[:, None, None]
+    width = (x1 - x0)[:, None, None]
+    inside = (oy <= height) & (ox <= width)
+
+    fy = (oy / np.maximum(height, 1)).astype(np.float32)
+    fx = (ox / np.maximum(width, 1)).astype(np.float32)
+    iy = np.broadcast_to(y0[:, None, None] + oy, inside.shape)[inside]
+    ix = np.broadcast_to(x0[:, None, None] + ox, inside.shape)[inside]
+
+    def bilinear(grid):
+        c00 = grid[y0, x0][:, None, None]
+        c01 = grid[y0, x1][:, None, None]
+        c10 = grid[y1, x0][:, None, None]
+        c11 = grid[y1, x1][:, None, None]
+        value = ((1 - fy) * ((1 - fx) * c00 + fx * c01)
+                 + fy * ((1 - fx) * c10 + fx * c11))
+        return np.broadcast_to(value, inside.shape)[inside]
+
+    pl_values = bilinear(path_loss)
+    wall_values = bilinear(num_walls.astype(np.float32))
+
+    target = free[iy, ix] & ~evaluated[iy, ix]
+    path_loss[iy[target], ix[target]] = pl_values[target]
+    num_walls[iy[target], ix[target]] = np.rint(wall_values[target])
+
+
+def generate_adaptive_rx_data(binary_img, tx_x_px, tx_y_px, real_length_m,
+                              real_width_m, frequency_mhz, min_step, model,
+                              coarse_step=None, tolerance_db=2.0,
+                              wall_tolerance=0, wall_method='exact'):
+    """
+    Échantillonne la grille des récepteurs de façon adaptative (quadtree)
+
+    On part d'une grille grossière dont on évalue les coins des cellules.
+    Une cellule est subdivisée en quatre tant que l'écart de path loss entre
+    ses coins dépasse tolerance_db, que l'écart du nombre de murs dépasse
+    wall_tolerance, ou qu'un de ses coins tombe dans un mur, jusqu'à la
+    taille minimale min_step. La cellule qui contient le Tx et ses voisines
+    sont toujours subdivisées : leurs coins peuvent avoir des valeurs
+    proches alors que le path loss y passe par son minimum, que
+    l'interpolation bilinéaire aplatirait. Les points des cellules non subdivisées sont
+    remplis par interpolation bilinéaire de leurs coins, ce qui produit une
+    grille complète de pas min_step utilisable par l'interpolation et le
+    tracé existants.
+
+    Args:
+        binary_img: Image binaire du plan
+        tx_x_px: Position X du transmetteur en pixels
+        tx_y_px: Position Y du transmetteur en pixels
+        real_length_m: Longueur réelle en mètres
+        real_width_m: Largeur réelle en mètres
+        frequency_mhz: Fréquence en MHz
+        min_step: Taille minimale des cellules (pas de la grille finale)
+        model: Modèle ML entraîné
+        coarse_step: Taille des cellules initiales (par défaut 8 * min_step),
+            arrondie à min_step fois une puissance de deux
+        tolerance_db: Écart de path loss toléré entre les coins d'une cellule
+        wall_tolerance: Écart du nombre de murs toléré entre les coins
+        wall_method: Méthode de comptage des murs
+
+    Returns:
+        tuple: (rx_data, stats) - RxData avec path loss sur toute la grille
+        de pas min_step, et statistiques des évaluations du modèle
+    """
+    img_height, img_width = binary_img.shape
+    free = binary_img[::min_step, ::min_step] == 0
+    num_rows, num_cols = free.shape
+
+    if coarse_step is None:
+        coarse_step = 8 * min_step
+    levels = max(0, int(np.floor(np.log2(max(coarse_step // min_step, 1)))))
+    size = 2 ** levels
+
+    path_loss = np.full(free.shape, np.nan, dtype=np.float32)
+    num_walls = np.zeros(free.shape, dtype=np.int16)
+    evaluated = np.zeros(free.shape, dtype=bool)
+
+    def evaluate(iy, ix):
+        keep = free[iy, ix] & ~evaluated[iy, ix]
+        iy, ix = iy[keep], ix[keep]
+        if iy.size == 0:
+            return
+        # Supprimer les doublons (coins partagés entre cellules voisines)
+        flat = np.unique(iy.astype(np.int64) * num_cols + ix)
+        iy, ix = flat // num_cols, flat % num_cols
+        rx = build_rx_data(binary_img, tx_x_px, tx_y_px, ix * min_step,
+                           iy * min_step, real_length_m, real_width_m,
+                           frequency_mhz, min_step, wall_method)
+        rx = predict_path_loss(rx, model)
+        path_loss[iy, ix] = rx.path_loss
+        num_walls[iy, ix] = rx.num_walls
+        evaluated[iy, ix] = True
+
+    cell_y, cell_x = np.meshgrid(np.arange(0, num_rows - 1, size),
+                                 np.arange(0, num_cols - 1, size), indexing='ij')
+    cells = np.column_stack((cell_y.ravel(), cell_x.ravel()))
+    accepted = []
+    # Position du Tx en indices de la grille de pas min_step
+    tx_row, tx_col = tx_y_px / min_step, tx_x_px / min_step
+
+    if len(cells) == 0:
+        # Grille dégénérée (une seule ligne ou colonne) : évaluation uniforme
+        evaluate(*np.nonzero(free))
+
+    while size >= 1 and len(cells):
+        y0, x0, y1, x1 = _cell_corners(cells[:, 0], cells[:, 1], size,
+                                       num_rows, num_cols)
+        evaluate(np.concatenate((y0, y0, y1, y1)), np.concatenate((x0, x1, x0, x1)))
+
+        corner_pl = np.stack((path_loss[y0, x0], path_loss[y0, x1],
+                              path_loss[y1, x0], path_loss[y1, x1]))
+        corner_walls = np.stack((num_walls[y0, x0], num_walls[y0, x1],
+                                 num_walls[y1, x0], num_walls[y1, x1]))
+        corner_free = np.stack((free[y0, x0], free[y0, x1],
+                                free[y1, x0], free[y1, x1]))
+
+        with np.errstate(invalid='ignore'):
+            refine = ~corner_free.all(axis=0)
+            refine |= np.ptp(corner_pl, axis=0) > tolerance_db
+            refine |= np.ptp(corner_walls, axis=0) > wall_tolerance
+        # Cellule du Tx et ses voisines : raffinées jusqu'à la taille minimale
+        refine |= ((y0 - size <= tx_row) & (tx_row <= y1 + size)
+                   & (x0 - size <= tx_col) & (tx_col <= x1 + size))
+
+        if size == 1:
+            break
+
+        if (~refine).any():
+            accepted.append((cells[~refine], size))
+
+        # Subdiviser les cellules restantes en quatre
+        half = size // 2
+        parents = cells[refine]
+        children = np.concatenate([parents + (dy, dx)
+                                   for dy in (0, half) for dx in (0, half)])
+        keep = (children[:, 0] < num_rows - 1) & (children[:, 1] < num_cols - 1)
+        cells = children[keep]
+        size = half
+
+    for cell_block, cell_size in accepted:
+        _fill_cells(cell_block, cell_size, path_loss, num_walls, free, evaluated)
+
+    free_rows, free_cols = np.nonzero(free)
+    coord_dtype = _coord_dtype(img_width, img_height)
+    rx_x = (free_cols * min_step).astype(coord_dtype)
+    rx_y = (free_rows * min_step).astype(coord_dtype)
+
+    # Distances exactes pour tous les points (calcul vectorisé peu coûteux)
+    distance_px = np.sqrt((rx_x - float(tx_x_px))**2 + (rx_y - float(tx_y_px))**2)
+    distance_m = convert_distance_to_meters(
+        distance_px, real_length_m, real_width_m, img_width, img_height
+    )
+    distance_m = np.maximum(distance_m, 1e-6).astype(np.float32)
+
+    rx = RxData(rx_x, rx_y, distance_m, num_walls[free_rows, free_cols],
+                frequency_mhz, min_step, path_loss[free_rows, free_cols])
+
+    model_evaluations = int(evaluated.sum())
+    uniform_evaluations = int(free.sum())
+    stats = {
+        'model_evaluations': model_evaluations,
+        'uniform_evaluations': uniform_evaluations,
+        'saved_evaluations': uniform_evaluations - model_evaluations,
+        'saved_ratio': (1 - model_evaluations / uniform_evaluations
+                        if uniform_evaluations else 0.0),
+    }
+    return rx, stats
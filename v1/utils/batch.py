@@ -0,0 +1,385 @@
+# utils/batch.py
+"""
+Module pour la génération de heatmaps par lots (sans interface Streamlit)
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import matplotlib.pyplot as plt
+import numpy as np
+from config import PLAN_THRESHOLD
+from utils.chunked import decode_binary_plan, run_chunked_heatmap
+from utils.export import build_metadata, save_npz
+from utils.image_processing import read_upload_bytes
+from utils.pipeline import HeatmapPipeline, PipelineError, tx_positions_to_pixels
+from utils.plan_cache import make_plan_key
+from utils.rendering import encode_png
+
+
+RESULTS_FILENAME = 'results.jsonl'
+
+REQUIRED_FIELDS = ('plan', 'length_m', 'width_m', 'tx', 'frequency_mhz', 'step')
+
+
+class ManifestError(ValueError):
+    """Manifeste illisible ou incomplet"""
+
+
+def parse_tx_positions(value):
+    """
+    Convertit les positions Tx d'un manifeste en liste [(x_m, y_m), ...]
+
+    Args:
+        value: Liste JSON [[x, y], ...] ou texte CSV "x:y;x:y"
+
+    Returns:
+        list: Positions en mètres
+    """
+    if isinstance(value, str):
+        pairs = [item.split(':') for item in value.replace(',', '.').split(';')
+                 if item.strip()]
+    else:
+        pairs = value
+    positions = [(float(x), float(y)) for x, y in pairs]
+    if not positions:
+        raise ValueError("aucune position Tx")
+    return positions
+
+
+def _normalize_job(raw, index, base_dir):
+    """Valide une ligne du manifeste et la convertit en job"""
+    raw = {key.strip(): value for key, value in raw.items()
+           if key is not None and value not in (None, '')}
+    if 'tx' not in raw and 'tx_x_m' in raw and 'tx_y_m' in raw:
+        raw['tx'] = [[raw['tx_x_m'], raw['tx_y_m']]]
+
+    missing = [field for field in REQUIRED_FIELDS if field not in raw]
+    if missing:
+        raise ManifestError(f"job {index + 1} : champ(s) manquant(s) {', '.join(missing)}")
+
+    try:
+        plan = os.path.join(base_dir, os.path.expanduser(str(raw['plan'])))
+        return {
+            'id': str(raw.get('id', f'job{index + 1:04d}')),
+            'plan': os.path.normpath(plan),
+            'length_m': float(raw['length_m']),
+            'width_m': float(raw['width_m']),
+            'tx': parse_tx_positions(raw['tx']),
+            'frequency_mhz': float(raw['frequency_mhz']),
+            'step': int(raw['step']),
+            'wall_method': raw.get('wall_method', 'exact'),
+            'interpolation_method': raw.get('interpolation_method', 'lattice'),
+            'sampling': raw.get('sampling', 'uniform'),
+        }
+    except (TypeError, ValueError) as e:
+        raise ManifestError(f"job {index + 1} : {e}") from e
+
+
+def load_manifest(path):
+    """
+    Lit un manifeste de jobs au format CSV ou JSON
+
+    Colonnes (ou clés) : id (optionnel), plan, length_m, width_m, tx,
+    frequency_mhz, step, et optionnellement wall_method,
+    interpolation_method, sampling. En CSV, tx s'écrit "x:y;x:y" (ou deux
+    colonnes tx_x_m et tx_y_m) ; en JSON, [[x, y], ...]. Les chemins des
+    plans sont relatifs au dossier du manifeste.
+
+    Args:
+        path: Chemin du manifeste (.csv ou .json)
+
+    Returns:
+        list: Jobs validés, dans l'ordre du manifeste
+
+    Raises:
+        ManifestError: Fichier illisible, champ manquant ou id en double
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            if path.lower().endswith('.json'):
+                rows = json.load(f)
+                if isinstance(rows, dict):
+                    rows = rows.get('jobs', [])
+            else:
+                rows = list(csv.DictReader(f))
+    except (OSError, json.JSONDecodeError, csv.Error) as e:
+        raise ManifestError(f"Impossible de lire le manifeste : {e}") from e
+
+    jobs = [_normalize_job(row, index, base_dir) for index, row in enumerate(rows)]
+
+    seen = set()
+    for job in jobs:
+        if job['id'] in seen:
+            raise ManifestError(f"id de job en double : {job['id']}")
+        seen.add(job['id'])
+    return jobs
+
+
+def read_completed_jobs(output_dir):
+    """
+    Ids des jobs déjà terminés avec succès (reprise après interruption)
+
+    Un job est terminé si le journal des résultats le marque 'ok' et que
+    son fichier de sortie existe.
+
+    Returns:
+        set: Ids des jobs terminés
+    """
+    completed = set()
+    path = os.path.join(output_dir, RESULTS_FILENAME)
+    if not os.path.exists(path):
+        return completed
+
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Dernière ligne tronquée par un arrêt brutal
+            output = os.path.join(output_dir, record.get('output') or '')
+            if record.get('status') == 'ok' and os.path.isfile(output):
+                completed.add(record['id'])
+            else:
+                completed.discard(record.get('id'))
+    return completed
+
+
+def _atomic_save_npz(path, grid, rx_data, metadata):
+    """Écrit un .npz via un fichier temporaire (pas de fichier partiel)"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        save_npz(f, grid, rx_data, metadata)
+    os.replace(tmp_path, path)
+
+
+# Pipeline et prédicteur propres à chaque processus de calcul
+_worker_state = {}
+
+
+def _init_worker(predictor, cache_entries, model_version=None):
+    """Conserve le prédicteur (transmis une fois) et un pipeline par processus"""
+    _worker_state['predictor'] = predictor
+    _worker_state['model_version'] = model_version
+    _worker_state['pipeline'] = HeatmapPipeline(cache_entries)
+
+
+def _run_chunked_job(job, output_dir, predictor, memory_budget_mb):
+    """
+    Calcule un job par tuiles à mémoire bornée (très grands plans)
+
+    La grille est écrite directement dans <id>.npy (float32, relisible avec
+    np.load(path, mmap_mode='r')) et les métadonnées dans <id>.json.
+
+    Returns:
+        tuple: (fichier de sortie, nombre de récepteurs)
+    """
+    data = read_upload_bytes(job['plan'])
+    binary_img, error = decode_binary_plan(data)
+    if error:
+        raise PipelineError(error)
+    img_height, img_width = binary_img.shape
+    tx_positions_px = tx_positions_to_pixels(job['tx'], job['length_m'],
+                                             job['width_m'], img_width, img_height)
+
+    output = f"{job['id']}.npy"
+    path = os.path.join(output_dir, output)
+    result = run_chunked_heatmap(
+        binary_img, tx_positions_px, job['length_m'], job['width_m'],
+        job['frequency_mhz'], job['step'], predictor, out_path=path + '.tmp',
+        wall_method=job['wall_method'], memory_budget_mb=memory_budget_mb
+    )
+    del result.grid  # Fermer la projection avant de renommer le fichier
+
+    metadata = build_metadata(
+        make_plan_key(data, PLAN_THRESHOLD, 1), tx_positions_px, job['frequency_mhz'],
+        job['step'], _worker_state.get('model_version'), tx_positions_m=job['tx'],
+        job_id=job['id'], plan=job['plan'], real_length_m=job['length_m'],
+        real_width_m=job['width_m'], wall_method=job['wall_method'],
+        interpolation_method='lattice', sampling='uniform',
+        memory_budget_mb=memory_budget_mb, path_loss_range=result.path_loss_range
+    )
+    with open(os.path.join(output_dir, f"{job['id']}.json"), 'w',
+              encoding='utf-8') as f:
+        json.dump(metadata, f)
+    os.replace(path + '.tmp', path)
+    return output, result.receivers
+
+
+def run_job(job, output_dir, save_png=False, predictor=None, pipeline=None,
+            render_mode='raster', memory_budget_mb=None):
+    """
+    Exécute un job et écrit son résultat dans output_dir
+
+    Args:
+        job: Job validé (voir load_manifest)
+        output_dir: Dossier de sortie
+        save_png: Enregistrer aussi la figure en PNG
+        predictor: Objet exposant predict(X) (par défaut celui du processus)
+        pipeline: Pipeline à utiliser (par défaut celui du processus)
+        render_mode: 'raster' (rapide) ou 'matplotlib' (publication)
+        memory_budget_mb: Si renseigné, calcul par tuiles à mémoire bornée
+            (sortie <id>.npy, sans PNG ni récepteurs)
+
+    Returns:
+        dict: Enregistrement du résultat (statut, durée, étapes réutilisées)
+    """
+    predictor = predictor if predictor is not None else _worker_state['predictor']
+    pipeline = pipeline if pipeline is not None else _worker_state['pipeline']
+    record = {'id': job['id'], 'plan': job['plan'], 'status': 'error',
+              'output': None, 'seconds': None}
+    start = time.perf_counter()
+    try:
+        if memory_budget_mb is not None:
+            output, receivers = _run_chunked_job(job, output_dir, predictor,
+                                                 memory_budget_mb)
+            record.update(status='ok', output=output, receivers=receivers,
+                          reused_stages=[])
+            record['seconds'] = round(time.perf_counter() - start, 4)
+            return record
+
+        stats = {}
+        result = pipeline.run(
+            job['plan'], job['length_m'], job['width_m'], job['tx'],
+            job['frequency_mhz'], job['step'], predictor,
+            wall_method=job['wall_method'],
+            interpolation_method=job['interpolation_method'],
+            sampling=job['sampling'], render=save_png, render_mode=render_mode,
+            stats=stats
+        )
+
+        output = f"{job['id']}.npz"
+        metadata = build_metadata(
+            result.plan_key, result.tx_positions_px, job['frequency_mhz'],
+            job['step'], _worker_state.get('model_version'),
+            tx_positions_m=job['tx'], job_id=job['id'], plan=job['plan'],
+            real_length_m=job['length_m'], real_width_m=job['width_m'],
+            wall_method=job['wall_method'],
+            interpolation_method=job['interpolation_method'],
+            sampling=job['sampling']
+        )
+        _atomic_save_npz(os.path.join(output_dir, output), result.grid,
+                         result.rx_data, metadata)
+        if save_png:
+            png_path = os.path.join(output_dir, f"{job['id']}.png")
+            if render_mode == 'raster':
+                with open(png_path, 'wb') as f:
+                    f.write(encode_png(result.figure))
+            else:
+                result.figure.savefig(png_path, dpi=150, bbox_inches='tight')
+                plt.close(result.figure)
+
+        record.update(status='ok', output=output,
+                      receivers=len(result.rx_data),
+                      reused_stages=stats.get('reused_stages', []))
+    except PipelineError as e:
+        record['error'] = str(e)
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def run_batch(jobs, predictor, output_dir, workers=1, save_png=False,
+              resume=True, cache_entries=4, on_result=None, render_mode='raster',
+              model_version=None, memory_budget_mb=None):
+    """
+    Exécute les jobs par un pool de processus et journalise chaque résultat
+
+    Le prédicteur est transmis une seule fois à chaque processus. Les jobs
+    sont soumis au fil de l'eau (au plus deux par processus en attente) et
+    chaque résultat est ajouté au journal results.jsonl dès sa fin : après
+    un arrêt, une nouvelle exécution reprend aux jobs non terminés.
+
+    Args:
+        jobs: Liste des jobs (voir load_manifest)
+        predictor: Modèle ou objet exposant predict(X), sérialisable
+        output_dir: Dossier de sortie (créé si besoin)
+        workers: Nombre de processus
+        save_png: Enregistrer aussi la figure de chaque job en PNG
+        resume: Ignorer les jobs déjà terminés
+        cache_entries: Nombre de résultats conservés par étape du pipeline
+        on_result: Fonction optionnelle appelée avec chaque enregistrement
+        render_mode: Mode de rendu des PNG ('raster' ou 'matplotlib')
+        model_version: Empreinte du modèle enregistrée dans les métadonnées
+        memory_budget_mb: Budget mémoire par job pour le calcul par tuiles
+            (None = pipeline complet en mémoire)
+
+    Returns:
+        list: Enregistrements des jobs exécutés, dans l'ordre de fin
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    completed = read_completed_jobs(output_dir) if resume else set()
+    pending = [job for job in jobs if job['id'] not in completed]
+    records = []
+
+    with open(os.path.join(output_dir, RESULTS_FILENAME), 'a', encoding='utf-8') as log:
+        def record_result(record):
+            log.write(json.dumps(record) + '\n')
+            log.flush()
+            os.fsync(log.fileno())
+            records.append(record)
+            if on_result is not None:
+                on_result(record)
+
+        if workers <= 1:
+            _init_worker(predictor, cache_entries, model_version)
+            for job in pending:
+                record_result(run_job(job, output_dir, save_png,
+                                      render_mode=render_mode,
+                                      memory_budget_mb=memory_budget_mb))
+            return records
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(predictor, cache_entries,
+                                           model_version)) as executor:
+            jobs_iter = iter(pending)
+            in_flight = set()
+            while True:
+                for job in jobs_iter:
+                    in_flight.add(executor.submit(run_job, job, output_dir, save_png,
+                                                  render_mode=render_mode,
+                                                  memory_budget_mb=memory_budget_mb))
+                    if len(in_flight) >= 2 * workers:
+                        break
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record_result(future.result())
+
+    return records
+
+
+def format_summary(records, skipped=0):
+    """
+    Tableau récapitulatif des temps par job
+
+    Args:
+        records: Enregistrements retournés par run_batch
+        skipped: Nombre de jobs ignorés (déjà terminés)
+
+    Returns:
+        str: Tableau texte
+    """
+    lines = [f"{'job':<20} {'statut':<7} {'durée':>9} {'récepteurs':>11}  réutilisé"]
+    for record in records:
+        lines.append(
+            f"{record['id'][:20]:<20} {record['status']:<7} {record['seconds']:>8.2f}s "
+            f"{record.get('receivers', 0):>11}  "
+            f"{', '.join(record.get('reused_stages', [])) or record.get('error', '-')}"
+        )
+
+    ok = [r for r in records if r['status'] == 'ok']
+    total = sum(r['seconds'] for r in records)
+    lines.append(f"{len(ok)}/{len(records)} job(s) réussi(s), {skipped} déjà "
+                 f"terminé(s), {total:.2f}s de calcul cumulé")
+    if ok:
+        times = np.array([r['seconds'] for r in ok])
+        lines.append(f"durée par job : médiane {np.median(times):.2f}s, "
+                     f"max {times.max():.2f}s")
+    return '\n'.join(lines)
@@ -0,0 +1,230 @@
+# utils/chunked.py
+"""
+Module pour le calcul par tuiles, à mémoire bornée, des très grands plans
+"""
+
+import os
+import tempfile
+
+import cv2
+import numpy as np
+from config import PLAN_THRESHOLD
+from utils.jobs import check_cancelled
+from utils.path_loss_calculator import (
+    RxData,
+    compute_ap_geometry,
+    interpolate_lattice,
+    lattice_receivers,
+    predict_best_server,
+    predict_path_loss,
+    rx_to_lattice
+)
+
+
+# Coût mémoire approximatif (octets) des tableaux de travail
+BYTES_PER_RAY_SAMPLE = 72      # compute_LOS_and_walls_batch, par échantillon
+BYTES_PER_GRID_PIXEL = 48      # interpolate_lattice, par pixel d'une bande
+BYTES_PER_RECEIVER_AP = 64     # géométrie, caractéristiques et prédiction
+
+MIN_RAY_SAMPLES = 10_000
+
+
+class ChunkedHeatmap:
+    """
+    Résultat d'un calcul par tuiles
+
+    Attributes:
+        grid: Grille (hauteur, largeur) float32 du path loss, en mémoire
+            projetée (np.memmap), NaN aux murs
+        path: Fichier .npy contenant la grille
+        receivers: Nombre de récepteurs évalués
+        path_loss_range: (min, max) du path loss prédit, None sans récepteur
+        chunks: Découpage utilisé (voir plan_chunks)
+    """
+
+    def __init__(self, grid, path, receivers, path_loss_range, chunks):
+        self.grid = grid
+        self.path = path
+        self.receivers = receivers
+        self.path_loss_range = path_loss_range
+        self.chunks = chunks
+
+
+def plan_chunks(img_width, img_height, step, num_aps, memory_budget_mb):
+    """
+    Choisit la taille des tuiles pour respecter un budget mémoire
+
+    Le budget est partagé entre le lancer de rayons (moitié), les récepteurs
+    de deux tuiles consécutives (quart) et l'interpolation (quart). La carte
+    des murs (1 octet par pixel) et la grille de sortie, projetée sur
+    disque, ne sont pas comptées.
+
+    Args:
+        img_width: Largeur du plan en pixels
+        img_height: Hauteur du plan en pixels
+        step: Pas de la grille en pixels
+        num_aps: Nombre de points d'accès
+        memory_budget_mb: Budget mémoire de travail en Mo
+
+    Returns:
+        dict: tile_rows (lignes de nœuds par tuile), band_rows (lignes de
+        pixels par bande d'interpolation), max_samples (échantillons de
+        rayons par bloc), max_rows (lignes prédites par appel), num_tiles
+    """
+    budget = int(memory_budget_mb * 1024 * 1024)
+    nodes_per_row = -(-img_width // step)
+    num_rows = -(-img_height // step)
+
+    max_samples = max(MIN_RAY_SAMPLES, budget // 2 // BYTES_PER_RAY_SAMPLE)
+    receiver_bytes = budget // 4
+    tile_rows = max(1, receiver_bytes // 2
+                    // (nodes_per_row * BYTES_PER_RECEIVER_AP * max(num_aps, 1)))
+    tile_rows = min(tile_rows, num_rows)
+    band_rows = max(1, min(budget // 4 // (img_width * BYTES_PER_GRID_PIXEL),
+                           tile_rows * step))
+    max_rows = max(nodes_per_row, receiver_bytes // BYTES_PER_RECEIVER_AP)
+
+    return {
+        'tile_rows': int(tile_rows),
+        'band_rows': int(band_rows),
+        'max_samples': int(max_samples),
+        'max_rows': int(max_rows),
+        'num_tiles': -(-num_rows // tile_rows),
+    }
+
+
+def decode_binary_plan(data, threshold=PLAN_THRESHOLD):
+    """
+    Décode un plan directement en niveaux de gris et le binarise sur place
+
+    Contrairement à load_plan, aucune copie RGB n'est créée et l'image en
+    niveaux de gris n'est pas conservée : le pic mémoire est d'un octet par
+    pixel. OpenCV n'applique pas la limite anti « bombe de décompression »
+    de Pillow, qui refuse les plans de plus de ~180 Mpixels.
+
+    Args:
+        data: Octets bruts du fichier image
+        threshold: Seuil de binarisation (niveaux de gris)
+
+    Returns:
+        tuple: (binary_image, error_message)
+    """
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None, "Impossible de lire le fichier image."
+    if img.min() == img.max():
+        return None, "L'image du plan semble vide ou déjà binaire."
+    cv2.threshold(img, threshold, 1, cv2.THRESH_BINARY_INV, dst=img)
+    return img, None
+
+
+def _compute_tile(binary_img, tx_positions_px, node_start, node_stop,
+                  real_length_m, real_width_m, frequency_mhz, step, model,
+                  wall_method, chunks):
+    """Récepteurs d'une tuile de lignes de nœuds, avec path loss"""
+    rx_x, rx_y = lattice_receivers(binary_img, step, node_start, node_stop)
+    distances, walls = compute_ap_geometry(
+        binary_img, tx_positions_px, rx_x, rx_y, real_length_m, real_width_m,
+        wall_method, chunks['max_samples']
+    )
+    if len(tx_positions_px) == 1:
+        rx = RxData(rx_x, rx_y, distances[0], walls[0], frequency_mhz, step)
+        if rx.empty:
+            return rx.with_path_loss(np.empty(0, dtype=np.float32))
+        return predict_path_loss(rx, model)
+    return predict_best_server(rx_x, rx_y, distances, walls, frequency_mhz, step,
+                               model, chunks['max_rows'])
+
+
+def run_chunked_heatmap(binary_img, tx_positions_px, real_length_m, real_width_m,
+                        frequency_mhz, step, model, out_path=None,
+                        wall_method='exact', memory_budget_mb=512):
+    """
+    Calcule la grille du path loss tuile par tuile, à mémoire bornée
+
+    La grille des récepteurs est parcourue par tuiles de lignes de nœuds.
+    Chaque tuile calcule la géométrie (blocs de rayons bornés), la
+    prédiction et l'interpolation de ses lignes de pixels, avec une ligne
+    de nœuds de recouvrement (halo) vers la tuile suivante pour que
+    l'interpolation soit identique à celle de la grille complète. Le
+    résultat est écrit en float32, bande par bande, dans un fichier .npy
+    projeté en mémoire : aucun tableau pleine taille n'est alloué en
+    dehors de la carte des murs.
+
+    Args:
+        binary_img: Image binaire du plan
+        tx_positions_px: Liste des positions (x, y) des AP en pixels
+        real_length_m: Longueur réelle en mètres
+        real_width_m: Largeur réelle en mètres
+        frequency_mhz: Fréquence en MHz
+        step: Pas de la grille en pixels
+        model: Modèle ML (ou objet exposant predict(X))
+        out_path: Fichier .npy de sortie (None = fichier temporaire)
+        wall_method: Méthode de comptage des murs
+        memory_budget_mb: Budget mémoire de travail en Mo (voir plan_chunks)
+
+    Returns:
+        ChunkedHeatmap: Grille projetée en mémoire et statistiques
+    """
+    img_height, img_width = binary_img.shape
+    num_rows = -(-img_height // step)
+    chunks = plan_chunks(img_width, img_height, step, len(tx_positions_px),
+                         memory_budget_mb)
+
+    if out_path is None:
+        fd, out_path = tempfile.mkstemp(suffix='.npy', prefix='path_loss_')
+        os.close(fd)
+    grid = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32,
+                                     shape=(img_height, img_width))
+
+    receivers = 0
+    pl_min, pl_max = np.inf, -np.inf
+    halo = None
+    for node_start in range(0, num_rows, chunks['tile_rows']):
+        check_cancelled()
+        node_stop = min(node_start + chunks['tile_rows'], num_rows)
+
+        # Le halo est la première ligne de la tuile suivante : celle-ci est
+        # calculée dès maintenant et réutilisée au tour suivant
+        rx = halo if halo is not None else _compute_tile(
+            binary_img, tx_positions_px, node_start, node_stop, real_length_m,
+            real_width_m, frequency_mhz, step, model, wall_method, chunks
+        )
+        halo = None
+        if node_stop < num_rows:
+            halo = _compute_tile(
+                binary_img, tx_positions_px, node_stop,
+                min(node_stop + chunks['tile_rows'], num_rows), real_length_m,
+                real_width_m, frequency_mhz, step, model, wall_method, chunks
+            )
+
+        receivers += len(rx)
+        if len(rx):
+            pl_min = min(pl_min, float(rx.path_loss.min()))
+            pl_max = max(pl_max, float(rx.path_loss.max()))
+
+        # Nœuds de la tuile et premier rang de nœuds du halo
+        origin_y = node_start * step
+        lattice = rx_to_lattice(rx.rx_x, rx.rx_y.astype(np.int32) - origin_y,
+                                rx.path_loss, step, img_width,
+                                (node_stop - node_start + 1) * step)
+        if halo is None:
+            lattice = lattice[:-1]
+        elif len(halo):
+            first = halo.rx_y == node_stop * step
+            lattice[-1, halo.rx_x[first] // step] = halo.path_loss[first]
+
+        pixel_stop = img_height if node_stop == num_rows else node_stop * step
+        tile = grid[origin_y:pixel_stop]
+        interpolate_lattice(lattice, step, img_width, pixel_stop - origin_y,
+                            out=tile, band_rows=chunks['band_rows'])
+
+        # Masquer les murs bande par bande (pas de masque pleine taille)
+        for row in range(origin_y, pixel_stop, chunks['band_rows']):
+            row_stop = min(row + chunks['band_rows'], pixel_stop)
+            band = grid[row:row_stop]
+            band[binary_img[row:row_stop] == 1] = np.nan
+
+    grid.flush()
+    path_loss_range = (pl_min, pl_max) if receivers else None
+    return ChunkedHeatmap(grid, out_path, receivers, path_loss_range, chunks)
@@ -0,0 +1,250 @@
+# utils/export.py
+"""
+Module pour l'export des données brutes (grille interpolée et récepteurs)
+"""
+
+import io
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+EXPORT_VERSION = 1
+
+RX_CSV_COLUMNS = ('RX_x', 'RX_y', 'distance', 'num_walls', 'frequency',
+                  'Path_Loss_Predicted', 'Best_AP')
+
+
+def build_metadata(plan_key, tx_positions_px, frequency_mhz, step, model_version=None,
+                   tx_positions_m=None, **extra):
+    """
+    Métadonnées décrivant un résultat exporté
+
+    Args:
+        plan_key: Empreinte du plan (voir make_plan_key)
+        tx_positions_px: Positions [(x, y), ...] des AP en pixels
+        frequency_mhz: Fréquence en MHz (None pour un balayage, voir
+            frequencies_mhz dans extra)
+        step: Pas de la grille en pixels
+        model_version: Empreinte du fichier modèle
+        tx_positions_m: Positions [(x_m, y_m), ...] des AP en mètres
+        **extra: Paramètres supplémentaires (méthodes, dimensions...)
+
+    Returns:
+        dict: Métadonnées sérialisables en JSON
+    """
+    metadata = {
+        'export_version': EXPORT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'plan_hash': plan_key,
+        'tx_positions_px': [[int(x), int(y)] for x, y in tx_positions_px],
+        'tx_positions_m': ([[float(x), float(y)] for x, y in tx_positions_m]
+                           if tx_positions_m is not None else None),
+        'frequency_mhz': float(frequency_mhz) if frequency_mhz is not None else None,
+        'step': int(step),
+        'model_version': model_version,
+    }
+    metadata.update(extra)
+    return metadata
+
+
+def _target(path_or_file):
+    """Ouvre un chemin en écriture binaire, ou retourne le fichier tel quel"""
+    if isinstance(path_or_file, (str, os.PathLike)):
+        return open(path_or_file, 'wb'), True
+    return path_or_file, False
+
+
+def save_grid_npy(path_or_file, grid):
+    """
+    Enregistre la grille au format .npy float32 (C-contigu)
+
+    Le fichier peut être relu sans copie avec np.load(path, mmap_mode='r').
+
+    Args:
+        path_or_file: Chemin ou fichier binaire ouvert
+        grid: Grille (hauteur, largeur) du path loss
+    """
+    f, owned = _target(path_or_file)
+    try:
+        np.save(f, np.ascontiguousarray(grid, dtype=np.float32))
+    finally:
+        if owned:
+            f.close()
+
+
+def save_npz(path_or_file, grid, rx_data, metadata, compressed=True):
+    """
+    Enregistre grille, récepteurs et métadonnées dans une archive .npz
+
+    Tableaux : path_loss (grille float32), rx_x, rx_y, distance, num_walls,
+    rx_path_loss, best_ap (multi-WiFi uniquement) ; metadata (texte JSON).
+
+    Args:
+        path_or_file: Chemin ou fichier binaire ouvert
+        grid: Grille (hauteur, largeur) du path loss (None pour l'omettre)
+        rx_data: RxData des récepteurs avec path loss (None pour l'omettre)
+        metadata: Métadonnées (voir build_metadata)
+        compressed: Compresser l'archive
+    """
+    arrays = {'metadata': np.array(json.dumps(metadata))}
+    if grid is not None:
+        arrays['path_loss'] = np.ascontiguousarray(grid, dtype=np.float32)
+    if rx_data is not None:
+        arrays.update(rx_x=rx_data.rx_x, rx_y=rx_data.rx_y,
+                      distance=rx_data.distance, num_walls=rx_data.num_walls,
+                      rx_path_loss=rx_data.path_loss)
+        if rx_data.best_ap is not None:
+            arrays['best_ap'] = rx_data.best_ap
+
+    save = np.savez_compressed if compressed else np.savez
+    f, owned = _target(path_or_file)
+    try:
+        save(f, **arrays)
+    finally:
+        if owned:
+            f.close()
+
+
+def save_sweep_npz(path_or_file, sweep, metadata, compressed=True):
+    """
+    Enregistre un balayage en fréquence dans une archive .npz
+
+    Tableaux : path_loss (cube float32 fréquence x hauteur x largeur),
+    frequencies_mhz, rx_x, rx_y, rx_path_loss et best_ap (fréquence x
+    récepteur) ; metadata (texte JSON). Relu par load_npz.
+
+    Args:
+        path_or_file: Chemin ou fichier binaire ouvert
+        sweep: SweepResult du balayage
+        metadata: Métadonnées (voir build_metadata)
+        compressed: Compresser l'archive
+    """
+    arrays = {
+        'metadata': np.array(json.dumps(metadata)),
+        'path_loss': np.ascontiguousarray(sweep.cube, dtype=np.float32),
+        'frequencies_mhz': np.asarray(sweep.frequencies_mhz, dtype=np.float64),
+        'rx_x': sweep.rx_x,
+        'rx_y': sweep.rx_y,
+        'rx_path_loss': sweep.path_loss,
+        'best_ap': sweep.best_ap,
+    }
+    save = np.savez_compressed if compressed else np.savez
+    f, owned = _target(path_or_file)
+    try:
+        save(f, **arrays)
+    finally:
+        if owned:
+            f.close()
+
+
+def load_npz(path):
+    """
+    Relit une archive écrite par save_npz
+
+    Returns:
+        tuple: (tableaux, métadonnées)
+    """
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files if name != 'metadata'}
+        metadata = json.loads(str(data['metadata']))
+    return arrays, metadata
+
+
+def iter_rx_csv(rx_data, chunk_rows=65536):
+    """
+    Produit le CSV des récepteurs par morceaux, sans construire de DataFrame
+
+    Args:
+        rx_data: RxData des récepteurs avec path loss
+        chunk_rows: Nombre de lignes par morceau
+
+    Yields:
+        str: En-tête puis blocs de lignes
+    """
+    has_best_ap = rx_data.best_ap is not None
+    columns = RX_CSV_COLUMNS if has_best_ap else RX_CSV_COLUMNS[:-1]
+    yield ','.join(columns) + '\n'
+
+    frequency = f'{float(rx_data.frequency):g}'
+    for start in range(0, len(rx_data), chunk_rows):
+        stop = start + chunk_rows
+        fields = [rx_data.rx_x[start:stop].astype(str),
+                  rx_data.rx_y[start:stop].astype(str),
+                  np.char.mod('%.4f', rx_data.distance[start:stop]),
+                  rx_data.num_walls[start:stop].astype(str),
+                  np.full(min(stop, len(rx_data)) - start, frequency),
+                  np.char.mod('%.3f', rx_data.path_loss[start:stop])]
+        if has_best_ap:
+            fields.append(rx_data.best_ap[start:stop].astype(str))
+        rows = fields[0]
+        for field in fields[1:]:
+            rows = np.char.add(np.char.add(rows, ','), field)
+        yield '\n'.join(rows.tolist()) + '\n'
+
+
+def write_rx_csv(path_or_file, rx_data, chunk_rows=65536):
+    """
+    Écrit le CSV des récepteurs au fil de l'eau
+
+    Args:
+        path_or_file: Chemin ou fichier texte ouvert
+        rx_data: RxData des récepteurs avec path loss
+        chunk_rows: Nombre de lignes par morceau
+    """
+    if isinstance(path_or_file, (str, os.PathLike)):
+        with open(path_or_file, 'w', encoding='utf-8', newline='') as f:
+            f.writelines(iter_rx_csv(rx_data, chunk_rows))
+    else:
+        path_or_file.writelines(iter_rx_csv(rx_data, chunk_rows))
+
+
+def export_bytes(export_format, grid, rx_data, metadata):
+    """
+    Construit le contenu d'un export à la demande (un seul format à la fois)
+
+    Args:
+        export_format: 'npy', 'npz' ou 'csv'
+        grid: Grille (hauteur, largeur) du path loss
+        rx_data: RxData des récepteurs avec path loss
+        metadata: Métadonnées (voir build_metadata)
+
+    Returns:
+        bytes: Contenu du fichier
+    """
+    if export_format == 'csv':
+        return ''.join(iter_rx_csv(rx_data)).encode('utf-8')
+
+    buf = io.BytesIO()
+    if export_format == 'npy':
+        save_grid_npy(buf, grid)
+    elif export_format == 'npz':
+        save_npz(buf, grid, rx_data, metadata)
+    else:
+        raise ValueError(f"Format d'export inconnu : {export_format}")
+    return buf.getvalue()
+
+
+def export_sweep_bytes(export_format, sweep, metadata):
+    """
+    Construit le contenu de l'export d'un balayage en fréquence
+
+    Args:
+        export_format: 'npy' (cube seul) ou 'npz' (cube, récepteurs et
+            métadonnées)
+        sweep: SweepResult du balayage
+        metadata: Métadonnées (voir build_metadata)
+
+    Returns:
+        bytes: Contenu du fichier
+    """
+    buf = io.BytesIO()
+    if export_format == 'npy':
+        save_grid_npy(buf, sweep.cube)
+    elif export_format == 'npz':
+        save_sweep_npz(buf, sweep, metadata)
+    else:
+        raise ValueError(f"Format d'export inconnu pour un balayage : {export_format}")
+    return buf.getvalue()
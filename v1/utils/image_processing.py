@@ -3,9 +3,29 @@
 Module pour le traitement d'images et les calculs géométriques
 """
 
+import io
+import os
+
 import cv2
 import numpy as np
 from PIL import Image
+from config import LIMITS, PLAN_THRESHOLD
+from utils.instrumentation import count
+from utils.jobs import check_cancelled
+from utils.plan_cache import (
+    COLOR_PREVIEW_INDEX,
+    PlanEntry,
+    get_plan_cache,
+    make_plan_key,
+    plan_for_wall_map
+)
+
+
+# Nom de l'index de la carte des distances aux murs dans un PlanEntry
+WALL_DISTANCE_INDEX = 'wall_distance'
+
+# Écart maximal entre deux pixels arrondis, à distance égale des points réels
+_ROUNDING_SLACK = np.sqrt(2)
 
 
 def compute_LOS_and_walls_corrected(tx, rx, wall_map):
@@ -53,35 +73,526 @@ def compute_LOS_and_walls_corrected(tx, rx, wall_map):
     return los, wall_crossings
 
 
-def process_uploaded_image(uploaded_file):
+def _ray_sample_counts(tx, rx_points):
     """
-    Traite l'image uploadée et la convertit en carte binaire
+    Calcule le nombre d'échantillons de chaque rayon, comme dans
+    compute_LOS_and_walls_corrected
+
+    Args:
+        tx: Position du transmetteur (x, y)
+        rx_points: Tableau (N, 2) des positions des récepteurs (x, y)
+
+    Returns:
+        tuple: (dx, dy, num_points) sous forme de tableaux
+    """
+    dx = rx_points[:, 0] - float(tx[0])
+    dy = rx_points[:, 1] - float(tx[1])
+    distance = np.sqrt(dx**2 + dy**2)
+    num_points = np.maximum((distance * 2).astype(np.int64), 100)
+    return dx, dy, num_points
+
+
+def compute_LOS_and_walls_batch(tx, rx_points, wall_map, max_samples=4_000_000):
+    """
+    Calcule LOS et nombre de murs traversés pour un ensemble de récepteurs.
+
+    Version vectorisée de compute_LOS_and_walls_corrected : les rayons sont
+    échantillonnés de la même manière (mêmes points, même arrondi), tous les
+    échantillons d'un bloc sont lus dans wall_map en une seule indexation, puis
+    les fronts montants (entrée dans un mur) sont comptés par rayon. Les
+    résultats sont identiques à ceux de la version scalaire.
+
+    Args:
+        tx: Position du transmetteur (x, y)
+        rx_points: Tableau (N, 2) des positions des récepteurs (x, y)
+        wall_map: Carte binaire des murs
+        max_samples: Nombre maximal d'échantillons traités par bloc (mémoire)
+
+    Returns:
+        tuple: (has_LOS, wall_crossings) - tableaux bool et int32 de taille N
+    """
+    rx_points = np.asarray(rx_points, dtype=np.float64).reshape(-1, 2)
+    n_rays = rx_points.shape[0]
+    wall_crossings = np.zeros(n_rays, dtype=np.int32)
+    if n_rays == 0:
+        return wall_crossings == 0, wall_crossings
+
+    img_height, img_width = wall_map.shape
+    x1, y1 = float(tx[0]), float(tx[1])
+    dx, dy, num_points = _ray_sample_counts(tx, rx_points)
+
+    # Découper les rayons en blocs dont le total d'échantillons reste borné
+    cum_points = np.cumsum(num_points)
+    count('ray_samples', cum_points[-1])
+    start = 0
+    while start < n_rays:
+        check_cancelled()  # Un bloc de rayons est une tuile du calcul
+        budget = (cum_points[start - 1] if start > 0 else 0) + max_samples
+        stop = int(np.searchsorted(cum_points, budget, side='right'))
+        stop = min(max(stop, start + 1), n_rays)
+
+        counts = num_points[start:stop]
+        total = int(counts.sum())
+        ray_ids = np.repeat(np.arange(stop - start), counts)
+        offsets = np.cumsum(counts) - counts
+        k = np.arange(total, dtype=np.float64) - np.repeat(offsets, counts)
+
+        # Même calcul que np.linspace(x1, x2, num_points) pour chaque rayon
+        step_x = (dx[start:stop] / (counts - 1))[ray_ids]
+        step_y = (dy[start:stop] / (counts - 1))[ray_ids]
+        x_points = k * step_x + x1
+        y_points = k * step_y + y1
+        last = offsets + counts - 1
+        x_points[last] = rx_points[start:stop, 0]
+        y_points[last] = rx_points[start:stop, 1]
+
+        x_px = np.rint(x_points).astype(np.int64)
+        y_px = np.rint(y_points).astype(np.int64)
+        del x_points, y_points, k
+
+        # Les échantillons hors de l'image sont ignorés (considérés libres)
+        inside = (x_px >= 0) & (x_px < img_width) & (y_px >= 0) & (y_px < img_height)
+        is_wall = np.zeros(total, dtype=bool)
+        is_wall[inside] = wall_map[y_px[inside], x_px[inside]] == 1
+
+        # Front montant : mur courant et échantillon précédent libre
+        rising = is_wall.copy()
+        rising[1:] &= ~is_wall[:-1]
+        rising[offsets] = is_wall[offsets]
+        wall_crossings[start:stop] = np.bincount(
+            ray_ids, weights=rising, minlength=stop - start
+        ).astype(np.int32)
+
+        start = stop
+
+    # Tx et Rx confondus : LOS, aucun mur
+    same_point = (dx == 0) & (dy == 0)
+    wall_crossings[same_point] = 0
+
+    los = wall_crossings == 0
+    return los, wall_crossings
+
+
+def build_wall_distance_map(wall_map):
+    """
+    Carte des distances de chaque pixel libre au pixel de mur le plus proche
+
+    Transformée de distance euclidienne exacte, arrondie vers le bas et
+    bornée à 255 pixels (un octet par pixel, comme la carte des murs) :
+    chaque valeur est un minorant de la distance réelle. Vaut 0 sur les
+    murs.
+
+    Args:
+        wall_map: Carte binaire des murs
+
+    Returns:
+        np.ndarray: Distances uint8 (hauteur, largeur) en pixels (lecture seule)
+    """
+    free = (np.asarray(wall_map) != 1).astype(np.uint8)
+    distance = cv2.distanceTransform(free, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+    # Marge contre l'arrondi flottant avant la troncature
+    distance_map = np.clip(np.floor(distance - 1e-3), 0, 255).astype(np.uint8)
+    distance_map.flags.writeable = False
+    return distance_map
+
+
+def wall_distance_map(wall_map):
+    """
+    Carte des distances aux murs d'un plan en cache, construite une seule fois
+
+    La carte est un index du PlanEntry propriétaire de wall_map (voir
+    plan_for_wall_map) : elle est partagée par tous les AP, bandes et
+    générations du plan, et comptée dans la mémoire du cache des plans.
+
+    Args:
+        wall_map: Carte binaire des murs
+
+    Returns:
+        np.ndarray: Carte des distances (voir build_wall_distance_map), ou
+        None si wall_map n'appartient à aucun plan en cache
+    """
+    entry = plan_for_wall_map(wall_map)
+    if entry is None:
+        return None
+    return entry.get_index(WALL_DISTANCE_INDEX,
+                           lambda plan: build_wall_distance_map(plan.binary_img))
+
+
+def compute_LOS_and_walls_traced(tx, rx_points, wall_map, distance_map,
+                                 max_samples=4_000_000):
+    """
+    Calcule LOS et nombre de murs traversés en sautant l'espace libre
+
+    Les rayons ont les mêmes échantillons que compute_LOS_and_walls_batch,
+    mais seuls certains sont lus : depuis un échantillon arrondi au pixel q,
+    situé à une distance D (distance_map) du mur le plus proche, tous les
+    échantillons suivants à moins de D - sqrt(2) le long du rayon tombent
+    sur des pixels à moins de D de q (écart d'arrondi inclus), donc libres.
+    Le rayon avance ainsi d'un bond jusqu'au premier échantillon non
+    garanti (sphere tracing) et n'est échantillonné finement qu'à
+    l'approche et à la traversée des murs. Les échantillons sautés étant
+    libres, les fronts montants (et donc les résultats) sont identiques à
+    ceux de l'échantillonnage complet.
+
+    Tous les rayons d'un bloc avancent ensemble, un échantillon lu par
+    rayon et par itération ; les rayons terminés sont retirés.
+
+    Args:
+        tx: Position du transmetteur (x, y)
+        rx_points: Tableau (N, 2) des positions des récepteurs (x, y)
+        wall_map: Carte binaire des murs
+        distance_map: Carte des distances aux murs (voir wall_distance_map)
+        max_samples: Nombre maximal de rayons (donc d'échantillons lus par
+            itération) par bloc
+
+    Returns:
+        tuple: (has_LOS, wall_crossings) - tableaux bool et int32 de taille N
+    """
+    rx_points = np.asarray(rx_points, dtype=np.float64).reshape(-1, 2)
+    n_rays = rx_points.shape[0]
+    wall_crossings = np.zeros(n_rays, dtype=np.int32)
+    if n_rays == 0:
+        return wall_crossings == 0, wall_crossings
+
+    img_height, img_width = wall_map.shape
+    x1, y1 = float(tx[0]), float(tx[1])
+    dx, dy, num_points = _ray_sample_counts(tx, rx_points)
+    last = num_points - 1
+    step_x, step_y = dx / last, dy / last
+    spacing = np.hypot(step_x, step_y)
+
+    # Prochain échantillon à lire et état (mur ou non) du dernier lu
+    sample = np.zeros(n_rays, dtype=np.int64)
+    previous_wall = np.zeros(n_rays, dtype=bool)
+
+    # La mémoire de travail est proportionnelle au nombre de rayons actifs
+    # (un échantillon lu par rayon et par itération) : un bloc peut donc
+    # compter max_samples rayons
+    for start in range(0, n_rays, max_samples):
+        check_cancelled()  # Un bloc de rayons est une tuile du calcul
+        stop = min(start + max_samples, n_rays)
+
+        # Tx et Rx confondus : LOS, aucun mur (rayon non parcouru)
+        active = start + np.flatnonzero((dx[start:stop] != 0) | (dy[start:stop] != 0))
+        examined = 0
+        while active.size:
+            k = sample[active]
+            at_end = k == last[active]
+            # Même calcul que np.linspace(x1, x2, num_points)
+            x_points = k * step_x[active] + x1
+            y_points = k * step_y[active] + y1
+            x_points[at_end] = rx_points[active[at_end], 0]
+            y_points[at_end] = rx_points[active[at_end], 1]
+            x_px = np.rint(x_points).astype(np.int64)
+            y_px = np.rint(y_points).astype(np.int64)
+
+            # Les échantillons hors de l'image sont libres, sans saut
+            inside = (x_px >= 0) & (x_px < img_width) & (y_px >= 0) & (y_px < img_height)
+            x_px[~inside] = 0
+            y_px[~inside] = 0
+            is_wall = (wall_map[y_px, x_px] == 1) & inside
+            wall_crossings[active] += is_wall & ~previous_wall[active]
+            previous_wall[active] = is_wall
+            examined += active.size
+
+            # Bond jusqu'au premier échantillon dont la liberté n'est pas garantie
+            clearance = np.where(inside, distance_map[y_px, x_px], 0) - _ROUNDING_SLACK
+            jump = np.maximum(np.ceil(clearance / spacing[active]), 1).astype(np.int64)
+            following = np.minimum(k + jump, last[active])
+            following[at_end] = k[at_end] + 1
+            sample[active] = following
+            active = active[following <= last[active]]
+
+        count('ray_samples', examined)
+
+    los = wall_crossings == 0
+    return los, wall_crossings
+
+
+def compute_LOS_and_walls_exact(tx, rx_points, wall_map, max_samples=4_000_000,
+                                distance_map=None):
+    """
+    Comptage exact des murs, accéléré par la carte des distances si disponible
+
+    Avec une carte des distances (fournie ou index du plan en cache), les
+    rayons sautent l'espace libre (compute_LOS_and_walls_traced) ; sinon
+    (ex: carte des murs d'un calcul par tuiles, hors cache) tous les
+    échantillons sont lus (compute_LOS_and_walls_batch). Les résultats sont
+    identiques.
+
+    Returns:
+        tuple: (has_LOS, wall_crossings) - tableaux bool et int32 de taille N
+    """
+    if distance_map is None:
+        distance_map = wall_distance_map(wall_map)
+    if distance_map is None:
+        return compute_LOS_and_walls_batch(tx, rx_points, wall_map, max_samples)
+    return compute_LOS_and_walls_traced(tx, rx_points, wall_map, distance_map,
+                                        max_samples)
+
+
+def compute_walls_radial_sweep(tx, rx_points, wall_map, angular_resolution=None,
+                               radial_step=0.5, max_samples=4_000_000):
+    """
+    Calcule le nombre de murs traversés par balayage radial depuis le Tx.
+
+    Un seul faisceau de rayons est lancé depuis le transmetteur, à pas angulaire
+    constant, et le nombre de murs traversés est cumulé le long de chaque rayon.
+    Chaque récepteur lit ensuite sa valeur dans le rayon le plus proche de sa
+    direction, à l'échantillon le plus proche de sa distance. Le coût est de
+    l'ordre du nombre de pixels du disque couvert, indépendamment du nombre de
+    récepteurs.
+
+    Résolution angulaire : par défaut 1 / R_max radian, où R_max est la distance
+    (en pixels) du récepteur le plus éloigné, soit un écart d'au plus un pixel
+    entre deux rayons voisins à cette distance. Le résultat est une
+    approximation : un récepteur peut différer de la méthode exacte
+    (compute_LOS_and_walls_batch) lorsque son rayon frôle l'extrémité ou
+    l'angle d'un mur ; voir compare_wall_count_methods pour mesurer l'écart.
+
+    Args:
+        tx: Position du transmetteur (x, y)
+        rx_points: Tableau (N, 2) des positions des récepteurs (x, y)
+        wall_map: Carte binaire des murs
+        angular_resolution: Pas angulaire entre deux rayons en radians
+            (None = 1 / R_max)
+        radial_step: Pas d'échantillonnage le long des rayons en pixels
+        max_samples: Nombre maximal d'échantillons traités par bloc (mémoire)
+
+    Returns:
+        tuple: (has_LOS, wall_crossings) - tableaux bool et int32 de taille N
+    """
+    rx_points = np.asarray(rx_points, dtype=np.float64).reshape(-1, 2)
+    n_rays = rx_points.shape[0]
+    wall_crossings = np.zeros(n_rays, dtype=np.int32)
+    if n_rays == 0:
+        return wall_crossings == 0, wall_crossings
+
+    img_height, img_width = wall_map.shape
+    x1, y1 = float(tx[0]), float(tx[1])
+    dx = rx_points[:, 0] - x1
+    dy = rx_points[:, 1] - y1
+    distance = np.sqrt(dx**2 + dy**2)
+    max_distance = max(float(distance.max()), 1.0)
+
+    if angular_resolution is None:
+        angular_resolution = 1.0 / max_distance
+    num_angles = int(np.ceil(2 * np.pi / angular_resolution))
+    angles = np.arange(num_angles) * (2 * np.pi / num_angles)
+    radii = np.arange(int(np.ceil(max_distance / radial_step)) + 1) * radial_step
+
+    # Rayon et échantillon associés à chaque récepteur
+    theta = np.mod(np.arctan2(dy, dx), 2 * np.pi)
+    ray_index = np.rint(theta * num_angles / (2 * np.pi)).astype(np.int64) % num_angles
+    sample_index = np.minimum(np.rint(distance / radial_step).astype(np.int64),
+                              len(radii) - 1)
+
+    order = np.argsort(ray_index, kind='stable')
+    sorted_rays = ray_index[order]
+    rays_per_chunk = max(1, max_samples // len(radii))
+
+    for ray_start in range(0, num_angles, rays_per_chunk):
+        ray_stop = min(ray_start + rays_per_chunk, num_angles)
+        lo = np.searchsorted(sorted_rays, ray_start, side='left')
+        hi = np.searchsorted(sorted_rays, ray_stop, side='left')
+        if lo == hi:
+            continue
+        check_cancelled()
+
+        chunk_angles = angles[ray_start:ray_stop]
+        count('ray_samples', len(chunk_angles) * len(radii))
+        x_px = np.rint(x1 + np.outer(np.cos(chunk_angles), radii)).astype(np.int64)
+        y_px = np.rint(y1 + np.outer(np.sin(chunk_angles), radii)).astype(np.int64)
+
+        inside = (x_px >= 0) & (x_px < img_width) & (y_px >= 0) & (y_px < img_height)
+        is_wall = np.zeros(x_px.shape, dtype=bool)
+        is_wall[inside] = wall_map[y_px[inside], x_px[inside]] == 1
+        del x_px, y_px, inside
+
+        # Nombre cumulé de fronts montants le long de chaque rayon
+        rising = is_wall.copy()
+        rising[:, 1:] &= ~is_wall[:, :-1]
+        cumulative = np.cumsum(rising, axis=1, dtype=np.int32)
+
+        members = order[lo:hi]
+        wall_crossings[members] = cumulative[
+            ray_index[members] - ray_start, sample_index[members]
+        ]
+
+    # Tx et Rx confondus : LOS, aucun mur
+    wall_crossings[(dx == 0) & (dy == 0)] = 0
+
+    los = wall_crossings == 0
+    return los, wall_crossings
+
+
+WALL_COUNT_METHODS = {
+    'exact': compute_LOS_and_walls_exact,
+    'radial': compute_walls_radial_sweep,
+}
+
+
+def compute_wall_counts(tx, rx_points, wall_map, method='exact', max_samples=None):
+    """
+    Calcule le nombre de murs traversés avec la méthode choisie
+
+    Args:
+        tx: Position du transmetteur (x, y)
+        rx_points: Tableau (N, 2) des positions des récepteurs (x, y)
+        wall_map: Carte binaire des murs
+        method: Clé de WALL_COUNT_METHODS ('exact' ou 'radial')
+        max_samples: Nombre maximal d'échantillons par bloc (None = valeur
+            par défaut de la méthode)
+
+    Returns:
+        tuple: (has_LOS, wall_crossings) - tableaux bool et int32 de taille N
+    """
+    if method not in WALL_COUNT_METHODS:
+        raise ValueError(f"Méthode de comptage des murs inconnue: {method}")
+    if max_samples is not None:
+        return WALL_COUNT_METHODS[method](tx, rx_points, wall_map,
+                                          max_samples=max_samples)
+    return WALL_COUNT_METHODS[method](tx, rx_points, wall_map)
+
+
+def compare_wall_count_methods(tx, rx_points, wall_map, method='radial'):
+    """
+    Mesure l'écart d'une méthode de comptage par rapport à la méthode exacte
+
+    Args:
+        tx: Position du transmetteur (x, y)
+        rx_points: Tableau (N, 2) des positions des récepteurs (x, y)
+        wall_map: Carte binaire des murs
+        method: Méthode à évaluer (clé de WALL_COUNT_METHODS)
+
+    Returns:
+        dict: Taux d'accord exact, erreurs absolues moyenne et maximale
+    """
+    _, reference = compute_LOS_and_walls_batch(tx, rx_points, wall_map)
+    _, candidate = compute_wall_counts(tx, rx_points, wall_map, method)
+    if reference.size == 0:
+        return {'exact_match_rate': 1.0, 'mean_abs_error': 0.0, 'max_abs_error': 0}
+
+    abs_error = np.abs(candidate.astype(np.int64) - reference)
+    return {
+        'exact_match_rate': float(np.mean(abs_error == 0)),
+        'mean_abs_error': float(abs_error.mean()),
+        'max_abs_error': int(abs_error.max()),
+    }
+
+
+def read_upload_bytes(uploaded_file):
+    """
+    Lit le contenu brut d'un fichier uploadé sans consommer le flux
+    
+    Args:
+        uploaded_file: Fichier uploadé Streamlit, objet fichier, chemin ou octets
+        
+    Returns:
+        bytes: Contenu du fichier
+    """
+    if isinstance(uploaded_file, (bytes, bytearray)):
+        return bytes(uploaded_file)
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, 'rb') as f:
+            return f.read()
+    if hasattr(uploaded_file, 'getvalue'):
+        return uploaded_file.getvalue()
+    position = uploaded_file.tell()
+    uploaded_file.seek(0)
+    data = uploaded_file.read()
+    uploaded_file.seek(position)
+    return data
+
+
+def color_preview(rgb):
+    """
+    Aperçu en couleurs d'un plan, borné aux dimensions maximales du canvas
+
+    Seul cet aperçu est conservé avec le plan décodé : les vignettes en
+    couleurs du canvas en sont tirées sans garder l'image RGB complète.
+
+    Args:
+        rgb: Image RGB uint8 (hauteur, largeur, 3) du plan
+
+    Returns:
+        np.ndarray: Image RGB uint8 réduite par moyenne sur les surfaces
+        (lecture seule)
+    """
+    img_height, img_width = rgb.shape[:2]
+    size = (min(img_width, LIMITS["max_canvas_width"]),
+            min(img_height, LIMITS["max_canvas_height"]))
+    preview = cv2.resize(rgb, size, interpolation=cv2.INTER_AREA)
+    preview.flags.writeable = False
+    return preview
+
+
+def load_plan(uploaded_file, threshold=PLAN_THRESHOLD, use_cache=True):
+    """
+    Décode et binarise un plan, en réutilisant le cache de prétraitement
+    
+    Le cache est indexé par l'empreinte du contenu du fichier et les
+    paramètres de seuillage : les reruns Streamlit qui ne changent que la
+    fréquence ou la position du Tx ne décodent plus l'image.
     
     Args:
         uploaded_file: Fichier image uploadé
+        threshold: Seuil de binarisation (niveaux de gris)
+        use_cache: Utiliser le cache partagé du processus
         
     Returns:
-        tuple: (binary_image, original_image, error_message)
+        tuple: (plan_entry, error_message)
     """
     try:
+        data = read_upload_bytes(uploaded_file)
+        key = make_plan_key(data, threshold, 1)
+        cache = get_plan_cache() if use_cache else None
+        
+        entry = cache.get(key) if cache is not None else None
+        if entry is not None:
+            return entry, None
+        
         # Lire l'image
-        image = Image.open(uploaded_file)
-        img = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
+        image = Image.open(io.BytesIO(data))
+        rgb = np.array(image.convert('RGB'))
+        img = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
         
         # Vérifier si l'image est valide
         if img is None:
-            return None, None, "Impossible de lire le fichier image."
+            return None, "Impossible de lire le fichier image."
         
         # Binariser l'image
         if np.all(img == img[0,0]):
-            return None, None, "L'image du plan semble vide ou déjà binaire."
+            return None, "L'image du plan semble vide ou déjà binaire."
         
-        _, binary_img = cv2.threshold(img, 127, 1, cv2.THRESH_BINARY_INV)
+        _, binary_img = cv2.threshold(img, threshold, 1, cv2.THRESH_BINARY_INV)
         
-        return binary_img, img, None
+        entry = PlanEntry(key, binary_img, img)
+        entry.indexes[COLOR_PREVIEW_INDEX] = color_preview(rgb)
+        if cache is not None:
+            cache.put(entry)
+        return entry, None
         
     except Exception as e:
-        return None, None, f"Erreur lors du traitement de l'image: {str(e)}"
+        return None, f"Erreur lors du traitement de l'image: {str(e)}"
+
+
+def process_uploaded_image(uploaded_file, threshold=PLAN_THRESHOLD, use_cache=True):
+    """
+    Traite l'image uploadée et la convertit en carte binaire
+    
+    Args:
+        uploaded_file: Fichier image uploadé
+        threshold: Seuil de binarisation (niveaux de gris)
+        use_cache: Utiliser le cache de prétraitement partagé
+        
+    Returns:
+        tuple: (binary_image, original_image, error_message)
+    """
+    entry, error = load_plan(uploaded_file, threshold, use_cache)
+    if error:
+        return None, None, error
+    return entry.binary_img, entry.gray_img, None
 
 
 def convert_position_to_pixels(position_m, real_dimension_m, img_dimension_px):
@@ -0,0 +1,245 @@
+# utils/instrumentation.py
+"""
+Module pour la mesure des performances (temps, mémoire et compteurs par étape)
+"""
+
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+LOGGER_NAME = 'pathloss.performance'
+
+# Profiler actif du thread courant (voir Profiler.activate et count)
+_active = threading.local()
+
+# tracemalloc est global au processus : les étapes mesurées en cours (tous
+# threads confondus) sont comptées pour ne jamais l'arrêter ni remettre son
+# pic à zéro pendant la mesure d'une autre étape
+_tracing_lock = threading.Lock()
+_tracing = {'stages': 0, 'started_here': False}
+
+
+def active_profiler():
+    """Profiler actif du thread courant, ou None"""
+    return getattr(_active, 'profiler', None)
+
+
+@contextmanager
+def measure(name, status='miss'):
+    """
+    Mesure une étape avec le profiler actif du thread (sans effet sinon)
+
+    Args:
+        name: Nom de l'étape
+        status: État enregistré avec la mesure
+    """
+    profiler = active_profiler()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name, status):
+        yield
+
+
+def record(name, status):
+    """Enregistre une étape non exécutée dans le profiler actif du thread"""
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.record(name, status=status)
+
+
+def count(name, value=1):
+    """
+    Incrémente un compteur du profiler actif du thread (sans effet sinon)
+
+    Les fonctions de calcul signalent ainsi leur volume de travail
+    (échantillons de rayons, lignes prédites...) sans recevoir le profiler
+    en paramètre. Les calculs exécutés dans d'autres processus ne sont pas
+    comptés.
+
+    Args:
+        name: Nom du compteur
+        value: Valeur à ajouter
+    """
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.count(name, value)
+
+
+def _begin_tracing():
+    """
+    Début d'une étape mesurée : démarre tracemalloc si besoin
+
+    Returns:
+        int: Mémoire suivie au début de l'étape
+    """
+    with _tracing_lock:
+        if _tracing['stages'] == 0:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                _tracing['started_here'] = True
+        _tracing['stages'] += 1
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _end_tracing(baseline):
+    """
+    Fin d'une étape mesurée : arrête tracemalloc après la dernière étape
+
+    Returns:
+        int: Pic mémoire de l'étape au-delà de baseline
+    """
+    with _tracing_lock:
+        peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+        _tracing['stages'] -= 1
+        if _tracing['stages'] == 0 and _tracing['started_here']:
+            tracemalloc.stop()
+            _tracing['started_here'] = False
+        return peak_bytes
+
+
+class Profiler:
+    """
+    Mesure le temps et le pic mémoire de chaque étape d'une génération
+
+    Le pic mémoire est celui des allocations Python et NumPy suivies par
+    tracemalloc pendant l'étape, au-delà de la mémoire déjà allouée à son
+    début. tracemalloc étant global au processus, il est démarré par la
+    première étape mesurée et arrêté par la dernière, et son pic n'est
+    remis à zéro que si aucune autre étape n'est en cours : des
+    générations simultanées dans d'autres threads peuvent s'ajouter au pic,
+    mais ne l'annulent pas.
+
+    Attributes:
+        stages: Mesures des étapes, dans l'ordre (nom, secondes, pic en
+            octets, état)
+        counters: Compteurs de travail par nom
+        trace_memory: Mesurer le pic mémoire des étapes
+    """
+
+    def __init__(self, trace_memory=True):
+        self.stages = []
+        self.counters = {}
+        self.trace_memory = trace_memory
+        self.total_seconds = None
+
+    def count(self, name, value=1):
+        """Incrémente un compteur"""
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def record(self, name, seconds=0.0, peak_bytes=None, status='hit'):
+        """Enregistre une étape non exécutée (résultat réutilisé ou ignoré)"""
+        self.stages.append({'name': name, 'seconds': seconds,
+                            'peak_bytes': peak_bytes, 'status': status})
+
+    @contextmanager
+    def stage(self, name, status='miss'):
+        """
+        Mesure une étape exécutée dans le bloc
+
+        Args:
+            name: Nom de l'étape
+            status: État enregistré avec la mesure
+        """
+        if self.trace_memory:
+            baseline = _begin_tracing()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak_bytes = None
+            if self.trace_memory:
+                peak_bytes = _end_tracing(baseline)
+            self.record(name, seconds, peak_bytes, status)
+
+    @contextmanager
+    def activate(self):
+        """
+        Rend le profiler actif dans le thread (pour count) et mesure la
+        durée totale du bloc
+        """
+        previous = active_profiler()
+        _active.profiler = self
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_seconds = time.perf_counter() - start
+            _active.profiler = previous
+
+    def to_dict(self):
+        """
+        Mesures sérialisables en JSON
+
+        Returns:
+            dict: stages, counters, total_seconds et peak_bytes (maximum
+            des étapes)
+        """
+        peaks = [stage['peak_bytes'] for stage in self.stages
+                 if stage['peak_bytes'] is not None]
+        total = self.total_seconds
+        if total is None:
+            total = sum(stage['seconds'] for stage in self.stages)
+        return {
+            'stages': [dict(stage) for stage in self.stages],
+            'counters': dict(self.counters),
+            'total_seconds': total,
+            'peak_bytes': max(peaks) if peaks else None,
+        }
+
+
+def get_performance_logger(log_file=None):
+    """
+    Journal des mesures, une ligne JSON par génération
+
+    Le journal écrit sur la sortie d'erreur et, si log_file est fourni,
+    dans ce fichier (ajout) pour agréger les sessions.
+
+    Args:
+        log_file: Chemin du fichier journal (optionnel)
+
+    Returns:
+        logging.Logger: Journal configuré une seule fois par processus
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    if not logger.handlers:
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+        for handler in handlers:
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+    return logger
+
+
+def log_performance(profiler, event='heatmap_generation', logger=None, **context):
+    """
+    Écrit les mesures d'un profiler sur une ligne JSON
+
+    Args:
+        profiler: Profiler terminé
+        event: Nom de l'événement
+        logger: Journal à utiliser (par défaut get_performance_logger())
+        **context: Champs ajoutés à la ligne (paramètres, session...)
+
+    Returns:
+        dict: Enregistrement écrit
+    """
+    entry = {
+        'event': event,
+        'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        **context,
+        **profiler.to_dict(),
+    }
+    (logger or get_performance_logger()).info(json.dumps(entry, default=str))
+    return entry
@@ -0,0 +1,224 @@
+# utils/jobs.py
+"""
+Module pour l'exécution des générations en arrière-plan (annulation coopérative)
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Job exécuté par le thread courant (voir check_cancelled et current_job)
+_current = threading.local()
+
+
+class JobCancelled(Exception):
+    """Job abandonné à une frontière d'étape ou de tuile"""
+
+
+def current_job():
+    """Job exécuté par le thread courant, ou None"""
+    return getattr(_current, 'job', None)
+
+
+def check_cancelled():
+    """
+    Interrompt le calcul si le job du thread courant a été annulé
+
+    Appelée aux frontières d'étape (pipeline) et de tuile (bandes
+    parallèles, niveaux progressifs, tuiles du calcul par blocs, blocs de
+    rayons) : un job obsolète s'arrête au prochain point de contrôle. Sans
+    effet hors d'un job.
+
+    Raises:
+        JobCancelled: Le job courant a été annulé
+    """
+    job = current_job()
+    if job is not None and job.cancel_requested:
+        raise JobCancelled(f"Job {job.fingerprint[:12]} annulé.")
+
+
+def fingerprint(*parts):
+    """
+    Empreinte stable d'un jeu de paramètres
+
+    Args:
+        *parts: Valeurs sérialisables en JSON (tuples convertis en listes)
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class GenerationJob:
+    """
+    Poignée d'une génération soumise à l'exécuteur
+
+    Attributes:
+        fingerprint: Empreinte des paramètres de la génération
+        status: 'queued', 'running', 'done', 'error' ou 'cancelled'
+        value: Valeur retournée par la fonction (status 'done')
+        error: Exception levée (status 'error')
+        progress: Dernier état intermédiaire publié par le calcul (ex:
+            aperçu progressif), None sinon
+        cached: True si le résultat provient du cache des résultats
+        submitted_at: Horodatage de la soumission
+        seconds: Durée d'exécution une fois terminé
+    """
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.status = 'queued'
+        self.value = None
+        self.error = None
+        self.progress = None
+        self.cached = False
+        self.submitted_at = time.time()
+        self.seconds = None
+        self.cancel_requested = False
+        self._done = threading.Event()
+
+    def cancel(self):
+        """Demande l'arrêt du job au prochain point de contrôle"""
+        self.cancel_requested = True
+
+    def done(self):
+        """True si le job est terminé (résultat, erreur ou annulation)"""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Attend la fin du job
+
+        Returns:
+            bool: True si le job est terminé
+        """
+        return self._done.wait(timeout)
+
+    def _finish(self, status, value=None, error=None):
+        self.status, self.value, self.error = status, value, error
+        self._done.set()
+
+
+class GenerationExecutor:
+    """
+    Exécuteur des générations, partagé par toutes les sessions du processus
+
+    Les jobs s'exécutent dans un pool de threads (le pipeline et le modèle
+    restent partagés). Les valeurs des jobs terminés sont conservées par
+    empreinte de paramètres : soumettre à nouveau des paramètres déjà
+    calculés retourne immédiatement un job terminé.
+
+    Attributes:
+        cache_entries: Nombre de valeurs terminées conservées (LRU)
+    """
+
+    def __init__(self, workers=2, cache_entries=8):
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='pathloss-job')
+        self.cache_entries = cache_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, fingerprint):
+        """
+        Valeur terminée d'une empreinte
+
+        Returns:
+            tuple: (trouvée, valeur)
+        """
+        with self._lock:
+            if fingerprint not in self._results:
+                return False, None
+            self._results.move_to_end(fingerprint)
+            return True, self._results[fingerprint]
+
+    def _store(self, fingerprint, value):
+        """Conserve une valeur terminée et évince les plus anciennes"""
+        with self._lock:
+            self._results[fingerprint] = value
+            self._results.move_to_end(fingerprint)
+            while len(self._results) > self.cache_entries:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """Oublie les valeurs terminées"""
+        with self._lock:
+            self._results.clear()
+
+    def submit(self, fingerprint, fn, *args, cacheable=None, **kwargs):
+        """
+        Soumet une génération, ou la sert depuis le cache des résultats
+
+        Args:
+            fingerprint: Empreinte des paramètres (voir fingerprint)
+            fn: Fonction exécutée en arrière-plan avec args et kwargs
+            cacheable: Fonction optionnelle indiquant si une valeur peut être
+                conservée (par défaut toutes les valeurs)
+
+        Returns:
+            GenerationJob: Poignée du job
+        """
+        job = GenerationJob(fingerprint)
+        found, value = self.cached(fingerprint)
+        if found:
+            job.cached = True
+            job.seconds = 0.0
+            job._finish('done', value)
+            return job
+        self._executor.submit(self._run, job, fn, args, kwargs, cacheable)
+        return job
+
+    def _run(self, job, fn, args, kwargs, cacheable):
+        """Exécute un job dans un thread du pool"""
+        if job.cancel_requested:
+            job._finish('cancelled')
+            return
+        job.status = 'running'
+        _current.job = job
+        start = time.perf_counter()
+        value, error = None, None
+        try:
+            value = fn(*args, **kwargs)
+            status = 'done'
+        except JobCancelled:
+            status = 'cancelled'
+        except Exception as e:
+            status, error = 'error', e
+        finally:
+            _current.job = None
+        if status == 'done' and (cacheable is None or cacheable(value)):
+            self._store(job.fingerprint, value)
+        job.seconds = time.perf_counter() - start
+        job._finish(status, value, error)
+
+    def shutdown(self, wait=True):
+        """Arrête le pool (les jobs en cours se terminent)"""
+        self._executor.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_generation_executor(workers=2, cache_entries=8):
+    """
+    Retourne l'exécuteur partagé du processus
+
+    Args:
+        workers: Nombre de threads (à la création)
+        cache_entries: Nombre de résultats conservés (à la création)
+
+    Returns:
+        GenerationExecutor: Instance unique
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = GenerationExecutor(workers, cache_entries)
+        return _executor
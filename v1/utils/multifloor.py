@@ -0,0 +1,280 @@
+# utils/multifloor.py
+"""
+Module pour la prédiction multi-étages (bâtiment de plusieurs plans superposés)
+"""
+
+import os
+
+import numpy as np
+from utils.image_processing import convert_position_to_pixels, validate_tx_position
+from utils.instrumentation import count
+from utils.jobs import check_cancelled
+from utils.path_loss_calculator import (
+    MAX_ACCESS_POINTS,
+    RxData,
+    compute_ap_geometry,
+    interpolate_lattice,
+    lattice_receivers,
+    predict_best_server,
+    rx_to_lattice
+)
+
+
+class Floor:
+    """
+    Étage d'un bâtiment
+
+    Tous les étages partagent l'emprise réelle du bâtiment (longueur et
+    largeur en mètres) ; leurs plans peuvent avoir des résolutions
+    différentes.
+
+    Attributes:
+        plan: PlanEntry du plan de l'étage (voir load_plan)
+        height_m: Hauteur de l'étage (plancher à plancher) en mètres
+        slab_walls: Nombre de murs équivalents comptés pour traverser la
+            dalle entre cet étage et l'étage supérieur
+    """
+
+    def __init__(self, plan, height_m=3.0, slab_walls=1):
+        self.plan = plan
+        self.height_m = height_m
+        self.slab_walls = slab_walls
+
+
+class MultiFloorResult:
+    """
+    Résultat d'une prédiction multi-étages
+
+    Attributes:
+        rx_data: RxData de chaque étage (best_ap = indice dans la liste
+            complète des AP du bâtiment)
+        grids: Grille (hauteur, largeur) float32 du meilleur serveur de
+            chaque étage, à la résolution du niveau de calcul, NaN aux murs
+        factors: Facteur de réduction du niveau de calcul de chaque étage
+        elevations_m: Altitude du plancher de chaque étage
+        tx_positions_px: Positions (x, y) de chaque AP en pixels du plan de
+            son étage
+        rays: Rayons tracés (AP distincts en projection x récepteurs)
+        rows: Lignes prédites (AP x récepteurs, tous étages)
+    """
+
+    def __init__(self, rx_data, grids, factors, elevations_m, tx_positions_px,
+                 rays, rows):
+        self.rx_data = rx_data
+        self.grids = grids
+        self.factors = factors
+        self.elevations_m = elevations_m
+        self.tx_positions_px = tx_positions_px
+        self.rays = rays
+        self.rows = rows
+
+
+def floor_elevations(floors):
+    """
+    Altitude du plancher de chaque étage (le premier étage est à 0 m)
+
+    Returns:
+        np.ndarray: Altitudes float64 en mètres
+    """
+    heights = np.array([floor.height_m for floor in floors], dtype=np.float64)
+    return np.concatenate(([0.0], np.cumsum(heights[:-1])))
+
+
+def slabs_between(floors):
+    """
+    Murs équivalents des dalles traversées entre chaque paire d'étages
+
+    Returns:
+        np.ndarray: Tableau int (nb_étages, nb_étages) symétrique, nul sur
+        la diagonale
+    """
+    # Murs équivalents cumulés sous chaque étage
+    below = np.concatenate(([0], np.cumsum([floor.slab_walls for floor in floors[:-1]])))
+    return np.abs(below[:, None] - below[None, :]).astype(np.int16)
+
+
+def floor_receivers(plan, step):
+    """
+    Récepteurs d'un étage, construits une fois et conservés dans son entrée
+
+    Les deux colonnes sont empilées dans un seul tableau (2, nb_récepteurs),
+    compté par le budget mémoire du cache des plans.
+
+    Returns:
+        tuple: (rx_x, rx_y) de la grille de pas step (vues de l'index)
+    """
+    def build(entry):
+        receivers = np.stack(lattice_receivers(entry.binary_img, step))
+        receivers.flags.writeable = False
+        return receivers
+
+    rx_x, rx_y = plan.get_index(f'receivers{step}', build)
+    return rx_x, rx_y
+
+
+def _project_aps(aps, real_length_m, real_width_m, img_width, img_height):
+    """
+    Projette les AP de tous les étages sur le plan d'un étage
+
+    Returns:
+        tuple: (positions (x, y) distinctes en pixels, indice de la position
+        de chaque AP)
+    """
+    positions = np.array([
+        (convert_position_to_pixels(x_m, real_length_m, img_width),
+         convert_position_to_pixels(y_m, real_width_m, img_height))
+        for _, x_m, y_m in aps
+    ], dtype=np.int64).reshape(-1, 2)
+    unique, inverse = np.unique(positions, axis=0, return_inverse=True)
+    return [(int(x), int(y)) for x, y in unique], inverse.reshape(-1)
+
+
+def _floor_best_server(plan, rx_x, rx_y, projected, inverse, dz_m, slabs,
+                       real_length_m, real_width_m, frequency_mhz, step, model,
+                       wall_method, max_rows):
+    """
+    Meilleur serveur des récepteurs d'un étage, par tuiles de récepteurs
+
+    Chaque tuile compte les murs une seule fois par position distincte des
+    AP projetés, puis les distances et murs de chaque AP en sont déduits
+    (distance 3D, dalles ajoutées) et tous les AP sont prédits en un appel.
+
+    Returns:
+        tuple: (RxData, rayons tracés)
+    """
+    num_aps = len(inverse)
+    tile = max(1, max_rows // num_aps)
+    parts = []
+    rays = 0
+    dz_sq = (np.asarray(dz_m, dtype=np.float32) ** 2)[:, None]
+    for start in range(0, len(rx_x), tile):
+        check_cancelled()
+        tile_x, tile_y = rx_x[start:start + tile], rx_y[start:start + tile]
+        planar, walls = compute_ap_geometry(plan.binary_img, projected, tile_x, tile_y,
+                                            real_length_m, real_width_m, wall_method)
+        rays += planar.size
+        distances = np.sqrt(planar[inverse] ** 2 + dz_sq)
+        walls = walls[inverse] + slabs[:, None]
+        parts.append(predict_best_server(tile_x, tile_y, distances, walls,
+                                         frequency_mhz, step, model, max_rows))
+
+    if not parts:
+        empty = np.empty(0, dtype=np.float32)
+        return RxData(rx_x, rx_y, empty, empty.astype(np.int16), frequency_mhz, step,
+                      empty, empty.astype(np.int8)), rays
+    return RxData(
+        rx_x, rx_y,
+        np.concatenate([rx.distance for rx in parts]),
+        np.concatenate([rx.num_walls for rx in parts]),
+        frequency_mhz, step,
+        np.concatenate([rx.path_loss for rx in parts]),
+        np.concatenate([rx.best_ap for rx in parts])
+    ), rays
+
+
+def run_multifloor(floors, aps, real_length_m, real_width_m, frequency_mhz, step,
+                   model, wall_method='exact', pyramid=True, max_rows=2_000_000,
+                   out_dir=None):
+    """
+    Prédit le meilleur serveur de chaque étage d'un bâtiment
+
+    Chaque récepteur de chaque étage est évalué contre chaque AP du
+    bâtiment. La distance est la distance 3D entre les planchers des deux
+    étages (même hauteur d'antenne au-dessus du plancher) ; les murs sont
+    ceux du plan de l'étage du récepteur le long de la projection
+    horizontale du trajet, plus les murs équivalents des dalles traversées.
+    Entre deux étages, seuls les murs de l'étage du récepteur sont donc
+    comptés (modèle multi-murs usuel) ; sur un même étage, le calcul est
+    celui du pipeline 2D.
+
+    Les étages sont traités un par un et leurs récepteurs par tuiles d'au
+    plus max_rows lignes (AP x récepteurs) : la mémoire de travail ne
+    dépend ni du nombre d'étages ni de la taille du bâtiment. Pour chaque
+    étage, le niveau de pyramide et la grille des récepteurs sont
+    construits une fois (index du PlanEntry) et réutilisés pour tous les
+    AP ; les AP superposés (même position projetée) partagent un seul
+    tracé de rayons, et tous les AP d'une tuile sont prédits en un appel.
+
+    Args:
+        floors: Liste des étages (Floor), du plus bas au plus haut
+        aps: Liste des AP [(indice_étage, x_m, y_m), ...]
+        real_length_m: Longueur réelle du bâtiment en mètres
+        real_width_m: Largeur réelle du bâtiment en mètres
+        frequency_mhz: Fréquence en MHz
+        step: Pas de la grille en pixels du plan de chaque étage
+        model: Modèle ML (ou objet exposant predict(X))
+        wall_method: Méthode de comptage des murs
+        pyramid: Calculer sur le niveau de pyramide adapté au pas (voir
+            PlanEntry.level_for_step) au lieu de la pleine résolution
+        max_rows: Nombre maximal de lignes prédites par appel
+        out_dir: Répertoire optionnel où projeter les grilles en mémoire
+            (fichiers floor_XX.npy) au lieu de les garder en RAM
+
+    Returns:
+        MultiFloorResult: Grilles et récepteurs de chaque étage
+
+    Raises:
+        ValueError: Bâtiment sans étage ou sans AP, ou AP hors du bâtiment
+    """
+    if not floors:
+        raise ValueError("Le bâtiment ne contient aucun étage.")
+    if not aps:
+        raise ValueError("Aucun point d'accès n'est défini.")
+    if len(aps) > MAX_ACCESS_POINTS:
+        raise ValueError(f"Trop de points d'accès ({MAX_ACCESS_POINTS} au maximum).")
+
+    ap_floors = np.array([int(floor) for floor, _, _ in aps])
+    if ap_floors.min() < 0 or ap_floors.max() >= len(floors):
+        raise ValueError("Un point d'accès est placé sur un étage inexistant.")
+
+    tx_positions_px = []
+    for floor, x_m, y_m in aps:
+        img_height, img_width = floors[floor].plan.binary_img.shape
+        position = (convert_position_to_pixels(x_m, real_length_m, img_width),
+                    convert_position_to_pixels(y_m, real_width_m, img_height))
+        if not validate_tx_position(*position, img_width, img_height):
+            raise ValueError("La position Tx est hors des limites de l'image.")
+        tx_positions_px.append(position)
+
+    elevations = floor_elevations(floors)
+    slabs = slabs_between(floors)
+    rx_data, grids, factors = [], [], []
+    rays = rows = 0
+    for index, floor in enumerate(floors):
+        check_cancelled()
+        plan = floor.plan.level_for_step(step) if pyramid else floor.plan
+        level_step = step // plan.factor
+        img_height, img_width = plan.binary_img.shape
+        rx_x, rx_y = floor_receivers(plan, level_step)
+        projected, inverse = _project_aps(aps, real_length_m, real_width_m,
+                                          img_width, img_height)
+
+        rx, floor_rays = _floor_best_server(
+            plan, rx_x, rx_y, projected, inverse,
+            elevations[index] - elevations[ap_floors], slabs[index, ap_floors],
+            real_length_m, real_width_m, frequency_mhz, level_step, model,
+            wall_method, max_rows
+        )
+        rays += floor_rays
+        rows += len(rx) * len(aps)
+        count('multifloor_rays', floor_rays)
+
+        out = None
+        if out_dir is not None:
+            out = np.lib.format.open_memmap(
+                os.path.join(out_dir, f'floor_{index:02d}.npy'), mode='w+',
+                dtype=np.float32, shape=(img_height, img_width)
+            )
+        lattice = rx_to_lattice(rx.rx_x, rx.rx_y, rx.path_loss, level_step,
+                                img_width, img_height)
+        grid = interpolate_lattice(lattice, level_step, img_width, img_height, out=out)
+        grid[plan.binary_img == 1] = np.nan
+        if out is not None:
+            grid.flush()
+
+        rx_data.append(rx)
+        grids.append(grid)
+        factors.append(plan.factor)
+
+    return MultiFloorResult(rx_data, grids, factors, elevations, tx_positions_px,
+                            rays, rows)
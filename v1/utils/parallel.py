@@ -0,0 +1,429 @@
+# utils/parallel.py
+"""
+Module pour l'exécution parallèle (multi-cœurs) du calcul par bandes de la grille
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+from utils.image_processing import WALL_DISTANCE_INDEX, wall_distance_map
+from utils.jobs import JobCancelled, check_cancelled
+from utils.path_loss_calculator import (
+    RxData,
+    compute_ap_geometry,
+    lattice_receivers,
+    predict_best_server,
+    predict_path_loss
+)
+from utils.plan_cache import PlanEntry
+
+
+# État propre à chaque processus de calcul (initialisé une seule fois)
+_worker_state = {}
+
+# Pool gardé en vie entre les appels (voir _shared_pool)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(shm_name, shape, dtype, model, with_distance_map=False):
+    """
+    Initialise un processus de calcul : attache la carte des murs en mémoire
+    partagée et conserve le modèle pour toutes les tâches du processus
+
+    Si le segment contient aussi la carte des distances aux murs du plan,
+    la carte des murs est enveloppée dans un PlanEntry qui la porte en
+    index : le comptage exact des murs la retrouve (voir wall_distance_map)
+    sans la reconstruire dans chaque processus.
+    """
+    # Le segment est libéré par le processus principal (unlink) à la fin du calcul
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state['shm'] = shm
+    binary_img = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _worker_state['binary_img'] = binary_img
+    _worker_state['model'] = model
+    if with_distance_map:
+        distance_map = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf,
+                                  offset=binary_img.nbytes)
+        # Pas d'image en niveaux de gris dans les processus de calcul
+        plan = PlanEntry(f'shared:{shm_name}', binary_img, binary_img)
+        plan.indexes[WALL_DISTANCE_INDEX] = distance_map
+        _worker_state['plan'] = plan
+
+
+def _geometry_band(row_start, row_stop, tx_positions_px, real_length_m,
+                   real_width_m, step, wall_method):
+    """
+    Calcule la géométrie (distances, murs) d'une bande de la grille
+
+    Returns:
+        tuple: (rx_x, rx_y, distances, walls)
+    """
+    binary_img = _worker_state['binary_img']
+    rx_x, rx_y = lattice_receivers(binary_img, step, row_start, row_stop)
+    distances, walls = compute_ap_geometry(binary_img, tx_positions_px, rx_x, rx_y,
+                                           real_length_m, real_width_m, wall_method)
+    return rx_x, rx_y, distances, walls
+
+
+def _ap_geometry_group(tx_positions_px, rx_x, rx_y, real_length_m, real_width_m,
+                       wall_method):
+    """
+    Calcule la géométrie d'un groupe d'AP vers tous les récepteurs
+
+    Returns:
+        tuple: (distances, walls) du groupe
+    """
+    return compute_ap_geometry(_worker_state['binary_img'], tx_positions_px, rx_x,
+                               rx_y, real_length_m, real_width_m, wall_method)
+
+
+def predict_geometry(rx_x, rx_y, distances, walls, frequency_mhz, step, model):
+    """
+    Prédit le path loss d'un AP, ou du meilleur serveur s'il y en a plusieurs
+
+    Args:
+        rx_x: Positions X des récepteurs en pixels
+        rx_y: Positions Y des récepteurs en pixels
+        distances: Tableau (nb_AP, nb_récepteurs) des distances en mètres
+        walls: Tableau (nb_AP, nb_récepteurs) des murs traversés
+        frequency_mhz: Fréquence en MHz
+        step: Pas de la grille en pixels
+        model: Modèle ML (ou objet exposant predict(X))
+
+    Returns:
+        RxData: Récepteurs avec path loss
+    """
+    if len(distances) == 1:
+        rx = RxData(rx_x, rx_y, distances[0], walls[0], frequency_mhz, step)
+        return predict_path_loss(rx, model)
+    return predict_best_server(rx_x, rx_y, distances, walls, frequency_mhz, step,
+                               model)
+
+
+def _predict_tile(rx_x, rx_y, distances, walls, frequency_mhz, step):
+    """
+    Prédit une tuile de récepteurs avec le modèle du processus
+
+    Returns:
+        tuple: Colonnes (path_loss, best_ap)
+    """
+    rx = predict_geometry(rx_x, rx_y, distances, walls, frequency_mhz, step,
+                          _worker_state['model'])
+    return rx.path_loss, rx.best_ap
+
+
+def run_parallel_prediction(binary_img, rx_x, rx_y, distances, walls, frequency_mhz,
+                            step, model, workers=None, tile_rows=64):
+    """
+    Prédit le path loss d'une géométrie déjà calculée sur plusieurs cœurs
+
+    Les récepteurs sont découpés en tuiles de tile_rows lignes de la grille,
+    prédites par le pool de processus de la géométrie (voir _shared_pool) :
+    le modèle n'est transmis qu'une fois à chaque processus, à sa création,
+    et seules les distances et murs de la tuile sont envoyés par tâche. Les
+    tuiles sont recollées dans l'ordre : le résultat est identique à celui
+    du calcul série (predict_geometry).
+
+    Args:
+        binary_img: Image binaire du plan (identifie le pool à réutiliser)
+        rx_x: Positions X des récepteurs en pixels
+        rx_y: Positions Y des récepteurs en pixels
+        distances: Tableau (nb_AP, nb_récepteurs) des distances en mètres
+        walls: Tableau (nb_AP, nb_récepteurs) des murs traversés
+        frequency_mhz: Fréquence en MHz
+        step: Pas de la grille en pixels
+        model: Modèle ML (ou objet exposant predict(X)), sérialisable
+        workers: Nombre de processus (None = nombre de cœurs)
+        tile_rows: Nombre de lignes de la grille par tâche
+
+    Returns:
+        RxData: Récepteurs avec path loss (et best_ap s'il y a plusieurs AP)
+    """
+    workers = workers or os.cpu_count() or 1
+    tile = tile_rows * -(-binary_img.shape[1] // step)
+    if workers == 1 or len(rx_x) <= tile:
+        return predict_geometry(rx_x, rx_y, distances, walls, frequency_mhz, step,
+                                model)
+
+    with _shared_pool(binary_img, workers, model) as executor:
+        futures = [executor.submit(_predict_tile, rx_x[start:start + tile],
+                                   rx_y[start:start + tile],
+                                   distances[:, start:start + tile],
+                                   walls[:, start:start + tile], frequency_mhz, step)
+                   for start in range(0, len(rx_x), tile)]
+        tiles = _collect(futures)
+
+    path_loss, best_ap = zip(*tiles)
+    if len(distances) == 1:
+        rx = RxData(rx_x, rx_y, distances[0], walls[0], frequency_mhz, step)
+        return rx.with_path_loss(np.concatenate(path_loss))
+    best_ap = np.concatenate(best_ap)
+    rows = np.arange(len(rx_x))
+    return RxData(rx_x, rx_y, distances[best_ap, rows], walls[best_ap, rows],
+                  frequency_mhz, step, np.concatenate(path_loss), best_ap)
+
+
+def run_parallel_geometry(binary_img, tx_positions_px, real_length_m, real_width_m,
+                          step, wall_method='exact', workers=None, tile_rows=64,
+                          model=None):
+    """
+    Calcule la géométrie de toute la grille (sans prédiction) sur plusieurs cœurs
+
+    La grille des récepteurs est découpée en bandes de tile_rows lignes de
+    nœuds, traitées par un pool de processus. La carte des murs est copiée
+    une seule fois en mémoire partagée (aucune sérialisation par tâche) et
+    les bandes sont recollées dans l'ordre. Le modèle, s'il est fourni, est
+    transmis aux processus pour que la prédiction qui suit
+    (run_parallel_prediction) réutilise le même pool.
+
+    Args:
+        binary_img: Image binaire du plan
+        tx_positions_px: Liste des positions (x, y) des AP en pixels
+        real_length_m: Longueur réelle en mètres
+        real_width_m: Largeur réelle en mètres
+        step: Pas de la grille en pixels
+        wall_method: Méthode de comptage des murs
+        workers: Nombre de processus (None = nombre de cœurs)
+        tile_rows: Nombre de lignes de la grille par tâche
+        model: Modèle de la prédiction qui suivra (optionnel)
+
+    Returns:
+        tuple: (rx_x, rx_y, distances, walls) - distances et murs de forme
+        (nb_AP, nb_récepteurs), identiques au calcul série
+    """
+    workers = workers or os.cpu_count() or 1
+    num_rows = -(-binary_img.shape[0] // step)
+    band_args = (tx_positions_px, real_length_m, real_width_m, step, wall_method)
+
+    if workers == 1:
+        rx_x, rx_y = lattice_receivers(binary_img, step)
+        distances, walls = compute_ap_geometry(binary_img, tx_positions_px, rx_x,
+                                               rx_y, real_length_m, real_width_m,
+                                               wall_method)
+        return rx_x, rx_y, distances, walls
+
+    with _shared_pool(binary_img, workers, model) as executor:
+        futures = [executor.submit(_geometry_band, start, start + tile_rows,
+                                   *band_args)
+                   for start in range(0, num_rows, tile_rows)]
+        bands = _collect(futures)
+
+    rx_x, rx_y, distances, walls = zip(*bands)
+    return (np.concatenate(rx_x), np.concatenate(rx_y),
+            np.concatenate(distances, axis=1), np.concatenate(walls, axis=1))
+
+
+def _collect(futures):
+    """
+    Résultats des bandes dans l'ordre, avec un point d'annulation par bande
+
+    Si le job courant est annulé, les bandes non démarrées sont abandonnées.
+    """
+    results = []
+    for future in futures:
+        try:
+            check_cancelled()
+        except JobCancelled:
+            for pending in futures:
+                pending.cancel()
+            raise
+        results.append(future.result())
+    return results
+
+
+def run_parallel_ap_geometry(binary_img, tx_positions_px, rx_x, rx_y, real_length_m,
+                             real_width_m, wall_method='exact', workers=None,
+                             aps_per_task=8):
+    """
+    Calcule la géométrie de nombreux AP vers les mêmes récepteurs sur plusieurs cœurs
+
+    Les AP sont répartis par groupes de aps_per_task entre les processus
+    (carte des murs en mémoire partagée) ; utilisé pour évaluer en une
+    fois tous les emplacements candidats d'un placement automatique.
+
+    Args:
+        binary_img: Image binaire du plan
+        tx_positions_px: Liste des positions (x, y) des AP en pixels
+        rx_x: Positions X des récepteurs en pixels
+        rx_y: Positions Y des récepteurs en pixels
+        real_length_m: Longueur réelle en mètres
+        real_width_m: Largeur réelle en mètres
+        wall_method: Méthode de comptage des murs
+        workers: Nombre de processus (None = nombre de cœurs)
+        aps_per_task: Nombre d'AP par tâche
+
+    Returns:
+        tuple: (distances, walls) de forme (nb_AP, nb_récepteurs), identiques
+        au calcul série (voir compute_ap_geometry)
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tx_positions_px) <= aps_per_task:
+        return compute_ap_geometry(binary_img, tx_positions_px, rx_x, rx_y,
+                                   real_length_m, real_width_m, wall_method)
+
+    groups = [tx_positions_px[start:start + aps_per_task]
+              for start in range(0, len(tx_positions_px), aps_per_task)]
+    with _shared_pool(binary_img, workers, None) as executor:
+        futures = [executor.submit(_ap_geometry_group, group, rx_x, rx_y,
+                                   real_length_m, real_width_m, wall_method)
+                   for group in groups]
+        results = _collect(futures)
+
+    distances, walls = zip(*results)
+    return np.concatenate(distances), np.concatenate(walls)
+
+
+def run_parallel_rx_geometry(binary_img, tx_positions_px, rx_x, rx_y, real_length_m,
+                             real_width_m, wall_method='exact', workers=None,
+                             rx_per_task=4096, model=None):
+    """
+    Calcule la géométrie d'un ensemble quelconque de récepteurs sur plusieurs cœurs
+
+    Les récepteurs sont répartis par groupes de rx_per_task entre les
+    processus (carte des murs en mémoire partagée) ; utilisé pour les nœuds
+    d'un niveau progressif, qui ne forment pas des bandes complètes de la
+    grille. Avec le comptage exact, le résultat est identique au calcul
+    série (chaque récepteur est indépendant).
+
+    Args:
+        binary_img: Image binaire du plan
+        tx_positions_px: Liste des positions (x, y) des AP en pixels
+        rx_x: Positions X des récepteurs en pixels
+        rx_y: Positions Y des récepteurs en pixels
+        real_length_m: Longueur réelle en mètres
+        real_width_m: Largeur réelle en mètres
+        wall_method: Méthode de comptage des murs
+        workers: Nombre de processus (None = nombre de cœurs)
+        rx_per_task: Nombre de récepteurs par tâche
+        model: Modèle des prédictions qui suivront (optionnel, voir
+            run_parallel_geometry)
+
+    Returns:
+        tuple: (distances, walls) de forme (nb_AP, nb_récepteurs)
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(rx_x) <= rx_per_task:
+        return compute_ap_geometry(binary_img, tx_positions_px, rx_x, rx_y,
+                                   real_length_m, real_width_m, wall_method)
+
+    with _shared_pool(binary_img, workers, model) as executor:
+        futures = [executor.submit(_ap_geometry_group, tx_positions_px,
+                                   rx_x[start:start + rx_per_task],
+                                   rx_y[start:start + rx_per_task],
+                                   real_length_m, real_width_m, wall_method)
+                   for start in range(0, len(rx_x), rx_per_task)]
+        results = _collect(futures)
+
+    distances, walls = zip(*results)
+    return np.concatenate(distances, axis=1), np.concatenate(walls, axis=1)
+
+
+class _WorkerPool:
+    """
+    Pool de processus attaché à la carte des murs d'un plan
+
+    La carte des murs (suivie de la carte des distances aux murs du plan,
+    si elle existe) est copiée dans un segment de mémoire partagée créé et
+    libéré par le processus principal ; le modèle éventuel est transmis une
+    fois à chaque processus.
+    """
+
+    def __init__(self, binary_img, workers, model):
+        self.binary_img = binary_img
+        self.workers = workers
+        self.model = model
+        self.users = 0
+        self.broken = False
+
+        distance_map = wall_distance_map(binary_img)
+        binary_img = np.ascontiguousarray(binary_img)
+        size = binary_img.nbytes + (distance_map.nbytes
+                                    if distance_map is not None else 0)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shared = np.ndarray(binary_img.shape, dtype=binary_img.dtype,
+                            buffer=self.shm.buf)
+        shared[:] = binary_img
+        del shared
+        if distance_map is not None:
+            shared = np.ndarray(distance_map.shape, dtype=np.uint8,
+                                buffer=self.shm.buf, offset=binary_img.nbytes)
+            shared[:] = distance_map
+            del shared
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.shm.name, binary_img.shape, binary_img.dtype, model,
+                      distance_map is not None),
+        )
+
+    def serves(self, binary_img, workers, model):
+        """Le pool convient-il à ce plan, ce nombre de processus et ce modèle ?"""
+        return (not self.broken and self.binary_img is binary_img
+                and self.workers == workers
+                and (model is None or self.model is model))
+
+    def close(self):
+        """Arrête les processus et libère le segment partagé"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.shm.close()
+        self.shm.unlink()
+
+
+@contextmanager
+def _shared_pool(binary_img, workers, model=None):
+    """
+    Pool de processus partageant la carte des murs en mémoire partagée
+
+    Le pool est gardé en vie entre les appels tant que le plan (même
+    tableau binary_img), le nombre de processus et le modèle ne changent
+    pas : les niveaux d'un calcul progressif, la géométrie puis la
+    prédiction d'une génération et les générations suivantes sur le même
+    plan ne paient le démarrage des processus et la copie du plan qu'une
+    fois. Un appel sans modèle réutilise le pool quel que soit son modèle.
+    Si le pool gardé est utilisé par un autre thread pour un autre plan, un
+    pool temporaire est créé pour l'appel.
+    """
+    global _pool
+    retired = None
+    with _pool_lock:
+        if _pool is not None and _pool.serves(binary_img, workers, model):
+            pool = _pool
+        elif _pool is None or _pool.users == 0:
+            retired = _pool
+            pool = _pool = _WorkerPool(binary_img, workers, model)
+        else:
+            pool = _WorkerPool(binary_img, workers, model)
+        pool.users += 1
+    if retired is not None:
+        retired.close()
+
+    try:
+        yield pool.executor
+    except BrokenExecutor:
+        pool.broken = True
+        raise
+    finally:
+        with _pool_lock:
+            pool.users -= 1
+            close = pool.users == 0 and (pool is not _pool or pool.broken)
+            if close and pool is _pool:
+                _pool = None
+        if close:
+            pool.close()
+
+
+@atexit.register
+def shutdown_pool():
+    """Arrête le pool gardé en vie (appelé aussi à la sortie du processus)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
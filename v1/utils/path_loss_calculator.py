@@ -6,17 +6,130 @@ Module pour les calculs de path loss et les prédictions
 import numpy as np
 import pandas as pd
 from scipy.interpolate import griddata
+from utils.instrumentation import count
 from utils.image_processing import (
-    compute_LOS_and_walls_corrected, 
+    compute_wall_counts,
     convert_distance_to_meters
 )
 
 
+FEATURES_FOR_MODEL = ['num_walls', 'distance', 'frequency']
+
+# Nombre maximal de points d'accès (indice du meilleur serveur stocké en int8)
+MAX_ACCESS_POINTS = np.iinfo(np.int8).max
+
+
+class RxData:
+    """
+    Données des récepteurs stockées par colonnes (structure de tableaux)
+    
+    Chaque attribut est un tableau NumPy compact aligné sur les autres :
+    coordonnées en int16 (int32 pour les très grands plans), distance en
+    float32 et nombre de murs en int16. Un DataFrame n'est construit que sur
+    demande via to_dataframe().
+    
+    Attributes:
+        rx_x: Positions X des récepteurs en pixels
+        rx_y: Positions Y des récepteurs en pixels
+        distance: Distances Tx-Rx en mètres
+        num_walls: Nombre de murs traversés
+        frequency: Fréquence en MHz (scalaire commun à tous les points)
+        step: Pas de la grille en pixels
+        path_loss: Path loss prédit en dB (None avant la prédiction)
+        best_ap: Indice du point d'accès retenu (mode multi-WiFi, sinon None)
+    """
+    
+    def __init__(self, rx_x, rx_y, distance, num_walls, frequency, step,
+                 path_loss=None, best_ap=None):
+        self.rx_x = rx_x
+        self.rx_y = rx_y
+        self.distance = distance
+        self.num_walls = num_walls
+        self.frequency = frequency
+        self.step = step
+        self.path_loss = path_loss
+        self.best_ap = best_ap
+    
+    def __len__(self):
+        return len(self.rx_x)
+    
+    @property
+    def empty(self):
+        """bool: True si aucun récepteur n'est présent"""
+        return len(self) == 0
+    
+    def features(self):
+        """
+        Construit la matrice des caractéristiques du modèle
+        
+        Returns:
+            np.ndarray: Tableau float32 contigu (N, 3) dans l'ordre
+            FEATURES_FOR_MODEL
+        """
+        X = np.empty((len(self), len(FEATURES_FOR_MODEL)), dtype=np.float32)
+        X[:, 0] = self.num_walls
+        X[:, 1] = self.distance
+        X[:, 2] = self.frequency
+        return X
+    
+    def with_path_loss(self, path_loss):
+        """
+        Retourne une nouvelle vue des données avec le path loss renseigné
+        (les tableaux existants sont partagés, pas copiés)
+        """
+        return RxData(self.rx_x, self.rx_y, self.distance, self.num_walls,
+                      self.frequency, self.step, path_loss, self.best_ap)
+    
+    def to_dataframe(self):
+        """
+        Convertit les données en DataFrame (colonnes historiques)
+        
+        Returns:
+            pd.DataFrame: Données des récepteurs
+        """
+        columns = {
+            'RX_x': self.rx_x,
+            'RX_y': self.rx_y,
+            'distance': self.distance,
+            'num_walls': self.num_walls,
+            'frequency': np.full(len(self), self.frequency),
+        }
+        if self.path_loss is not None:
+            columns['Path_Loss_Predicted'] = self.path_loss
+        if self.best_ap is not None:
+            columns['Best_AP'] = self.best_ap
+        return pd.DataFrame(columns)
+
+
+def _coord_dtype(img_width, img_height):
+    """Choisit le plus petit type entier capable de stocker les coordonnées"""
+    if max(img_width, img_height) <= np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+def _rx_columns(rx):
+    """
+    Extrait coordonnées et path loss d'un RxData ou d'un DataFrame
+    
+    Returns:
+        tuple: (rx_x, rx_y, path_loss)
+    """
+    if isinstance(rx, pd.DataFrame):
+        return (rx['RX_x'].values, rx['RX_y'].values,
+                rx['Path_Loss_Predicted'].values)
+    return rx.rx_x, rx.rx_y, rx.path_loss
+
+
 def generate_rx_data(binary_img, tx_x_px, tx_y_px, real_length_m, real_width_m, 
-                    frequency_mhz, step):
+                    frequency_mhz, step, as_dataframe=False, wall_method='exact'):
     """
     Génère les données des points récepteurs pour le calcul du path loss
     
+    Les points de la grille situés en espace libre sont trouvés en une seule
+    opération sur binary_img[::step, ::step] et toutes les distances sont
+    calculées de manière vectorisée.
+    
     Args:
         binary_img: Image binaire du plan
         tx_x_px: Position X du transmetteur en pixels
@@ -25,45 +138,82 @@ def generate_rx_data(binary_img, tx_x_px, tx_y_px, real_length_m, real_width_m,
         real_width_m: Largeur réelle en mètres
         frequency_mhz: Fréquence en MHz
         step: Pas de la grille en pixels
+        as_dataframe: Si True, retourne un DataFrame au lieu d'un RxData
+        wall_method: Méthode de comptage des murs ('exact' : un rayon par
+            récepteur, 'radial' : balayage radial partagé depuis le Tx)
+        
+    Returns:
+        RxData ou pd.DataFrame: Données des récepteurs avec caractéristiques calculées
+    """
+    rx_x, rx_y = lattice_receivers(binary_img, step)
+    
+    rx = build_rx_data(binary_img, tx_x_px, tx_y_px, rx_x, rx_y, real_length_m,
+                       real_width_m, frequency_mhz, step, wall_method)
+    if as_dataframe:
+        return rx.to_dataframe()
+    return rx
+
+
+def lattice_receivers(binary_img, step, row_start=0, row_stop=None):
+    """
+    Positions des points de la grille de pas step situés en espace libre
+    
+    Args:
+        binary_img: Image binaire du plan
+        step: Pas de la grille en pixels
+        row_start: Première ligne de la grille (indice de nœud, pas de pixel)
+        row_stop: Ligne de fin exclue (None = dernière ligne)
         
     Returns:
-        pd.DataFrame: Données des récepteurs avec caractéristiques calculées
+        tuple: (rx_x, rx_y) en pixels, ordonnés ligne par ligne
     """
     img_height, img_width = binary_img.shape
-    rx_data = []
-    
-    for rx_y in range(0, img_height, step):
-        for rx_x in range(0, img_width, step):
-            # Vérifier si le point est dans un espace libre
-            if (0 <= rx_x < img_width and 0 <= rx_y < img_height and 
-                binary_img[rx_y, rx_x] == 0):
-                
-                # Calculer la distance en pixels
-                distance_px = np.sqrt((rx_x - tx_x_px)**2 + (rx_y - tx_y_px)**2)
-                
-                # Convertir en mètres
-                distance_m = convert_distance_to_meters(
-                    distance_px, real_length_m, real_width_m, img_width, img_height
-                )
-                
-                # Éviter les distances nulles
-                if distance_m < 1e-6:
-                    distance_m = 1e-6
-                
-                # Calculer le nombre de murs traversés
-                _, num_walls = compute_LOS_and_walls_corrected(
-                    (tx_x_px, tx_y_px), (rx_x, rx_y), binary_img
-                )
-                
-                rx_data.append({
-                    'RX_x': rx_x,
-                    'RX_y': rx_y,
-                    'distance': distance_m,
-                    'num_walls': num_walls,
-                    'frequency': frequency_mhz
-                })
-    
-    return pd.DataFrame(rx_data)
+    coord_dtype = _coord_dtype(img_width, img_height)
+    
+    band = binary_img[row_start * step:None if row_stop is None else row_stop * step:step,
+                      ::step]
+    free_rows, free_cols = np.nonzero(band == 0)
+    rx_x = (free_cols * step).astype(coord_dtype)
+    rx_y = ((free_rows + row_start) * step).astype(coord_dtype)
+    return rx_x, rx_y
+
+
+def build_rx_data(binary_img, tx_x_px, tx_y_px, rx_x, rx_y, real_length_m,
+                  real_width_m, frequency_mhz, step, wall_method='exact'):
+    """
+    Calcule distances et murs traversés pour des récepteurs donnés
+    
+    Args:
+        binary_img: Image binaire du plan
+        tx_x_px: Position X du transmetteur en pixels
+        tx_y_px: Position Y du transmetteur en pixels
+        rx_x: Positions X des récepteurs en pixels
+        rx_y: Positions Y des récepteurs en pixels
+        real_length_m: Longueur réelle en mètres
+        real_width_m: Largeur réelle en mètres
+        frequency_mhz: Fréquence en MHz
+        step: Pas de la grille en pixels
+        wall_method: Méthode de comptage des murs (voir generate_rx_data)
+        
+    Returns:
+        RxData: Données des récepteurs (sans prédiction)
+    """
+    img_height, img_width = binary_img.shape
+    
+    # Distances en pixels puis en mètres, en évitant les distances nulles
+    distance_px = np.sqrt((rx_x - float(tx_x_px))**2 + (rx_y - float(tx_y_px))**2)
+    distance_m = convert_distance_to_meters(
+        distance_px, real_length_m, real_width_m, img_width, img_height
+    )
+    distance_m = np.maximum(distance_m, 1e-6).astype(np.float32)
+    
+    # Calculer le nombre de murs traversés pour tous les récepteurs en une fois
+    _, num_walls = compute_wall_counts(
+        (tx_x_px, tx_y_px), np.column_stack((rx_x, rx_y)), binary_img, wall_method
+    )
+    
+    return RxData(rx_x, rx_y, distance_m, num_walls.astype(np.int16),
+                  frequency_mhz, step)
 
 
 def predict_path_loss(rx_df, model):
@@ -71,43 +221,408 @@ def predict_path_loss(rx_df, model):
     Prédit le path loss pour tous les points récepteurs
     
     Args:
-        rx_df: DataFrame avec les données des récepteurs
+        rx_df: RxData ou DataFrame avec les données des récepteurs
         model: Modèle ML entraîné
         
     Returns:
-        pd.DataFrame: DataFrame avec les prédictions ajoutées
+        RxData ou pd.DataFrame: Données avec les prédictions ajoutées
     """
     if rx_df.empty:
         return rx_df
     
-    features_for_model = ['num_walls', 'distance', 'frequency']
-    X_predict = rx_df[features_for_model]
-    rx_df = rx_df.copy()
-    rx_df['Path_Loss_Predicted'] = model.predict(X_predict)
+    count('model_rows', len(rx_df))
+    if isinstance(rx_df, pd.DataFrame):
+        X_predict = rx_df[FEATURES_FOR_MODEL]
+        rx_df = rx_df.copy()
+        rx_df['Path_Loss_Predicted'] = model.predict(X_predict)
+        return rx_df
+    
+    path_loss = np.asarray(model.predict(rx_df.features()), dtype=np.float32)
+    return rx_df.with_path_loss(path_loss)
+
+
+def calculate_combined_path_loss(binary_img, tx_positions_px, real_length_m,
+                                 real_width_m, frequency_mhz, step, model,
+                                 wall_method='exact', max_rows=2_000_000):
+    """
+    Calcule le path loss combiné de plusieurs points d'accès (meilleur serveur)
+    
+    La grille des récepteurs est construite une seule fois et partagée par
+    tous les points d'accès. Les caractéristiques de plusieurs AP sont
+    empilées dans une même matrice float32 et prédites en un seul appel (par
+    groupes d'AP si max_rows est dépassé), puis réduites au minimum du path
+    loss par récepteur, sans DataFrame intermédiaire.
+    
+    Args:
+        binary_img: Image binaire du plan
+        tx_positions_px: Liste des positions (x, y) des AP en pixels
+        real_length_m: Longueur réelle en mètres
+        real_width_m: Largeur réelle en mètres
+        frequency_mhz: Fréquence en MHz
+        step: Pas de la grille en pixels
+        model: Modèle ML (ou objet exposant predict(X))
+        wall_method: Méthode de comptage des murs
+        max_rows: Nombre maximal de lignes prédites par appel
+        
+    Returns:
+        RxData: Path loss minimal, avec distance, murs et indice (best_ap)
+        du point d'accès retenu pour chaque récepteur
+    """
+    rx_x, rx_y = lattice_receivers(binary_img, step)
+    return combine_access_points(binary_img, tx_positions_px, rx_x, rx_y,
+                                 real_length_m, real_width_m, frequency_mhz,
+                                 step, model, wall_method, max_rows)
+
+
+def combine_access_points(binary_img, tx_positions_px, rx_x, rx_y, real_length_m,
+                          real_width_m, frequency_mhz, step, model,
+                          wall_method='exact', max_rows=2_000_000):
+    """
+    Évalue plusieurs points d'accès sur des récepteurs donnés (meilleur serveur)
+    
+    Voir calculate_combined_path_loss ; cette fonction travaille sur une liste
+    de récepteurs quelconque (par exemple une bande de la grille).
     
-    return rx_df
+    Returns:
+        RxData: Path loss minimal et indice du point d'accès retenu
+    """
+    distances, walls = compute_ap_geometry(binary_img, tx_positions_px, rx_x, rx_y,
+                                           real_length_m, real_width_m, wall_method)
+    return predict_best_server(rx_x, rx_y, distances, walls, frequency_mhz, step,
+                               model, max_rows)
 
 
-def create_interpolated_grid(rx_df, img_width, img_height, binary_img):
+def compute_ap_geometry(binary_img, tx_positions_px, rx_x, rx_y, real_length_m,
+                        real_width_m, wall_method='exact', max_samples=None):
+    """
+    Calcule distances et murs traversés entre chaque AP et chaque récepteur
+    
+    Args:
+        binary_img: Image binaire du plan
+        tx_positions_px: Liste des positions (x, y) des AP en pixels
+        rx_x: Positions X des récepteurs en pixels
+        rx_y: Positions Y des récepteurs en pixels
+        real_length_m: Longueur réelle en mètres
+        real_width_m: Largeur réelle en mètres
+        wall_method: Méthode de comptage des murs
+        max_samples: Nombre maximal d'échantillons de rayons par bloc
+            (None = valeur par défaut, voir compute_wall_counts)
+        
+    Returns:
+        tuple: (distances, walls) - tableaux (nb_AP, nb_récepteurs) float32
+        (mètres, bornés à 1e-6) et int16
+    """
+    img_height, img_width = binary_img.shape
+    rx_points = np.column_stack((rx_x, rx_y))
+    distances = np.empty((len(tx_positions_px), len(rx_x)), dtype=np.float32)
+    walls = np.empty((len(tx_positions_px), len(rx_x)), dtype=np.int16)
+    
+    for i, (tx_x_px, tx_y_px) in enumerate(tx_positions_px):
+        distance_px = np.sqrt((rx_x - float(tx_x_px))**2 + (rx_y - float(tx_y_px))**2)
+        distance_m = convert_distance_to_meters(
+            distance_px, real_length_m, real_width_m, img_width, img_height
+        )
+        distances[i] = np.maximum(distance_m, 1e-6)
+        if len(rx_x):
+            walls[i] = compute_wall_counts(
+                (tx_x_px, tx_y_px), rx_points, binary_img, wall_method, max_samples
+            )[1]
+    
+    return distances, walls
+
+
+def predict_best_server(rx_x, rx_y, distances, walls, frequency_mhz, step, model,
+                        max_rows=2_000_000):
+    """
+    Prédit le path loss de chaque AP et garde le meilleur serveur par récepteur
+    
+    Les lignes de plusieurs AP sont empilées dans une même matrice float32 et
+    prédites en un seul appel (par groupes d'AP si max_rows est dépassé).
+    
+    Args:
+        rx_x: Positions X des récepteurs en pixels
+        rx_y: Positions Y des récepteurs en pixels
+        distances: Tableau (nb_AP, nb_récepteurs) des distances en mètres
+        walls: Tableau (nb_AP, nb_récepteurs) des murs traversés
+        frequency_mhz: Fréquence en MHz
+        step: Pas de la grille en pixels
+        model: Modèle ML (ou objet exposant predict(X))
+        max_rows: Nombre maximal de lignes prédites par appel
+        
+    Returns:
+        RxData: Path loss minimal, avec distance, murs et indice (best_ap)
+        du point d'accès retenu
+
+    Raises:
+        ValueError: Plus de MAX_ACCESS_POINTS points d'accès
+    """
+    num_aps, num_rx = distances.shape
+    if num_aps > MAX_ACCESS_POINTS:
+        raise ValueError(f"Trop de points d'accès ({MAX_ACCESS_POINTS} au maximum).")
+    best_path_loss = np.full(num_rx, np.inf, dtype=np.float32)
+    best_ap = np.zeros(num_rx, dtype=np.int8)
+    best_distance = np.zeros(num_rx, dtype=np.float32)
+    best_walls = np.zeros(num_rx, dtype=np.int16)
+    if num_rx == 0 or num_aps == 0:
+        return RxData(rx_x, rx_y, best_distance, best_walls, frequency_mhz, step,
+                      best_path_loss, best_ap)
+    
+    aps_per_batch = max(1, max_rows // num_rx)
+    for first_ap in range(0, num_aps, aps_per_batch):
+        last_ap = min(first_ap + aps_per_batch, num_aps)
+        X = np.empty((last_ap - first_ap, num_rx, len(FEATURES_FOR_MODEL)),
+                     dtype=np.float32)
+        X[:, :, 0] = walls[first_ap:last_ap]
+        X[:, :, 1] = distances[first_ap:last_ap]
+        X[:, :, 2] = frequency_mhz
+        count('model_rows', X.shape[0] * X.shape[1])
+        
+        path_loss = np.asarray(
+            model.predict(X.reshape(-1, len(FEATURES_FOR_MODEL))), dtype=np.float32
+        ).reshape(last_ap - first_ap, num_rx)
+        
+        # Réduction au meilleur serveur (path loss minimal)
+        batch_best = np.argmin(path_loss, axis=0)
+        batch_path_loss = path_loss[batch_best, np.arange(num_rx)]
+        improved = batch_path_loss < best_path_loss
+        best_path_loss[improved] = batch_path_loss[improved]
+        best_ap[improved] = first_ap + batch_best[improved]
+        best_distance[improved] = X[batch_best[improved], improved, 1]
+        best_walls[improved] = X[batch_best[improved], improved, 0]
+    
+    return RxData(rx_x, rx_y, best_distance, best_walls, frequency_mhz, step,
+                  best_path_loss, best_ap)
+
+
+def predict_ap_path_loss(distances, walls, frequency_mhz, model, max_rows=2_000_000):
+    """
+    Prédit le path loss de chaque AP vers chaque récepteur, sans réduction
+    
+    Comme predict_best_server, les lignes de plusieurs AP sont empilées et
+    prédites par groupes de max_rows lignes au plus, mais la matrice
+    complète est conservée (ex: couverture de chaque emplacement candidat).
+    
+    Args:
+        distances: Tableau (nb_AP, nb_récepteurs) des distances en mètres
+        walls: Tableau (nb_AP, nb_récepteurs) des murs traversés
+        frequency_mhz: Fréquence en MHz
+        model: Modèle ML (ou objet exposant predict(X))
+        max_rows: Nombre maximal de lignes prédites par appel
+        
+    Returns:
+        np.ndarray: Path loss float32 (nb_AP, nb_récepteurs) en dB
+    """
+    num_aps, num_rx = distances.shape
+    path_loss = np.empty((num_aps, num_rx), dtype=np.float32)
+    if num_rx == 0 or num_aps == 0:
+        return path_loss
+    
+    aps_per_batch = max(1, max_rows // num_rx)
+    for first_ap in range(0, num_aps, aps_per_batch):
+        last_ap = min(first_ap + aps_per_batch, num_aps)
+        X = np.empty((last_ap - first_ap, num_rx, len(FEATURES_FOR_MODEL)),
+                     dtype=np.float32)
+        X[:, :, 0] = walls[first_ap:last_ap]
+        X[:, :, 1] = distances[first_ap:last_ap]
+        X[:, :, 2] = frequency_mhz
+        count('model_rows', X.shape[0] * X.shape[1])
+        path_loss[first_ap:last_ap] = np.asarray(
+            model.predict(X.reshape(-1, len(FEATURES_FOR_MODEL))), dtype=np.float32
+        ).reshape(last_ap - first_ap, num_rx)
+    
+    return path_loss
+
+
+def predict_frequency_sweep(distances, walls, frequencies_mhz, model,
+                            max_rows=2_000_000):
+    """
+    Prédit le meilleur serveur de chaque récepteur pour plusieurs fréquences
+
+    La géométrie (distances, murs) ne dépend pas de la fréquence : les
+    lignes (fréquence, AP, récepteur) sont construites par diffusion à partir
+    des mêmes tableaux et prédites en un seul appel (par groupes de
+    récepteurs si max_rows est dépassé).
+
+    Args:
+        distances: Tableau (nb_AP, nb_récepteurs) des distances en mètres
+        walls: Tableau (nb_AP, nb_récepteurs) des murs traversés
+        frequencies_mhz: Liste des fréquences en MHz
+        model: Modèle ML (ou objet exposant predict(X))
+        max_rows: Nombre maximal de lignes prédites par appel
+
+    Returns:
+        tuple: (path_loss, best_ap) - tableaux (nb_fréquences, nb_récepteurs)
+        float32 (path loss minimal en dB) et int8 (indice de l'AP retenu)
+
+    Raises:
+        ValueError: Plus de MAX_ACCESS_POINTS points d'accès
+    """
+    frequencies = np.asarray(frequencies_mhz, dtype=np.float32)
+    num_aps, num_rx = distances.shape
+    if num_aps > MAX_ACCESS_POINTS:
+        raise ValueError(f"Trop de points d'accès ({MAX_ACCESS_POINTS} au maximum).")
+    path_loss = np.empty((len(frequencies), num_rx), dtype=np.float32)
+    best_ap = np.zeros((len(frequencies), num_rx), dtype=np.int8)
+    if num_rx == 0 or num_aps == 0 or len(frequencies) == 0:
+        return path_loss, best_ap
+
+    rx_per_batch = max(1, max_rows // (len(frequencies) * num_aps))
+    for start in range(0, num_rx, rx_per_batch):
+        stop = min(start + rx_per_batch, num_rx)
+        X = np.empty((len(frequencies), num_aps, stop - start, len(FEATURES_FOR_MODEL)),
+                     dtype=np.float32)
+        X[..., 0] = walls[:, start:stop]
+        X[..., 1] = distances[:, start:stop]
+        X[..., 2] = frequencies[:, None, None]
+        count('model_rows', X.size // len(FEATURES_FOR_MODEL))
+
+        batch = np.asarray(
+            model.predict(X.reshape(-1, len(FEATURES_FOR_MODEL))), dtype=np.float32
+        ).reshape(len(frequencies), num_aps, stop - start)
+        best = np.argmin(batch, axis=1)
+        best_ap[:, start:stop] = best
+        path_loss[:, start:stop] = np.take_along_axis(batch, best[:, None], axis=1)[:, 0]
+
+    return path_loss, best_ap
+
+
+def rx_to_lattice(rx_x, rx_y, values, step, img_width, img_height):
+    """
+    Range des valeurs de récepteurs sur leur grille régulière de pas step
+    
+    Args:
+        rx_x: Positions X des récepteurs (multiples de step)
+        rx_y: Positions Y des récepteurs (multiples de step)
+        values: Valeurs associées aux récepteurs
+        step: Pas de la grille en pixels
+        img_width: Largeur de l'image
+        img_height: Hauteur de l'image
+        
+    Returns:
+        np.ndarray: Tableau float32 (ceil(H/step), ceil(W/step)), NaN aux
+        points sans récepteur (murs)
+    """
+    lattice = np.full((-(-img_height // step), -(-img_width // step)), np.nan,
+                      dtype=np.float32)
+    lattice[np.asarray(rx_y) // step, np.asarray(rx_x) // step] = values
+    return lattice
+
+
+def _lattice_axis(size, step, num_nodes):
+    """
+    Indices et poids d'interpolation linéaire le long d'un axe
+    
+    Returns:
+        tuple: (index_bas, index_haut, poids_haut) pour chaque pixel
+    """
+    coords = np.arange(size)
+    lower = np.minimum(coords // step, num_nodes - 1)
+    upper = np.minimum(lower + 1, num_nodes - 1)
+    weight = ((coords - lower * step) / step).astype(np.float32)
+    # Au-delà du dernier nœud, la valeur du bord est prolongée
+    weight[upper == lower] = 0.0
+    return lower, upper, weight
+
+
+def interpolate_lattice(lattice, step, img_width, img_height, out=None,
+                        band_rows=256):
+    """
+    Suréchantillonne une grille régulière de valeurs vers la pleine résolution
+    
+    Interpolation bilinéaire normalisée : les nœuds NaN (murs) ont un poids
+    nul et les poids restants sont renormalisés, ce qui bouche les trous
+    sans triangulation. Le calcul se fait par bandes de lignes, en float32,
+    sans construire de grilles de coordonnées pleine taille.
+    
+    Args:
+        lattice: Tableau (ny, nx) des valeurs aux nœuds (NaN = absent)
+        step: Pas de la grille en pixels
+        img_width: Largeur de l'image
+        img_height: Hauteur de l'image
+        out: Tableau (H, W) float32 de sortie optionnel (ex: memmap)
+        band_rows: Nombre de lignes de pixels traitées par bande
+        
+    Returns:
+        np.ndarray: Grille (H, W) float32, NaN là où aucun nœud n'est valide
+    """
+    num_rows, num_cols = lattice.shape
+    if out is None:
+        out = np.empty((img_height, img_width), dtype=np.float32)
+    
+    valid = ~np.isnan(lattice)
+    values = np.where(valid, lattice, 0).astype(np.float32)
+    weights = valid.astype(np.float32)
+    
+    x_lower, x_upper, x_weight = _lattice_axis(img_width, step, num_cols)
+    y_lower, y_upper, y_weight = _lattice_axis(img_height, step, num_rows)
+    
+    for row_start in range(0, img_height, band_rows):
+        row_stop = min(row_start + band_rows, img_height)
+        node_lo = y_lower[row_start]
+        node_hi = y_upper[row_stop - 1] + 1
+        
+        # Passe horizontale sur les seuls nœuds utiles à la bande
+        band_values = values[node_lo:node_hi]
+        band_weights = weights[node_lo:node_hi]
+        h_values = (band_values[:, x_lower] * (1 - x_weight)
+                    + band_values[:, x_upper] * x_weight)
+        h_weights = (band_weights[:, x_lower] * (1 - x_weight)
+                     + band_weights[:, x_upper] * x_weight)
+        
+        # Passe verticale
+        lower = y_lower[row_start:row_stop] - node_lo
+        upper = y_upper[row_start:row_stop] - node_lo
+        fy = y_weight[row_start:row_stop, None]
+        v_values = h_values[lower] * (1 - fy) + h_values[upper] * fy
+        v_weights = h_weights[lower] * (1 - fy) + h_weights[upper] * fy
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            band = v_values / v_weights
+        band[v_weights <= 0] = np.nan
+        out[row_start:row_stop] = band
+    
+    return out
+
+
+def create_interpolated_grid(rx_df, img_width, img_height, binary_img,
+                             method='cubic', step=None):
     """
     Crée une grille interpolée pour la heatmap
     
     Args:
-        rx_df: DataFrame avec les prédictions
+        rx_df: RxData ou DataFrame avec les prédictions
         img_width: Largeur de l'image
         img_height: Hauteur de l'image
         binary_img: Image binaire pour masquer les murs
+        method: 'cubic' (griddata sur points dispersés) ou 'lattice'
+            (suréchantillonnage de la grille régulière des récepteurs)
+        step: Pas de la grille (par défaut celui du RxData), requis pour
+            'lattice' avec un DataFrame
         
     Returns:
-        tuple: (grid_x, grid_y, grid_path_loss)
+        tuple: (grid_x, grid_y, grid_path_loss) - grille indexée [x, y]
     """
     if rx_df.empty:
         return None, None, None
     
     # Extraire les coordonnées et valeurs
-    rx_x_coords = rx_df['RX_x'].values
-    rx_y_coords = rx_df['RX_y'].values
-    path_loss_values = rx_df['Path_Loss_Predicted'].values
+    rx_x_coords, rx_y_coords, path_loss_values = _rx_columns(rx_df)
+    
+    if method == 'lattice':
+        step = step if step is not None else rx_df.step
+        lattice = rx_to_lattice(rx_x_coords, rx_y_coords, path_loss_values,
+                                step, img_width, img_height)
+        grid = interpolate_lattice(lattice, step, img_width, img_height)
+        
+        # Masquer les murs
+        grid[binary_img == 1] = np.nan
+        
+        # Grilles de coordonnées creuses (pas de meshgrid pleine taille)
+        grid_x, grid_y = np.ogrid[0:img_width, 0:img_height]
+        return grid_x, grid_y, grid.T
+    
+    if method != 'cubic':
+        raise ValueError(f"Méthode d'interpolation inconnue: {method}")
     
     # Créer une grille régulière pour l'interpolation
     grid_x, grid_y = np.mgrid[0:img_width, 0:img_height]
@@ -0,0 +1,737 @@
+# utils/pipeline.py
+"""
+Module pour le pipeline de génération de la heatmap découpé en étapes mémorisées
+"""
+
+import itertools
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from config import PLAN_THRESHOLD
+from utils.adaptive_sampling import generate_adaptive_rx_data
+from utils.image_processing import (
+    convert_position_to_pixels,
+    load_plan,
+    read_upload_bytes,
+    validate_tx_position
+)
+from utils.instrumentation import count, measure, record
+from utils.jobs import check_cancelled
+from utils.parallel import (
+    run_parallel_geometry,
+    run_parallel_prediction,
+    run_parallel_rx_geometry
+)
+from utils.path_loss_calculator import (
+    MAX_ACCESS_POINTS,
+    RxData,
+    create_interpolated_grid,
+    lattice_receivers,
+    predict_frequency_sweep,
+    rx_to_lattice
+)
+from utils.plan_cache import get_plan_cache, make_plan_key
+from utils.plotting import create_heatmap_plot
+from utils.rendering import render_heatmap
+
+
+# Étapes du pipeline, dans l'ordre d'exécution
+STAGES = ('plan', 'geometry', 'prediction', 'grid', 'figure')
+
+_MISSING = object()
+
+# Prédicteurs sans model_key dont l'identifiant est mémorisé par pipeline
+_MAX_MODELS = 8
+
+
+def progressive_steps(step, coarsest_step=32):
+    """
+    Pas successifs d'un calcul progressif, du plus grossier au pas demandé
+
+    Chaque pas est le double du suivant : les nœuds d'un niveau sont aussi
+    des nœuds du niveau plus fin et leurs résultats sont réutilisés.
+
+    Args:
+        step: Pas final de la grille en pixels
+        coarsest_step: Pas maximal du premier niveau
+
+    Returns:
+        list: Pas décroissants, le dernier étant step
+    """
+    steps = [step]
+    while steps[-1] * 2 <= coarsest_step:
+        steps.append(steps[-1] * 2)
+    return steps[::-1]
+
+
+class PipelineError(Exception):
+    """Erreur de génération à afficher telle quelle à l'utilisateur"""
+
+
+def tx_positions_to_pixels(tx_positions_m, real_length_m, real_width_m,
+                           img_width, img_height):
+    """
+    Convertit les positions des AP en pixels et vérifie qu'elles sont dans le plan
+
+    Returns:
+        list: Positions [(x, y), ...] en pixels
+
+    Raises:
+        PipelineError: Position hors des limites de l'image ou plus de
+            MAX_ACCESS_POINTS points d'accès
+    """
+    if len(tx_positions_m) > MAX_ACCESS_POINTS:
+        raise PipelineError(f"Trop de points d'accès ({MAX_ACCESS_POINTS} au maximum).")
+    tx_positions_px = [
+        (convert_position_to_pixels(x_m, real_length_m, img_width),
+         convert_position_to_pixels(y_m, real_width_m, img_height))
+        for x_m, y_m in tx_positions_m
+    ]
+    for x_px, y_px in tx_positions_px:
+        if not validate_tx_position(x_px, y_px, img_width, img_height):
+            raise PipelineError("La position Tx est hors des limites de l'image.")
+    return tx_positions_px
+
+
+class HeatmapResult:
+    """
+    Résultat d'une exécution du pipeline
+
+    Attributes:
+        figure: Image RGB uint8 (rendu 'raster') ou figure matplotlib (rendu
+            'matplotlib') ; None si le rendu n'a pas été demandé
+        rx_data: RxData des récepteurs avec path loss
+        grid: Grille interpolée (hauteur, largeur) du path loss
+        tx_positions_px: Positions [(x, y), ...] des AP en pixels
+        plan_key: Clé du plan dans le cache de prétraitement
+        scale: Facteur de réduction du niveau de la pyramide utilisé (1 =
+            pleine résolution) ; grille, récepteurs et positions sont
+            exprimés en pixels de ce niveau
+    """
+
+    def __init__(self, figure, rx_data, grid, tx_positions_px, plan_key, scale=1):
+        self.figure = figure
+        self.rx_data = rx_data
+        self.grid = grid
+        self.tx_positions_px = tx_positions_px
+        self.plan_key = plan_key
+        self.scale = scale
+
+
+class SweepResult:
+    """
+    Résultat d'un balayage en fréquence (voir HeatmapPipeline.run_sweep)
+
+    Attributes:
+        frequencies_mhz: Fréquences balayées, dans l'ordre demandé
+        cube: Grilles (nb_fréquences, hauteur, largeur) float32 du path loss
+        rx_x: Positions X des récepteurs en pixels
+        rx_y: Positions Y des récepteurs en pixels
+        distances: Tableau (nb_AP, nb_récepteurs) des distances en mètres
+        walls: Tableau (nb_AP, nb_récepteurs) des murs traversés
+        path_loss: Path loss (nb_fréquences, nb_récepteurs) du meilleur AP
+        best_ap: Indice (nb_fréquences, nb_récepteurs) du meilleur AP
+        step: Pas de la grille en pixels du niveau utilisé
+        tx_positions_px: Positions [(x, y), ...] des AP en pixels
+        plan_key: Clé du plan dans le cache de prétraitement
+        scale: Facteur de réduction du niveau de la pyramide utilisé
+    """
+
+    def __init__(self, frequencies_mhz, cube, rx_x, rx_y, distances, walls,
+                 path_loss, best_ap, step, tx_positions_px, plan_key, scale=1):
+        self.frequencies_mhz = frequencies_mhz
+        self.cube = cube
+        self.rx_x = rx_x
+        self.rx_y = rx_y
+        self.distances = distances
+        self.walls = walls
+        self.path_loss = path_loss
+        self.best_ap = best_ap
+        self.step = step
+        self.tx_positions_px = tx_positions_px
+        self.plan_key = plan_key
+        self.scale = scale
+
+    def rx_data(self, index):
+        """
+        Récepteurs d'une fréquence du balayage
+
+        Args:
+            index: Indice de la fréquence dans frequencies_mhz
+
+        Returns:
+            RxData: Path loss, distance et murs du meilleur AP
+        """
+        best_ap = self.best_ap[index]
+        receivers = np.arange(len(self.rx_x))
+        return RxData(self.rx_x, self.rx_y, self.distances[best_ap, receivers],
+                      self.walls[best_ap, receivers], self.frequencies_mhz[index],
+                      self.step, self.path_loss[index],
+                      best_ap if len(self.distances) > 1 else None)
+
+
+class StageCache:
+    """
+    Cache LRU des résultats d'une étape, indexé par ses seules entrées
+
+    Attributes:
+        max_entries: Nombre maximal de résultats conservés
+        hits: Nombre de résultats réutilisés
+        misses: Nombre de résultats calculés
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        """Retourne le résultat mémorisé, ou _MISSING"""
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Mémorise un résultat et évince les plus anciens"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Statistiques du cache
+
+        Returns:
+            dict: entries, hits, misses
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits,
+                    'misses': self.misses}
+
+
+class HeatmapPipeline:
+    """
+    Génération de la heatmap en étapes plan -> géométrie -> prédiction ->
+    grille -> figure
+
+    Chaque étape est mémorisée sur les seules entrées dont elle dépend (sa
+    clé contient celle de l'étape précédente) : changer la fréquence ou le
+    mode de prédiction réutilise le plan et la géométrie (distances, murs),
+    changer l'interpolation réutilise la prédiction, et changer la palette
+    ou l'opacité ne refait que le tracé.
+
+    L'échantillonnage adaptatif évalue la géométrie à la demande : pour un
+    seul AP, géométrie et prédiction forment alors une seule étape (la
+    géométrie est marquée 'fused'). Avec plusieurs AP, la grille uniforme
+    est utilisée.
+
+    Lorsqu'un Profiler est actif dans le thread (voir
+    utils.instrumentation), chaque étape y enregistre son temps, son pic
+    mémoire et son état. Exécuté dans un job (voir utils.jobs), le pipeline
+    s'interrompt avant chaque étape à calculer si le job a été annulé.
+
+    Attributes:
+        caches: StageCache de chaque étape (sauf le plan, stocké dans le
+            cache de prétraitement partagé)
+    """
+
+    def __init__(self, max_entries=4):
+        self.caches = {name: StageCache(max_entries) for name in STAGES[1:]}
+        self.caches['sweep'] = StageCache(max_entries)
+        self._models = OrderedDict()
+        self._model_tokens = itertools.count()
+        self._models_lock = threading.Lock()
+
+    def _model_key(self, model, model_key):
+        """
+        Clé du prédicteur
+
+        Sans model_key, chaque prédicteur reçoit un numéro jamais réutilisé :
+        seuls les _MAX_MODELS derniers sont retenus (id -> numéro), et un
+        prédicteur oublié puis libéré ne peut pas prêter sa clé à un nouvel
+        objet de même id (ses étapes mémorisées ne sont simplement plus
+        retrouvées).
+        """
+        if model_key is not None:
+            return model_key
+        with self._models_lock:
+            known = self._models.get(id(model))
+            if known is None or known[0] is not model:
+                known = (model, next(self._model_tokens))
+                self._models[id(model)] = known
+            self._models.move_to_end(id(model))
+            while len(self._models) > _MAX_MODELS:
+                self._models.popitem(last=False)
+        return type(model).__name__, known[1]
+
+    def _stage(self, name, key, builder, status):
+        """Retourne le résultat mémorisé de l'étape ou le calcule"""
+        cache = self.caches[name]
+        value = cache.get(key)
+        if value is _MISSING:
+            check_cancelled()
+            with measure(name):
+                value = builder()
+            cache.put(key, value)
+            status[name] = 'miss'
+        else:
+            status[name] = 'hit'
+            record(name, 'hit')
+        return value
+
+    def _load_plan(self, uploaded_file, step, pyramid, status):
+        """
+        Charge le plan (et son niveau de pyramide) depuis le cache de prétraitement
+
+        Returns:
+            tuple: (PlanEntry, clé du plan, pas dans les pixels du niveau)
+        """
+        data = read_upload_bytes(uploaded_file)
+        plan_key = make_plan_key(data, PLAN_THRESHOLD, 1)
+        cache = get_plan_cache()
+        plan = cache.get(plan_key)
+        status['plan'] = 'hit' if plan is not None else 'miss'
+        with measure('plan', status['plan']):
+            if plan is None:
+                plan, error = load_plan(data, PLAN_THRESHOLD, use_cache=False)
+                if error:
+                    raise PipelineError(error)
+                cache.put(plan)
+            if pyramid:
+                # Niveau réduit de la pyramide : même grille, coordonnées / factor
+                plan = plan.level_for_step(step)
+                step //= plan.factor
+        return plan, plan_key, step
+
+    def clear(self):
+        """Vide les caches de toutes les étapes"""
+        for cache in self.caches.values():
+            cache.clear()
+
+    def stats(self):
+        """
+        Statistiques cumulées des caches
+
+        Returns:
+            dict: Statistiques de chaque étape mémorisée
+        """
+        return {name: cache.stats() for name, cache in self.caches.items()}
+
+    def run(self, uploaded_file, real_length_m, real_width_m, tx_positions_m,
+            frequency_mhz, step, model, model_key=None, wall_method='exact',
+            interpolation_method='cubic', sampling='uniform',
+            adaptive_tolerance_db=2.0, workers=1, tile_rows=64, cmap='jet',
+            alpha=0.7, render=True, render_mode='raster', pyramid=False, stats=None):
+        """
+        Exécute le pipeline en réutilisant les étapes déjà calculées
+
+        Args:
+            uploaded_file: Fichier image du plan (octets, chemin ou fichier)
+            real_length_m: Longueur réelle en mètres
+            real_width_m: Largeur réelle en mètres
+            tx_positions_m: Positions [(x_m, y_m), ...] des WiFi
+            frequency_mhz: Fréquence en MHz
+            step: Pas de la grille en pixels
+            model: Modèle ML (ou objet exposant predict(X))
+            model_key: Identifiant stable du prédicteur (par défaut son id)
+            wall_method: Méthode de comptage des murs
+            interpolation_method: Méthode d'interpolation de la grille
+            sampling: 'uniform' ou 'adaptive'
+            adaptive_tolerance_db: Tolérance de raffinement du mode adaptatif
+            workers: Nombre de processus pour la géométrie
+            tile_rows: Nombre de lignes de la grille par tâche parallèle
+            cmap: Palette de couleurs matplotlib
+            alpha: Opacité de la heatmap
+            render: Tracer la figure (False pour un calcul sans affichage)
+            render_mode: 'raster' (image à la résolution du plan) ou
+                'matplotlib' (figure de publication)
+            pyramid: Calculer sur le niveau de la pyramide du plan adapté au
+                pas (aperçu rapide, voir PlanEntry.level_for_step) au lieu de
+                la pleine résolution
+            stats: Dictionnaire optionnel complété avec l'état de chaque étape
+                ('hit', 'miss', 'fused', 'skipped' ou 'progressive') et les
+                statistiques du calcul
+
+        Returns:
+            HeatmapResult: Figure, récepteurs et grille interpolée
+
+        Raises:
+            PipelineError: Plan illisible, position Tx invalide ou aucun
+                espace libre
+        """
+        status = {}
+
+        # Étape 1 : plan (cache de prétraitement partagé, indexé par le contenu)
+        plan, plan_key, step = self._load_plan(uploaded_file, step, pyramid, status)
+        binary_img = plan.binary_img
+        img_height, img_width = binary_img.shape
+
+        tx_positions_px = tx_positions_to_pixels(tx_positions_m, real_length_m,
+                                                 real_width_m, img_width, img_height)
+
+        geometry_key = (plan.key, tuple(tx_positions_px), step, real_length_m,
+                        real_width_m, wall_method)
+        model_key = self._model_key(model, model_key)
+        adaptive = sampling == 'adaptive' and len(tx_positions_px) == 1
+        sampling_stats = {}
+
+        if adaptive:
+            # Étapes 2 et 3 fusionnées : la géométrie est évaluée à la demande
+            status['geometry'] = 'fused'
+            record('geometry', 'fused')
+            prediction_key = (geometry_key, frequency_mhz, model_key, 'adaptive',
+                              adaptive_tolerance_db)
+            tx_x_px, tx_y_px = tx_positions_px[0]
+            rx_data, sampling_stats = self._stage('prediction', prediction_key, lambda: (
+                generate_adaptive_rx_data(
+                    binary_img, tx_x_px, tx_y_px, real_length_m, real_width_m,
+                    frequency_mhz, step, model, tolerance_db=adaptive_tolerance_db,
+                    wall_method=wall_method
+                )
+            ), status)
+        else:
+            # Étape 2 : géométrie (indépendante de la fréquence et du modèle)
+            rx_x, rx_y, distances, walls = self._stage('geometry', geometry_key, lambda: (
+                run_parallel_geometry(binary_img, tx_positions_px, real_length_m,
+                                      real_width_m, step, wall_method,
+                                      workers=workers, tile_rows=tile_rows,
+                                      model=model)
+            ), status)
+            if len(rx_x) == 0:
+                raise PipelineError("Aucun espace libre trouvé.")
+
+            # Étape 3 : prédiction
+            prediction_key = (geometry_key, frequency_mhz, model_key, 'uniform')
+
+            rx_data = self._stage('prediction', prediction_key, lambda: (
+                run_parallel_prediction(binary_img, rx_x, rx_y, distances, walls,
+                                        frequency_mhz, step, model, workers=workers,
+                                        tile_rows=tile_rows)
+            ), status)
+
+        if rx_data.empty:
+            raise PipelineError("Aucun espace libre trouvé.")
+        count('receivers', len(rx_data))
+
+        # Étape 4 : grille interpolée
+        grid_key = (prediction_key, interpolation_method)
+        grid_x, grid_y, grid_path_loss = self._stage('grid', grid_key, lambda: (
+            create_interpolated_grid(rx_data, img_width, img_height, binary_img,
+                                     method=interpolation_method)
+        ), status)
+        if grid_path_loss is None:
+            raise PipelineError("Erreur lors de la création de la grille interpolée.")
+
+        # Étape 5 : figure
+        fig = None
+        if render:
+            figure_key = (grid_key, cmap, alpha, render_mode)
+            fig = self._stage('figure', figure_key, lambda: (
+                _render_figure(plan, grid_x, grid_y, grid_path_loss, rx_data,
+                               tx_positions_px, cmap, alpha, render_mode)
+            ), status)
+        else:
+            status['figure'] = 'skipped'
+            record('figure', 'skipped')
+
+        if stats is not None:
+            stats.update(sampling_stats)
+            stats['stages'] = status
+            stats['reused_stages'] = [name for name in STAGES
+                                      if status.get(name) == 'hit']
+        # Les grilles sont indexées (x, y) : retour à l'orientation de l'image
+        return HeatmapResult(fig, rx_data, grid_path_loss.T, tx_positions_px, plan_key,
+                             plan.factor)
+
+    def run_sweep(self, uploaded_file, real_length_m, real_width_m, tx_positions_m,
+                  frequencies_mhz, step, model, model_key=None, wall_method='exact',
+                  interpolation_method='lattice', workers=1, tile_rows=64,
+                  pyramid=False, max_rows=2_000_000, stats=None):
+        """
+        Calcule la grille du path loss pour plusieurs fréquences
+
+        La géométrie est celle de run() (même étape mémorisée : un balayage
+        après une génération, ou l'inverse, ne retrace aucun rayon) ; toutes
+        les lignes (fréquence, AP, récepteur) sont ensuite prédites en un
+        seul appel et chaque fréquence est interpolée dans un cube float32.
+        Le cube est mémorisé par fréquences, modèle et interpolation :
+        l'afficher ou l'exporter ne refait aucun calcul. L'échantillonnage
+        est toujours uniforme.
+
+        Args:
+            frequencies_mhz: Liste des fréquences en MHz
+            max_rows: Nombre maximal de lignes prédites par appel
+            (autres arguments : voir run)
+
+        Returns:
+            SweepResult: Cube (fréquence, hauteur, largeur) et récepteurs
+
+        Raises:
+            PipelineError: Plan illisible, position Tx invalide, aucune
+                fréquence ou aucun espace libre
+        """
+        frequencies_mhz = [float(frequency) for frequency in frequencies_mhz]
+        if not frequencies_mhz:
+            raise PipelineError("Aucune fréquence à balayer.")
+        status = {}
+
+        plan, plan_key, step = self._load_plan(uploaded_file, step, pyramid, status)
+        binary_img = plan.binary_img
+        img_height, img_width = binary_img.shape
+        tx_positions_px = tx_positions_to_pixels(tx_positions_m, real_length_m,
+                                                 real_width_m, img_width, img_height)
+
+        geometry_key = (plan.key, tuple(tx_positions_px), step, real_length_m,
+                        real_width_m, wall_method)
+        rx_x, rx_y, distances, walls = self._stage('geometry', geometry_key, lambda: (
+            run_parallel_geometry(binary_img, tx_positions_px, real_length_m,
+                                  real_width_m, step, wall_method,
+                                  workers=workers, tile_rows=tile_rows)
+        ), status)
+        if len(rx_x) == 0:
+            raise PipelineError("Aucun espace libre trouvé.")
+        count('receivers', len(rx_x))
+
+        def build():
+            path_loss, best_ap = predict_frequency_sweep(distances, walls,
+                                                         frequencies_mhz, model,
+                                                         max_rows)
+            result = SweepResult(frequencies_mhz, None, rx_x, rx_y, distances, walls,
+                                 path_loss, best_ap, step, tx_positions_px, plan_key,
+                                 plan.factor)
+            cube = np.empty((len(frequencies_mhz), img_height, img_width),
+                            dtype=np.float32)
+            for index in range(len(frequencies_mhz)):
+                check_cancelled()
+                _, _, grid = create_interpolated_grid(
+                    result.rx_data(index), img_width, img_height, binary_img,
+                    method=interpolation_method
+                )
+                cube[index] = grid.T
+            result.cube = cube
+            return result
+
+        sweep_key = (geometry_key, tuple(frequencies_mhz),
+                     self._model_key(model, model_key), interpolation_method)
+        result = self._stage('sweep', sweep_key, build, status)
+        if stats is not None:
+            stats['stages'] = status
+            stats['reused_stages'] = [name for name in STAGES + ('sweep',)
+                                      if status.get(name) == 'hit']
+        return result
+
+    def run_progressive(self, uploaded_file, real_length_m, real_width_m,
+                        tx_positions_m, frequency_mhz, step, model, model_key=None,
+                        wall_method='exact', interpolation_method='cubic',
+                        sampling='uniform', adaptive_tolerance_db=2.0, workers=1,
+                        tile_rows=64, cmap='jet', alpha=0.7, render_mode='raster',
+                        pyramid=False, stats=None, coarsest_step=32):
+        """
+        Exécute le pipeline du plus grossier au plus fin (voir progressive_steps)
+
+        Chaque niveau ne calcule la géométrie et la prédiction que des nœuds
+        absents du niveau précédent, puis produit un aperçu (grille
+        'lattice', rendu 'raster'). Les récepteurs accumulés alimentent
+        ensuite les caches de géométrie et de prédiction du pas demandé, et
+        le dernier niveau est produit par run() avec tous les paramètres :
+        le résultat final est celui d'une exécution directe. Avec le
+        balayage radial, qui dépend de l'ensemble des récepteurs, seuls les
+        aperçus réutilisent les niveaux précédents.
+
+        Les niveaux sont calculés sur le plan en pleine résolution ; les
+        nœuds de chaque niveau sont répartis entre workers processus par
+        groupes de tile_rows lignes de la grille (run_parallel_rx_geometry),
+        ce qui concerne surtout le dernier niveau, qui porte environ les
+        trois quarts des récepteurs. Si la géométrie du pas demandé est déjà
+        mémorisée, ou en échantillonnage adaptatif ou avec la pyramide
+        (géométrie différente), seul le résultat final est produit.
+
+        Args:
+            coarsest_step: Pas maximal du premier aperçu
+            (autres arguments : voir run)
+
+        Yields:
+            tuple: (pas, HeatmapResult) pour chaque niveau, le dernier étant
+            le résultat final au pas demandé
+        """
+        final = dict(
+            model_key=model_key, wall_method=wall_method,
+            interpolation_method=interpolation_method, sampling=sampling,
+            adaptive_tolerance_db=adaptive_tolerance_db, workers=workers,
+            tile_rows=tile_rows, cmap=cmap, alpha=alpha, render_mode=render_mode,
+            pyramid=pyramid, stats=stats
+        )
+        plan, plan_key, _ = self._load_plan(uploaded_file, step, False, {})
+        binary_img = plan.binary_img
+        img_height, img_width = binary_img.shape
+        tx_positions_px = tx_positions_to_pixels(tx_positions_m, real_length_m,
+                                                 real_width_m, img_width, img_height)
+        geometry_key = (plan.key, tuple(tx_positions_px), step, real_length_m,
+                        real_width_m, wall_method)
+        adaptive = sampling == 'adaptive' and len(tx_positions_px) == 1
+        levels = progressive_steps(step, coarsest_step)
+        # Le comptage exact est propre à chaque récepteur : les nœuds des
+        # niveaux grossiers donnent exactement la géométrie du pas demandé.
+        # Le balayage radial dépend de l'ensemble des récepteurs : le dernier
+        # niveau est alors calculé directement.
+        exact = wall_method == 'exact'
+
+        if len(levels) > 1 and not adaptive and not pyramid \
+                and geometry_key not in self.caches['geometry']:
+            rx_x = np.empty(0, dtype=np.int32)
+            rx_y = np.empty(0, dtype=np.int32)
+            distances = np.empty((len(tx_positions_px), 0), dtype=np.float32)
+            walls = np.empty((len(tx_positions_px), 0), dtype=np.int16)
+            predictions = []
+            previous_step = None
+            for level_step in (levels if exact else levels[:-1]):
+                check_cancelled()
+                with measure(f'preview_{level_step}'):
+                    # Nœuds du niveau absents du niveau précédent
+                    new_x, new_y = lattice_receivers(binary_img, level_step)
+                    if previous_step is not None:
+                        new = (new_x % previous_step != 0) | (new_y % previous_step != 0)
+                        new_x, new_y = new_x[new], new_y[new]
+                    new_distances, new_walls = run_parallel_rx_geometry(
+                        binary_img, tx_positions_px, new_x, new_y, real_length_m,
+                        real_width_m, wall_method, workers=workers,
+                        rx_per_task=tile_rows * -(-img_width // level_step),
+                        model=model
+                    )
+                    if len(new_x):
+                        predictions.append(run_parallel_prediction(
+                            binary_img, new_x, new_y, new_distances, new_walls,
+                            frequency_mhz, level_step, model, workers=workers,
+                            tile_rows=tile_rows
+                        ))
+                    rx_x = np.concatenate((rx_x, new_x)).astype(new_x.dtype)
+                    rx_y = np.concatenate((rx_y, new_y)).astype(new_y.dtype)
+                    distances = np.concatenate((distances, new_distances), axis=1)
+                    walls = np.concatenate((walls, new_walls), axis=1)
+                    previous_step = level_step
+                    if level_step == step or not predictions:
+                        continue
+
+                    rx_data = _merge_predictions(predictions, level_step)
+                    _, _, grid = create_interpolated_grid(
+                        rx_data, img_width, img_height, binary_img, method='lattice'
+                    )
+                    preview = _render_figure(plan, None, None, grid, rx_data,
+                                             tx_positions_px, cmap, alpha, 'raster')
+                yield level_step, HeatmapResult(preview, rx_data, grid.T,
+                                                tx_positions_px, plan_key)
+
+            if exact:
+                # Réordonner ligne par ligne, comme le calcul direct, et mémoriser
+                order = np.lexsort((rx_x, rx_y))
+                geometry = (rx_x[order], rx_y[order], distances[:, order],
+                            walls[:, order])
+                self.caches['geometry'].put(geometry_key, geometry)
+                if predictions:
+                    prediction_key = (geometry_key, frequency_mhz,
+                                      self._model_key(model, model_key), 'uniform')
+                    rx_data = _merge_predictions(predictions, step)
+                    self.caches['prediction'].put(prediction_key,
+                                                  _take_receivers(rx_data, order))
+            seeded = exact
+        else:
+            seeded = False
+
+        result = self.run(uploaded_file, real_length_m, real_width_m, tx_positions_m,
+                          frequency_mhz, step, model, **final)
+        if seeded and stats is not None:
+            # Étapes calculées par les niveaux, pas réutilisées d'une génération
+            for name in ('geometry', 'prediction'):
+                if stats['stages'].get(name) == 'hit':
+                    stats['stages'][name] = 'progressive'
+            stats['reused_stages'] = [name for name in STAGES
+                                      if stats['stages'].get(name) == 'hit']
+        yield step, result
+
+
+def _merge_predictions(predictions, step):
+    """Concatène les RxData prédits des niveaux successifs"""
+    def column(name):
+        values = [getattr(rx, name) for rx in predictions]
+        return None if values[0] is None else np.concatenate(values)
+
+    return RxData(column('rx_x'), column('rx_y'), column('distance'),
+                  column('num_walls'), predictions[0].frequency, step,
+                  column('path_loss'), column('best_ap'))
+
+
+def _take_receivers(rx_data, order):
+    """Récepteurs d'un RxData réordonnés selon order"""
+    def take(values):
+        return None if values is None else values[order]
+
+    return RxData(take(rx_data.rx_x), take(rx_data.rx_y), take(rx_data.distance),
+                  take(rx_data.num_walls), rx_data.frequency, rx_data.step,
+                  take(rx_data.path_loss), take(rx_data.best_ap))
+
+
+def _render_figure(plan, grid_x, grid_y, grid_path_loss, rx_data, tx_positions_px,
+                   cmap, alpha, render_mode):
+    """Trace la heatmap selon le mode de rendu"""
+    img_height, img_width = plan.binary_img.shape
+    if render_mode == 'raster':
+        lattice = rx_to_lattice(rx_data.rx_x, rx_data.rx_y, rx_data.path_loss,
+                                rx_data.step, img_width, img_height)
+        image = render_heatmap(plan.gray_img, grid_path_loss.T, rx_data.path_loss,
+                               tx_positions_px, lattice, rx_data.step, cmap=cmap,
+                               alpha=alpha)
+        image.flags.writeable = False  # Image partagée par le cache
+        return image
+    if render_mode != 'matplotlib':
+        raise ValueError(f"Mode de rendu inconnu : {render_mode}")
+
+    tx_xs = [x for x, _ in tx_positions_px]
+    tx_ys = [y for _, y in tx_positions_px]
+    if len(tx_positions_px) == 1:
+        tx_xs, tx_ys = tx_xs[0], tx_ys[0]
+    return create_heatmap_plot(plan.binary_img, plan.gray_img, grid_x, grid_y,
+                               grid_path_loss, rx_data.path_loss, tx_xs, tx_ys,
+                               img_width, img_height, cmap=cmap, alpha=alpha)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline(max_entries=4):
+    """
+    Retourne le pipeline partagé du processus
+
+    Args:
+        max_entries: Nombre de résultats conservés par étape (à la création)
+
+    Returns:
+        HeatmapPipeline: Instance unique
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = HeatmapPipeline(max_entries)
+        return _pipeline
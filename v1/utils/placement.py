@@ -0,0 +1,250 @@
+# utils/placement.py
+"""
+Module pour le placement automatique des points d'accès (maximisation de la couverture)
+"""
+
+import time
+
+import numpy as np
+from utils.jobs import check_cancelled
+from utils.parallel import run_parallel_ap_geometry
+from utils.path_loss_calculator import lattice_receivers, predict_ap_path_loss
+from utils.plan_cache import MIN_LEVEL_STEP
+
+
+class PlacementResult:
+    """
+    Résultat d'un placement automatique
+
+    Attributes:
+        tx_positions_px: Positions [(x, y), ...] des AP en pixels du plan
+        tx_positions_m: Positions [(x_m, y_m), ...] des AP en mètres
+        coverage: Fraction des récepteurs couverts (path loss <= seuil)
+        history: Couverture après chaque AP ajouté par la sélection gloutonne
+        swaps: Nombre d'échanges retenus par la recherche locale
+        candidates: Nombre d'emplacements candidats évalués
+        receivers: Nombre de récepteurs de la grille d'évaluation
+        seconds: Durée totale du calcul
+    """
+
+    def __init__(self, tx_positions_px, tx_positions_m, coverage, history, swaps,
+                 candidates, receivers, seconds):
+        self.tx_positions_px = tx_positions_px
+        self.tx_positions_m = tx_positions_m
+        self.coverage = coverage
+        self.history = history
+        self.swaps = swaps
+        self.candidates = candidates
+        self.receivers = receivers
+        self.seconds = seconds
+
+
+def _score(covered, path_loss, chosen):
+    """Récepteurs couverts et somme du meilleur path loss d'un ensemble d'AP"""
+    return (int(covered[chosen].any(axis=0).sum()),
+            float(path_loss[chosen].min(axis=0).sum(dtype=np.float64)))
+
+
+def _best_candidate(covered, path_loss, base_covered, base_best, excluded):
+    """
+    Candidat maximisant la couverture ajoutée à une base
+
+    À couverture égale, le candidat qui réduit le plus la somme du meilleur
+    path loss est retenu.
+
+    Returns:
+        tuple: (indice, récepteurs couverts, somme du meilleur path loss)
+    """
+    gains = (covered | base_covered).sum(axis=1)
+    totals = np.minimum(path_loss, base_best).sum(axis=1, dtype=np.float64)
+    gains[excluded] = -1
+    best = int(np.lexsort((totals, -gains))[0])
+    return best, int(gains[best]), float(totals[best])
+
+
+def select_greedy(covered, path_loss, num_aps):
+    """
+    Sélection gloutonne des emplacements
+
+    La couverture (union des récepteurs couverts) est sous-modulaire : la
+    sélection gloutonne garantit au moins 63 % (1 - 1/e) de la couverture
+    optimale. Chaque étape évalue tous les candidats en une opération sur
+    la matrice de couverture.
+
+    Args:
+        covered: Tableau booléen (nb_candidats, nb_récepteurs)
+        path_loss: Path loss (nb_candidats, nb_récepteurs) du départage
+        num_aps: Nombre d'AP à placer
+
+    Returns:
+        tuple: (indices retenus, récepteurs couverts après chaque ajout)
+    """
+    num_rx = covered.shape[1]
+    base_covered = np.zeros(num_rx, dtype=bool)
+    base_best = np.full(num_rx, np.inf, dtype=np.float32)
+    chosen, history = [], []
+    for _ in range(min(num_aps, covered.shape[0])):
+        best, gain, _ = _best_candidate(covered, path_loss, base_covered, base_best,
+                                        chosen)
+        chosen.append(best)
+        base_covered |= covered[best]
+        np.minimum(base_best, path_loss[best], out=base_best)
+        history.append(gain)
+    return chosen, history
+
+
+def refine_swaps(covered, path_loss, chosen, max_rounds=10):
+    """
+    Recherche locale : remplace un AP à la fois par le meilleur candidat
+
+    Pour chaque AP, les autres restent fixes et tous les candidats sont
+    évalués en une opération ; l'échange est retenu s'il améliore la
+    couverture (ou, à couverture égale, le meilleur path loss). Les
+    passes s'arrêtent dès qu'aucun échange n'améliore le placement.
+
+    Args:
+        covered: Tableau booléen (nb_candidats, nb_récepteurs)
+        path_loss: Path loss (nb_candidats, nb_récepteurs)
+        chosen: Indices de départ (modifiés sur place)
+        max_rounds: Nombre maximal de passes
+
+    Returns:
+        int: Nombre d'échanges retenus
+    """
+    num_rx = covered.shape[1]
+    swaps = 0
+    current = _score(covered, path_loss, chosen)
+    for _ in range(max_rounds):
+        improved = False
+        for i in range(len(chosen)):
+            check_cancelled()
+            others = chosen[:i] + chosen[i + 1:]
+            if others:
+                base_covered = covered[others].any(axis=0)
+                base_best = path_loss[others].min(axis=0)
+            else:
+                base_covered = np.zeros(num_rx, dtype=bool)
+                base_best = np.full(num_rx, np.inf, dtype=np.float32)
+            best, gain, total = _best_candidate(covered, path_loss, base_covered,
+                                                base_best, others)
+            if (gain, -total) > (current[0], -current[1]) and best != chosen[i]:
+                chosen[i] = best
+                current = (gain, total)
+                swaps += 1
+                improved = True
+        if not improved:
+            break
+    return swaps
+
+
+def placement_lattices(binary_img, receiver_step, multiple, max_pairs):
+    """
+    Grilles des candidats et des récepteurs, élargies si la matrice dépasse max_pairs
+
+    Le pas des candidats est un multiple de celui des récepteurs : chaque
+    candidat est aussi un récepteur. Tant que le nombre de paires
+    (candidats x récepteurs) dépasse max_pairs, les deux pas sont élargis.
+
+    Args:
+        binary_img: Image binaire du plan
+        receiver_step: Pas de la grille des récepteurs en pixels
+        multiple: Rapport entre le pas des candidats et celui des récepteurs
+        max_pairs: Nombre maximal de paires (candidat, récepteur)
+
+    Returns:
+        tuple: (cand_x, cand_y, rx_x, rx_y, candidate_step, receiver_step)
+    """
+    while True:
+        cand_x, cand_y = lattice_receivers(binary_img, receiver_step * multiple)
+        rx_x, rx_y = lattice_receivers(binary_img, receiver_step)
+        if len(cand_x) * len(rx_x) <= max_pairs or len(rx_x) <= 1:
+            return cand_x, cand_y, rx_x, rx_y, receiver_step * multiple, receiver_step
+        receiver_step = max(receiver_step + 1, int(receiver_step * 1.25))
+
+
+def optimize_placement(plan, num_aps, threshold_db, real_length_m, real_width_m,
+                       frequency_mhz, model, candidate_spacing_m=2.0,
+                       receiver_spacing_m=1.0, max_pairs=500_000,
+                       wall_method='exact', workers=1, max_rounds=10,
+                       max_rows=2_000_000):
+    """
+    Place num_aps points d'accès pour maximiser la surface couverte
+
+    Les emplacements candidats sont les nœuds libres d'une grille espacée
+    de candidate_spacing_m ; la couverture est évaluée sur les récepteurs
+    d'une grille espacée de receiver_spacing_m (grilles élargies si leur
+    produit dépasse max_pairs). Le coût dépend ainsi de la surface de
+    l'étage et non de la résolution de l'image : le calcul se fait sur le
+    niveau de la pyramide du plan le plus réduit où deux récepteurs restent
+    séparés d'au moins MIN_LEVEL_STEP pixels.
+
+    La géométrie de tous les candidats est calculée en une fois (répartie
+    entre processus), puis leur path loss est prédit par lots : la matrice
+    (candidats x récepteurs) est réutilisée par la sélection gloutonne et
+    par chaque échange de la recherche locale, sans nouvelle prédiction.
+
+    Args:
+        plan: PlanEntry du plan (voir load_plan)
+        num_aps: Nombre d'AP à placer
+        threshold_db: Path loss maximal d'un récepteur couvert
+        real_length_m: Longueur réelle en mètres
+        real_width_m: Largeur réelle en mètres
+        frequency_mhz: Fréquence en MHz
+        model: Modèle ML (ou objet exposant predict(X))
+        candidate_spacing_m: Espacement des emplacements candidats en mètres
+        receiver_spacing_m: Espacement des récepteurs d'évaluation en mètres
+        max_pairs: Nombre maximal de paires (candidat, récepteur) évaluées
+        wall_method: Méthode de comptage des murs
+        workers: Nombre de processus pour la géométrie des candidats
+        max_rounds: Nombre maximal de passes de la recherche locale
+        max_rows: Nombre maximal de lignes prédites par appel
+
+    Returns:
+        PlacementResult: Positions retenues et couverture obtenue
+
+    Raises:
+        ValueError: Aucun emplacement candidat ou aucun récepteur libre
+    """
+    start = time.perf_counter()
+    full_height, full_width = plan.binary_img.shape
+    pixels_per_m = (full_width / real_length_m + full_height / real_width_m) / 2
+    receiver_step = receiver_spacing_m * pixels_per_m
+
+    # Niveau le plus réduit gardant au moins MIN_LEVEL_STEP pixels entre
+    # deux récepteurs (les grilles sont redéfinies sur ce niveau)
+    factor = 1
+    while receiver_step / (factor * 2) >= MIN_LEVEL_STEP:
+        factor *= 2
+    level = plan.level(factor)
+    binary_img = level.binary_img
+    cand_x, cand_y, rx_x, rx_y, _, _ = placement_lattices(
+        binary_img, max(1, round(receiver_step / factor)),
+        max(1, round(candidate_spacing_m / receiver_spacing_m)), max_pairs
+    )
+    if len(cand_x) == 0 or len(rx_x) == 0:
+        raise ValueError("Aucun espace libre pour placer les points d'accès.")
+
+    candidates_px = [(int(x), int(y)) for x, y in zip(cand_x, cand_y)]
+    distances, walls = run_parallel_ap_geometry(
+        binary_img, candidates_px, rx_x, rx_y, real_length_m, real_width_m,
+        wall_method, workers=workers
+    )
+    check_cancelled()
+    path_loss = predict_ap_path_loss(distances, walls, frequency_mhz, model, max_rows)
+    covered = path_loss <= threshold_db
+
+    chosen, history = select_greedy(covered, path_loss, num_aps)
+    swaps = refine_swaps(covered, path_loss, chosen, max_rounds)
+    num_covered, _ = _score(covered, path_loss, chosen)
+
+    # Retour aux pixels et aux mètres du plan complet
+    tx_positions_px = [(candidates_px[i][0] * factor, candidates_px[i][1] * factor)
+                       for i in chosen]
+    tx_positions_m = [(x * real_length_m / full_width, y * real_width_m / full_height)
+                      for x, y in tx_positions_px]
+
+    return PlacementResult(
+        tx_positions_px, tx_positions_m, num_covered / len(rx_x),
+        [gain / len(rx_x) for gain in history], swaps, len(candidates_px),
+        len(rx_x), time.perf_counter() - start
+    )
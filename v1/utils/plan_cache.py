@@ -0,0 +1,337 @@
+# utils/plan_cache.py
+"""
+Module pour la mise en cache des plans d'étage prétraités
+"""
+
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Pas minimal (en pixels du niveau) conservé par level_for_step
+MIN_LEVEL_STEP = 4
+
+# Nom de l'index de l'aperçu en couleurs du plan d'origine (voir thumbnail)
+COLOR_PREVIEW_INDEX = 'color_preview'
+
+# Entrées vivantes indexées par l'identité de leur carte des murs (voir
+# plan_for_wall_map) ; une entrée disparaît d'ici dès qu'elle est libérée
+_entries_by_wall_map = weakref.WeakValueDictionary()
+
+
+def make_plan_key(data, threshold, max_value):
+    """
+    Construit la clé de cache d'un plan à partir de son contenu
+
+    Args:
+        data: Octets bruts du fichier image
+        threshold: Seuil de binarisation
+        max_value: Valeur attribuée aux murs après binarisation
+
+    Returns:
+        str: Empreinte SHA-256 du contenu et des paramètres de seuillage
+    """
+    digest = hashlib.sha256(data)
+    digest.update(f"|threshold={threshold}|max_value={max_value}".encode())
+    return digest.hexdigest()
+
+
+def _nbytes(value):
+    """Taille mémoire approximative d'un tableau ou d'un objet indexé"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    return getattr(value, 'nbytes', 0)
+
+
+def _halve(binary_img, gray_img):
+    """
+    Réduit un niveau d'un facteur 2 par moyenne sur les surfaces
+
+    Le niveau de gris est moyenné ; pour la carte binaire, c'est la
+    couverture de murs qui l'est, et un pixel réduit est un mur dès qu'une
+    partie de sa surface l'est : un mur d'un pixel ne disparaît pas.
+    """
+    img_height, img_width = binary_img.shape
+    size = (-(-img_width // 2), -(-img_height // 2))
+    gray = cv2.resize(gray_img, size, interpolation=cv2.INTER_AREA)
+    coverage = cv2.resize(binary_img * np.uint8(255), size,
+                          interpolation=cv2.INTER_AREA)
+    return (coverage > 0).astype(np.uint8), gray
+
+
+def plan_for_wall_map(binary_img):
+    """
+    Entrée (ou niveau de pyramide) dont binary_img est la carte des murs
+
+    Les fonctions de calcul ne reçoivent que la carte des murs : elles
+    retrouvent ainsi les index du plan (ex: carte des distances aux murs)
+    sans changer de signature.
+
+    Args:
+        binary_img: Carte binaire des murs
+
+    Returns:
+        PlanEntry: Entrée propriétaire du tableau, ou None (tableau hors cache)
+    """
+    entry = _entries_by_wall_map.get(id(binary_img))
+    if entry is None or entry.binary_img is not binary_img:
+        return None
+    return entry
+
+
+class PlanEntry:
+    """
+    Plan d'étage prétraité conservé en cache
+
+    Le plan n'est décodé qu'une fois ; les niveaux réduits de la pyramide
+    (facteurs 2, 4, 8...) et les vignettes sont construits à la demande et
+    conservés dans les index de l'entrée.
+
+    Attributes:
+        key: Clé de cache (voir make_plan_key)
+        binary_img: Carte binaire des murs (lecture seule)
+        gray_img: Image en niveaux de gris (lecture seule)
+        factor: Facteur de réduction par rapport au plan d'origine (1 =
+            pleine résolution)
+        indexes: Structures d'accélération dérivées du plan, par nom
+    """
+
+    def __init__(self, key, binary_img, gray_img, factor=1):
+        self.key = key
+        self.binary_img = binary_img
+        self.gray_img = gray_img
+        self.factor = factor
+        self.indexes = {}
+        self._cache = None
+        for array in (binary_img, gray_img):
+            array.flags.writeable = False
+        _entries_by_wall_map[id(binary_img)] = self
+
+    @property
+    def nbytes(self):
+        """int: Mémoire occupée par les images et les index"""
+        total = self.binary_img.nbytes + self.gray_img.nbytes
+        return total + sum(_nbytes(index) for index in self.indexes.values())
+
+    def get_index(self, name, builder):
+        """
+        Retourne une structure d'accélération, en la construisant au besoin
+
+        Args:
+            name: Nom de l'index
+            builder: Fonction appelée avec l'entrée pour construire l'index
+
+        Returns:
+            Index construit ou récupéré du cache
+        """
+        if name not in self.indexes:
+            self.indexes[name] = builder(self)
+            if self._cache is not None:
+                self._cache.refresh(self)
+        return self.indexes[name]
+
+    def level(self, factor):
+        """
+        Niveau de la pyramide réduit d'un facteur donné
+
+        Chaque niveau est obtenu en divisant le précédent par 2 (voir
+        _halve) ; les coordonnées d'un niveau valent celles du plan
+        divisées par factor.
+
+        Args:
+            factor: Facteur de réduction (puissance de 2)
+
+        Returns:
+            PlanEntry: Niveau demandé (l'entrée elle-même pour factor=1)
+        """
+        if factor & (factor - 1) or factor < 1:
+            raise ValueError(f"Facteur de pyramide invalide : {factor}")
+        if factor == 1:
+            return self
+
+        def build(entry):
+            parent = entry.level(factor // 2)
+            binary_img, gray_img = _halve(parent.binary_img, parent.gray_img)
+            return PlanEntry(f"{entry.key}@{factor}", binary_img, gray_img,
+                             entry.factor * factor)
+
+        return self.get_index(f'level{factor}', build)
+
+    def level_for_step(self, step, min_step=MIN_LEVEL_STEP):
+        """
+        Niveau le plus réduit sur lequel une grille de pas step reste exacte
+
+        Le facteur retenu divise step (les récepteurs tombent sur les mêmes
+        positions) et laisse au moins min_step pixels entre deux récepteurs
+        du niveau. Par exemple, step=32 donne le niveau 8 et step=5 la
+        pleine résolution.
+
+        Args:
+            step: Pas de la grille en pixels du plan
+            min_step: Pas minimal en pixels du niveau
+
+        Returns:
+            PlanEntry: Niveau de la pyramide
+        """
+        factor = 1
+        while step % (factor * 2) == 0 and step // (factor * 2) >= min_step:
+            factor *= 2
+        return self.level(factor)
+
+    def thumbnail(self, width, height, color=False):
+        """
+        Vignette aux dimensions demandées (fond du canvas)
+
+        La vignette est réduite par moyenne sur les surfaces depuis le plus
+        petit niveau de la pyramide encore plus grand qu'elle. En couleurs,
+        elle est réduite depuis l'aperçu conservé au décodage (index
+        COLOR_PREVIEW_INDEX) s'il est au moins aussi grand ; sinon elle
+        reste en niveaux de gris.
+
+        Returns:
+            np.ndarray: Image uint8 (height, width), ou (height, width, 3)
+            en couleurs (lecture seule)
+        """
+        preview = self.indexes.get(COLOR_PREVIEW_INDEX) if color else None
+        if preview is not None and preview.shape[1] >= width \
+                and preview.shape[0] >= height:
+            def build_color(entry):
+                thumbnail = cv2.resize(preview, (width, height),
+                                       interpolation=cv2.INTER_AREA)
+                thumbnail.flags.writeable = False
+                return thumbnail
+
+            return self.get_index(f'thumbnail{width}x{height}rgb', build_color)
+
+        img_height, img_width = self.gray_img.shape
+        factor = 1
+        while img_width // (factor * 2) >= width and img_height // (factor * 2) >= height:
+            factor *= 2
+
+        def build(entry):
+            source = entry.level(factor).gray_img
+            thumbnail = cv2.resize(source, (width, height),
+                                   interpolation=cv2.INTER_AREA)
+            thumbnail.flags.writeable = False
+            return thumbnail
+
+        return self.get_index(f'thumbnail{width}x{height}', build)
+
+
+class PlanCache:
+    """
+    Cache LRU des plans prétraités, borné en mémoire
+
+    Les entrées les moins récemment utilisées sont évincées dès que la taille
+    totale dépasse max_bytes. Le cache est partagé entre les sessions
+    Streamlit d'un même processus, d'où le verrou.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def current_bytes(self):
+        """int: Mémoire totale des entrées en cache"""
+        return sum(self._sizes.values())
+
+    def get(self, key):
+        """
+        Récupère une entrée et la marque comme récemment utilisée
+
+        Returns:
+            PlanEntry ou None si la clé est absente
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry):
+        """Ajoute une entrée puis applique la politique d'éviction"""
+        with self._lock:
+            entry._cache = self
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            self._sizes[entry.key] = entry.nbytes
+            self._evict()
+
+    def refresh(self, entry):
+        """Met à jour la taille d'une entrée (après ajout d'un index)"""
+        with self._lock:
+            if entry.key in self._entries:
+                self._sizes[entry.key] = entry.nbytes
+                self._evict()
+
+    def clear(self):
+        """Vide le cache sans réinitialiser les compteurs"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+
+    def stats(self):
+        """
+        Retourne les compteurs du cache
+
+        Returns:
+            dict: Succès, échecs, évictions, nombre d'entrées et mémoire utilisée
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _evict(self):
+        # Toujours conserver l'entrée la plus récente, même si elle dépasse seule la limite
+        while len(self._entries) > 1 and self.current_bytes > self.max_bytes:
+            key, entry = self._entries.popitem(last=False)
+            del self._sizes[key]
+            entry._cache = None
+            self.evictions += 1
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_plan_cache(max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Retourne le cache de plans partagé par le processus
+
+    Args:
+        max_bytes: Limite mémoire utilisée à la création du cache
+
+    Returns:
+        PlanCache: Cache partagé
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PlanCache(max_bytes)
+        return _default_cache
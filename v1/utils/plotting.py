@@ -0,0 +1,69 @@
+# utils/plotting.py
+"""
+Module pour le tracé matplotlib de la heatmap (sans dépendance à Streamlit)
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+def create_heatmap_plot(binary_img, original_img, grid_x, grid_y, grid_path_loss,
+                       path_loss_values, tx_x_px, tx_y_px, img_width, img_height,
+                       cmap='jet', alpha=0.7):
+    """
+    Crée le plot matplotlib de la heatmap
+    
+    tx_x_px et tx_y_px peuvent être des scalaires ou des listes (multi-WiFi).
+    
+    Args:
+        cmap: Palette de couleurs matplotlib
+        alpha: Opacité de la heatmap
+    
+    Returns:
+        matplotlib.figure.Figure: Figure de la heatmap
+    """
+    fig, ax = plt.subplots(figsize=(12, 10))
+    
+    # Afficher le plan d'étage en arrière-plan
+    ax.imshow(original_img, cmap='gray', alpha=0.6, extent=[0, img_width, img_height, 0])
+    
+    # Afficher la heatmap interpolée
+    im = ax.imshow(grid_path_loss.T, extent=[0, img_width, img_height, 0],
+                  cmap=cmap, alpha=alpha, origin='upper',
+                  vmin=path_loss_values.min() if path_loss_values.size > 0 else None,
+                  vmax=path_loss_values.max() if path_loss_values.size > 0 else None)
+    
+    # Ajouter la barre de couleur
+    plt.colorbar(im, label='Path Loss (dB)')
+    
+    # Visualisation Tx améliorée (un ou plusieurs points WiFi)
+    tx_xs = np.atleast_1d(tx_x_px)
+    tx_ys = np.atleast_1d(tx_y_px)
+    ax.scatter(tx_xs, tx_ys, color='red', s=200, marker='*',
+              edgecolors='black', linewidth=2, label='Tx (WiFi)')
+    for i, (x, y) in enumerate(zip(tx_xs, tx_ys)):
+        label = 'Tx' if len(tx_xs) == 1 else f'Tx{i + 1}'
+        ax.text(x, y - 10, label, color='red', fontsize=14, ha='center')
+    
+    # Ajouter des contours si possible
+    if path_loss_values.size > 50 and np.std(path_loss_values) > 1:
+        try:
+            min_pl = path_loss_values.min() if path_loss_values.size > 0 else 30
+            max_pl = path_loss_values.max() if path_loss_values.size > 0 else 150
+            levels = np.linspace(min_pl, max_pl, 10)
+            
+            # Axes 1D : compatible avec les grilles pleines (mgrid) ou creuses (ogrid)
+            CS = ax.contour(np.arange(img_width), np.arange(img_height),
+                           grid_path_loss.T, levels=levels,
+                           colors='white', alpha=0.5)
+            ax.clabel(CS, inline=1, fontsize=10, colors='white', fmt='%1.0f dB')
+        except Exception:
+            pass  # Continuer sans contours si le tracé échoue
+    
+    ax.set_title('Path Loss Heatmap')
+    ax.set_xlabel('Position X (pixels)')
+    ax.set_ylabel('Position Y (pixels)')
+    ax.legend()
+    plt.tight_layout()
+    
+    return fig
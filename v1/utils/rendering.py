@@ -0,0 +1,232 @@
+# utils/rendering.py
+"""
+Module pour le rendu raster rapide de la heatmap (sans figure matplotlib)
+"""
+
+from functools import lru_cache
+
+import cv2
+import numpy as np
+from matplotlib import colormaps
+from scipy.ndimage import distance_transform_edt
+
+
+PLAN_ALPHA = 0.6
+CONTOUR_COLOR = (255, 255, 255)
+TX_COLOR = (255, 0, 0)
+COLORBAR_WIDTH = 90
+
+
+@lru_cache(maxsize=16)
+def colormap_lut(cmap='jet', size=256):
+    """
+    Table de correspondance index -> couleur d'une palette matplotlib
+
+    Args:
+        cmap: Nom de la palette
+        size: Nombre de couleurs
+
+    Returns:
+        np.ndarray: Tableau uint8 (size, 3) en RGB (lecture seule)
+    """
+    colors = colormaps[cmap].resampled(size)(np.arange(size))[:, :3]
+    lut = np.rint(colors * 255).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+def _value_range(values):
+    """Bornes de la palette (min et max du path loss prédit)"""
+    values = np.asarray(values)
+    if values.size == 0:
+        return 30.0, 150.0
+    vmin, vmax = float(np.nanmin(values)), float(np.nanmax(values))
+    return vmin, max(vmax, vmin + 1e-6)
+
+
+def colorize(grid, vmin, vmax, cmap='jet'):
+    """
+    Convertit une grille de path loss en couleurs via la table de la palette
+
+    Args:
+        grid: Grille float (hauteur, largeur), NaN hors des zones calculées
+        vmin: Valeur associée à la première couleur
+        vmax: Valeur associée à la dernière couleur
+        cmap: Nom de la palette
+
+    Returns:
+        tuple: (rgb uint8 (H, W, 3), masque des valeurs valides)
+    """
+    lut = colormap_lut(cmap)
+    valid = np.isfinite(grid)
+    scale = (len(lut) - 1) / (vmax - vmin)
+    index = np.where(valid, grid, vmin).astype(np.float32)
+    index -= vmin
+    index *= scale
+    np.clip(index, 0, len(lut) - 1, out=index)
+    return lut[index.astype(np.uint8)], valid
+
+
+def _fill_nan_nearest(lattice):
+    """Remplace les NaN par la valeur valide la plus proche"""
+    invalid = np.isnan(lattice)
+    if not invalid.any() or invalid.all():
+        return np.nan_to_num(lattice)
+    indices = distance_transform_edt(invalid, return_distances=False,
+                                     return_indices=True)
+    return lattice[tuple(indices)]
+
+
+def contour_lines(lattice, step, levels, upsample=4):
+    """
+    Lignes de niveau calculées sur la grille grossière des récepteurs
+
+    Les zones sans récepteur (murs) sont comblées par la valeur voisine la
+    plus proche pour que les lignes ne suivent pas les murs, et les segments
+    le long du bord de la grille sont supprimés.
+
+    Args:
+        lattice: Grille float32 (lignes, colonnes) des nœuds, NaN aux murs
+        step: Pas de la grille en pixels
+        levels: Valeurs des lignes de niveau
+        upsample: Sur-échantillonnage bilinéaire avant le seuillage
+
+    Returns:
+        list: (niveau, [polylignes int32 (N, 1, 2) en pixels du plan])
+    """
+    upsample = max(1, min(upsample, step))
+    filled = _fill_nan_nearest(lattice)
+    if upsample > 1:
+        filled = cv2.resize(filled, (filled.shape[1] * upsample,
+                                     filled.shape[0] * upsample),
+                            interpolation=cv2.INTER_LINEAR)
+    rows, cols = filled.shape
+    scale = step / upsample
+
+    lines = []
+    for level in levels:
+        mask = (filled >= level).astype(np.uint8)
+        contours, _ = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+        polylines = []
+        for contour in contours:
+            points = contour[:, 0, :]
+            inside = ((points[:, 0] > 0) & (points[:, 0] < cols - 1)
+                      & (points[:, 1] > 0) & (points[:, 1] < rows - 1))
+            # Découper la ligne aux points situés sur le bord de la grille
+            breaks = np.flatnonzero(~inside)
+            if breaks.size == 0:
+                points = np.vstack((points, points[:1]))  # Ligne fermée
+                inside = np.ones(len(points), dtype=bool)
+            for segment, keep in zip(np.split(points, breaks), np.split(inside, breaks)):
+                segment = segment[keep]
+                if len(segment) >= 2:
+                    polylines.append(np.rint((segment + 0.5) * scale - 0.5)
+                                     .astype(np.int32).reshape(-1, 1, 2))
+        lines.append((level, polylines))
+    return lines
+
+
+def _draw_tx_markers(image, tx_positions_px):
+    """Dessine les étoiles et étiquettes des points d'accès"""
+    size = max(12, min(image.shape[:2]) // 30)
+    for i, (x, y) in enumerate(tx_positions_px):
+        center = (int(x), int(y))
+        cv2.drawMarker(image, center, (0, 0, 0), cv2.MARKER_STAR, size + 4, 5)
+        cv2.drawMarker(image, center, TX_COLOR, cv2.MARKER_STAR, size, 2)
+        label = 'Tx' if len(tx_positions_px) == 1 else f'Tx{i + 1}'
+        origin = (center[0] - 6 * len(label), center[1] - size // 2 - 6)
+        cv2.putText(image, label, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                    (0, 0, 0), 3, cv2.LINE_AA)
+        cv2.putText(image, label, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                    TX_COLOR, 1, cv2.LINE_AA)
+
+
+def _colorbar(height, vmin, vmax, cmap):
+    """Barre de couleur verticale graduée (dB), à accoler à droite de l'image"""
+    panel = np.full((height, COLORBAR_WIDTH, 3), 255, dtype=np.uint8)
+    margin = 10
+    bar_height = max(height - 2 * margin, 2)
+    lut = colormap_lut(cmap)
+    index = np.linspace(len(lut) - 1, 0, bar_height).astype(np.intp)
+    panel[margin:margin + bar_height, 8:28] = lut[index][:, None, :]
+    cv2.rectangle(panel, (8, margin), (27, margin + bar_height - 1), (0, 0, 0), 1)
+    for value in np.linspace(vmin, vmax, 5):
+        y = margin + int(round((vmax - value) / (vmax - vmin) * (bar_height - 1)))
+        cv2.putText(panel, f'{value:.0f} dB', (32, y + 4), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.4, (0, 0, 0), 1, cv2.LINE_AA)
+    return panel
+
+
+def render_heatmap(gray_img, grid, path_loss_values, tx_positions_px, lattice=None,
+                   step=None, cmap='jet', alpha=0.7, num_levels=10, colorbar=True):
+    """
+    Rend la heatmap à la résolution du plan, directement en RGB
+
+    La grille est convertie en couleurs par la table de la palette puis
+    mélangée (alpha) au plan en niveaux de gris ; les lignes de niveau sont
+    calculées sur la grille grossière des récepteurs et remises à l'échelle,
+    puis les points d'accès sont dessinés. Le rendu équivaut à la figure
+    matplotlib, sans axes ni titre.
+
+    Args:
+        gray_img: Plan en niveaux de gris (hauteur, largeur)
+        grid: Grille interpolée (hauteur, largeur) du path loss, NaN aux murs
+        path_loss_values: Path loss des récepteurs (bornes de la palette)
+        tx_positions_px: Positions [(x, y), ...] des AP en pixels
+        lattice: Grille grossière des récepteurs pour les lignes de niveau
+            (voir rx_to_lattice) ; None pour ne pas les tracer
+        step: Pas de la grille grossière en pixels
+        cmap: Nom de la palette
+        alpha: Opacité de la heatmap
+        num_levels: Nombre de lignes de niveau
+        colorbar: Ajouter la barre de couleur à droite
+
+    Returns:
+        np.ndarray: Image RGB uint8 (hauteur, largeur [+ barre], 3)
+    """
+    vmin, vmax = _value_range(path_loss_values)
+
+    # Plan en arrière-plan (gris atténué sur fond blanc)
+    base = gray_img.astype(np.float32) * PLAN_ALPHA + 255 * (1 - PLAN_ALPHA)
+    image = np.repeat(base[:, :, None], 3, axis=2)
+
+    colors, valid = colorize(grid, vmin, vmax, cmap)
+    image[valid] = alpha * colors[valid] + (1 - alpha) * image[valid]
+    image = np.rint(image).astype(np.uint8)
+
+    values = np.asarray(path_loss_values)
+    if (lattice is not None and step and values.size > 50
+            and np.std(values) > 1):
+        layer = image.copy()
+        for level, polylines in contour_lines(lattice, step,
+                                              np.linspace(vmin, vmax, num_levels)):
+            if not polylines:
+                continue
+            cv2.polylines(layer, polylines, False, CONTOUR_COLOR, 1, cv2.LINE_AA)
+            longest = max(polylines, key=len)
+            x, y = longest[len(longest) // 2, 0]
+            cv2.putText(layer, f'{level:.0f} dB', (int(x) + 3, int(y) - 3),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, CONTOUR_COLOR, 1, cv2.LINE_AA)
+        cv2.addWeighted(layer, 0.5, image, 0.5, 0, dst=image)
+
+    _draw_tx_markers(image, tx_positions_px)
+
+    if colorbar:
+        image = np.hstack((image, _colorbar(image.shape[0], vmin, vmax, cmap)))
+    return image
+
+
+def encode_png(image):
+    """
+    Encode une image RGB en PNG
+
+    Args:
+        image: Image RGB uint8
+
+    Returns:
+        bytes: Contenu du fichier PNG
+    """
+    ok, buffer = cv2.imencode('.png', cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    if not ok:
+        raise ValueError("Échec de l'encodage PNG.")
+    return buffer.tobytes()
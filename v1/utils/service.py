@@ -0,0 +1,404 @@
+# utils/service.py
+"""
+Module pour le service HTTP local de prédiction (file de jobs et pool de workers)
+"""
+
+import base64
+import io
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from utils.batch import parse_tx_positions
+from utils.export import save_grid_npy
+from utils.image_processing import load_plan
+from utils.path_loss_calculator import rx_to_lattice
+from utils.pipeline import HeatmapPipeline, PipelineError
+from utils.rendering import encode_png, render_heatmap
+
+
+PARAMETER_FIELDS = ('length_m', 'width_m', 'tx', 'frequency_mhz', 'step')
+
+
+class ServiceError(Exception):
+    """Erreur de requête, avec le code HTTP à renvoyer"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Job:
+    """
+    Job de génération soumis au service
+
+    Attributes:
+        id: Identifiant du job
+        params: Paramètres validés
+        status: 'queued', 'running', 'done' ou 'error'
+        grid: Grille float32 (hauteur, largeur) du path loss une fois terminé
+        lattice: Grille grossière des récepteurs (lignes de niveau du PNG)
+        error: Message d'erreur éventuel
+    """
+
+    def __init__(self, plan_bytes, params):
+        self.id = uuid.uuid4().hex
+        self.plan_bytes = plan_bytes
+        self.params = params
+        self.status = 'queued'
+        self.grid = None
+        self.lattice = None
+        self.step = None
+        self.tx_positions_px = None
+        self.receivers = 0
+        self.error = None
+        self.png = None
+        self.submitted_at = time.time()
+        self.seconds = None
+
+    def to_dict(self):
+        """Représentation JSON du statut du job"""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'params': self.params,
+            'receivers': self.receivers,
+            'seconds': self.seconds,
+            'error': self.error,
+            'shape': list(self.grid.shape) if self.grid is not None else None,
+        }
+
+
+def parse_job_params(raw):
+    """
+    Valide les paramètres d'un job
+
+    Args:
+        raw: Dictionnaire (corps JSON ou paramètres de l'URL)
+
+    Returns:
+        dict: Paramètres convertis
+
+    Raises:
+        ServiceError: Paramètre manquant ou invalide (400)
+    """
+    missing = [field for field in PARAMETER_FIELDS if field not in raw]
+    if missing:
+        raise ServiceError(HTTPStatus.BAD_REQUEST,
+                           f"Paramètre(s) manquant(s) : {', '.join(missing)}")
+    try:
+        params = {
+            'length_m': float(raw['length_m']),
+            'width_m': float(raw['width_m']),
+            'tx': parse_tx_positions(raw['tx']),
+            'frequency_mhz': float(raw['frequency_mhz']),
+            'step': int(raw['step']),
+            'wall_method': str(raw.get('wall_method', 'exact')),
+            'interpolation_method': str(raw.get('interpolation_method', 'lattice')),
+            'sampling': str(raw.get('sampling', 'uniform')),
+        }
+    except (TypeError, ValueError) as e:
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"Paramètre invalide : {e}") from e
+
+    if params['length_m'] <= 0 or params['width_m'] <= 0 or params['step'] <= 0:
+        raise ServiceError(HTTPStatus.BAD_REQUEST,
+                           "Dimensions et pas doivent être positifs.")
+    if not 100 <= params['frequency_mhz'] <= 10000:
+        raise ServiceError(HTTPStatus.BAD_REQUEST, "Fréquence hors de la plage valide.")
+    return params
+
+
+class PredictionService:
+    """
+    File bornée de jobs servie par un pool de threads partageant le modèle
+
+    Le prédicteur reste chargé pendant toute la vie du service et les
+    threads partagent un pipeline mémorisé : un même plan soumis plusieurs
+    fois n'est décodé qu'une fois. Quand la file est pleine, la soumission
+    est refusée (le client doit réessayer plus tard).
+
+    Attributes:
+        predictor: Modèle ou objet exposant predict(X)
+        workers: Nombre de threads de calcul
+        queue_size: Nombre maximal de jobs en attente
+        max_jobs: Nombre de jobs conservés (les plus anciens terminés sont oubliés)
+    """
+
+    def __init__(self, predictor, workers=2, queue_size=16, max_jobs=256,
+                 cache_entries=4):
+        self.predictor = predictor
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_jobs = max_jobs
+        self.pipeline = HeatmapPipeline(cache_entries)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._accepting = False
+
+    def start(self):
+        """Démarre les threads de calcul"""
+        self._accepting = True
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'pathloss-worker-{index}',
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait=True):
+        """Refuse les nouveaux jobs et arrête les threads après la file"""
+        self._accepting = False
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def submit(self, plan_bytes, params):
+        """
+        Met un job en file
+
+        Returns:
+            Job: Job créé
+
+        Raises:
+            ServiceError: Service arrêté (503) ou file pleine (429)
+        """
+        if not self._accepting:
+            raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, "Service en cours d'arrêt.")
+        job = Job(plan_bytes, params)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise ServiceError(HTTPStatus.TOO_MANY_REQUESTS,
+                                   "File d'attente pleine, réessayez plus tard.") from None
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        return job
+
+    def get(self, job_id):
+        """
+        Retourne un job
+
+        Raises:
+            ServiceError: Job inconnu (404)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Job inconnu : {job_id}")
+        return job
+
+    def render_png(self, job):
+        """
+        Figure PNG d'un job terminé (tracée à la première demande)
+
+        La grille conservée par le job est colorisée directement (rendu
+        raster, sans pyplot : sûr entre threads) ; le pipeline n'est pas
+        réexécuté, la requête ne fait donc aucun calcul de géométrie ni de
+        prédiction et ne contourne pas la file des jobs.
+
+        Raises:
+            ServiceError: Job non terminé (409)
+        """
+        if job.status != 'done':
+            raise ServiceError(HTTPStatus.CONFLICT, f"Job non terminé ({job.status}).")
+        if job.png is None:
+            plan, error = load_plan(job.plan_bytes)
+            if error:
+                raise ServiceError(HTTPStatus.INTERNAL_SERVER_ERROR, error)
+            values = job.lattice[np.isfinite(job.lattice)]
+            job.png = encode_png(render_heatmap(plan.gray_img, job.grid, values,
+                                                job.tx_positions_px, job.lattice,
+                                                job.step))
+        return job.png
+
+    def health(self):
+        """État du service"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {'workers': self.workers, 'queue_size': self.queue_size,
+                'queued': self._queue.qsize(), 'jobs': counts,
+                'accepting': self._accepting}
+
+    def _forget_old_jobs(self):
+        """Oublie les jobs terminés les plus anciens au-delà de max_jobs"""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.status in ('done', 'error')][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        """Exécute le pipeline pour un job (étapes réutilisées si possible)"""
+        params = job.params
+        return self.pipeline.run(
+            job.plan_bytes, params['length_m'], params['width_m'], params['tx'],
+            params['frequency_mhz'], params['step'], self.predictor,
+            wall_method=params['wall_method'],
+            interpolation_method=params['interpolation_method'],
+            sampling=params['sampling'], render=False
+        )
+
+    def _work(self):
+        """Boucle d'un thread de calcul"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job.status = 'running'
+            start = time.perf_counter()
+            try:
+                result = self._run(job)
+                rx = result.rx_data
+                job.grid = np.ascontiguousarray(result.grid, dtype=np.float32)
+                img_height, img_width = job.grid.shape
+                job.lattice = rx_to_lattice(rx.rx_x, rx.rx_y, rx.path_loss, rx.step,
+                                            img_width, img_height)
+                job.step = rx.step
+                job.tx_positions_px = result.tx_positions_px
+                job.receivers = len(rx)
+                job.status = 'done'
+            except PipelineError as e:
+                job.error, job.status = str(e), 'error'
+            except Exception as e:
+                job.error, job.status = f"{type(e).__name__}: {e}", 'error'
+            job.seconds = round(time.perf_counter() - start, 4)
+
+
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes HTTP du service
+
+    POST /jobs                 Soumettre un job (JSON avec le plan en base64
+                               dans 'plan', ou image brute et paramètres dans
+                               l'URL : ?length_m=10&width_m=8&tx=5:4&...)
+    GET  /jobs/<id>            Statut du job
+    GET  /jobs/<id>/grid       Grille float32 au format .npy
+    GET  /jobs/<id>/png        Figure PNG
+    GET  /health               État du service
+    """
+
+    service = None
+    max_upload_bytes = 20 * 1024 * 1024
+
+    def log_message(self, format, *args):
+        pass  # Pas de journal par requête sur la sortie d'erreur
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, error):
+        headers = {'Retry-After': '1'} if error.status in (
+            HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE) else None
+        self._send(error.status, {'error': str(error)}, headers=headers)
+
+    def _read_body(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST,
+                               "En-tête Content-Length invalide.") from None
+        if length <= 0:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Corps de requête vide.")
+        if length > self.max_upload_bytes:
+            raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Plan trop volumineux.")
+        return self.rfile.read(length)
+
+    def do_POST(self):
+        try:
+            url = urlparse(self.path)
+            if url.path.rstrip('/') != '/jobs':
+                raise ServiceError(HTTPStatus.NOT_FOUND, "Route inconnue.")
+
+            body = self._read_body()
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                try:
+                    raw = json.loads(body)
+                    plan_bytes = base64.b64decode(raw.pop('plan'), validate=True)
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    raise ServiceError(HTTPStatus.BAD_REQUEST,
+                                       f"Corps JSON invalide : {e}") from e
+            else:
+                raw = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                plan_bytes = body
+
+            job = self.service.submit(plan_bytes, parse_job_params(raw))
+            self._send(HTTPStatus.ACCEPTED, job.to_dict(),
+                       headers={'Location': f'/jobs/{job.id}'})
+        except ServiceError as e:
+            self._send_error(e)
+        except Exception as e:
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR,
+                       {'error': f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        try:
+            parts = [part for part in urlparse(self.path).path.split('/') if part]
+            if parts == ['health']:
+                self._send(HTTPStatus.OK, self.service.health())
+                return
+            if len(parts) not in (2, 3) or parts[0] != 'jobs':
+                raise ServiceError(HTTPStatus.NOT_FOUND, "Route inconnue.")
+
+            job = self.service.get(parts[1])
+            if len(parts) == 2:
+                self._send(HTTPStatus.OK, job.to_dict())
+            elif parts[2] == 'grid':
+                if job.status != 'done':
+                    raise ServiceError(HTTPStatus.CONFLICT,
+                                       f"Job non terminé ({job.status}).")
+                buf = io.BytesIO()
+                save_grid_npy(buf, job.grid)
+                self._send(HTTPStatus.OK, buf.getvalue(), 'application/octet-stream')
+            elif parts[2] == 'png':
+                self._send(HTTPStatus.OK, self.service.render_png(job), 'image/png')
+            else:
+                raise ServiceError(HTTPStatus.NOT_FOUND, "Route inconnue.")
+        except ServiceError as e:
+            self._send_error(e)
+        except Exception as e:
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR,
+                       {'error': f"{type(e).__name__}: {e}"})
+
+
+def create_server(service, host='127.0.0.1', port=8765, max_upload_bytes=None):
+    """
+    Crée le serveur HTTP (un thread par connexion) pour un service démarré
+
+    Args:
+        service: PredictionService
+        host: Adresse d'écoute (locale par défaut)
+        port: Port (0 = port libre choisi par le système)
+        max_upload_bytes: Taille maximale d'un plan soumis
+
+    Returns:
+        ThreadingHTTPServer: Serveur prêt pour serve_forever()
+    """
+    attributes = {'service': service}
+    if max_upload_bytes is not None:
+        attributes['max_upload_bytes'] = max_upload_bytes
+    handler = type('BoundPredictionRequestHandler', (PredictionRequestHandler,),
+                   attributes)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server